@@ -11,6 +11,8 @@ AGENT_VERSION = "0.202"
 # Config file
 CONFIG_AGENT_PATH = "/etc/monnet/agent-config"
 DATASTORE_FILE_PATH = "/tmp/datastore.json"
+# Undelivered notifications spool
+OUTBOX_PATH = "/var/lib/monnet/agent_outbox.db"
 # Track timers
 timers = {}
 
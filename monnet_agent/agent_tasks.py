@@ -81,13 +81,27 @@ def send_stats(ctx: AppContext, datastore, notify_callback):
         if last_avg_stats and 'loadavg' in last_avg_stats:
             data['load_avg_stats'] = last_avg_stats['loadavg']
 
+        # High resolution samples of the interval: spikes and true averages
+        hires_stats = None
+        hires_sampler = ctx.get_var("hires_sampler")
+        if hires_sampler is not None:
+            hires_stats = hires_sampler.report()
+            data['hires_stats'] = hires_stats
+
+        # Top processes and per CPU usage (optional)
+        process_stats = ctx.get_var("process_stats")
+        if process_stats is not None:
+            data['process_stats'] = process_stats.sample()
+
         # Io wait
         iowait_last_stats = datastore.get_data("iowait_last_stats")
         if not iowait_last_stats:
             iowait_last_stats = datastore.get_data("last_iowait")
         last_iowait = datastore.get_data("last_iowait")
 
-        if iowait_last_stats is not None and last_iowait is not None:
+        if hires_stats and hires_stats["iowait"]:
+            data['iowait_stats'] = hires_stats["iowait"]["avg"]
+        elif iowait_last_stats is not None and last_iowait is not None:
             average_iowait = (iowait_last_stats + last_iowait) / 2
             datastore.update_data("iowait_last_stats", last_iowait)
             data['iowait_stats'] = average_iowait
@@ -100,7 +114,9 @@ def send_stats(ctx: AppContext, datastore, notify_callback):
             last_memory_stats = datastore.get_data("last_memory_info")
         last_memory_info = datastore.get_data("last_memory_info")
 
-        if (
+        if hires_stats and hires_stats["memory"]:
+            data['memory_stats'] = round(hires_stats["memory"]["avg"])
+        elif (
             last_memory_stats and last_memory_info and
             last_memory_stats.get('meminfo', {}).get('percent') is not None and
             last_memory_info.get('meminfo', {}).get('percent') is not None
@@ -127,6 +143,9 @@ def hourly_task(ctx: AppContext, datastore, notify_callback):
     logger.debug("hourly_task triggered")
     try:
         import info_linux
+        from monnet_agent.meta import refresh_static_meta
+        # Off the send path: hostname, ip address or timezone (DST) changes
+        refresh_static_meta(ctx)
         data = {}
         try:
             uptime = info_linux.get_uptime()
@@ -14,9 +14,6 @@ import signal
 import time
 from typing import Any, Dict
 
-# Third Party
-import psutil
-
 # Local Shared
 from monnet_shared.log_level import LogLevel
 from monnet_shared.event_type import EventType
@@ -26,9 +23,17 @@ from monnet_shared.app_context import AppContext
 from monnet_agent.agent_sched import AgentTaskSched
 from monnet_agent import info_linux
 from monnet_agent.datastore import Datastore
+from monnet_agent.delta import DeltaEncoder
 from monnet_agent.event_processor import EventProcessor
-from monnet_agent.handle_signals import handle_signal
-from monnet_agent.notifications import send_notification
+from monnet_agent.hires_sampler import get_hires_sampler
+from monnet_agent.handle_signals import handle_signal, handle_sighup
+from monnet_agent.notifications import (
+    build_notification, get_notification_queue, post_notification, queue_notification, replay_outbox,
+    send_notification, spool_notification
+)
+from monnet_agent.outbox import get_outbox
+from monnet_agent.process_stats import get_process_stats
+from monnet_agent.proc_sampler import get_proc_sampler
 from monnet_agent.requests import send_request, validate_response
 from monnet_agent.agent_net_utils import get_mac_from_ip, get_own_mac
 from monnet_shared.com_net_utils import send_wol, get_default_interface
@@ -42,8 +47,13 @@ class MonnetAgent:
             self.config = ctx.get_config()
             self.datastore = Datastore(ctx)
             self.event_processor = EventProcessor(ctx)
-            self.last_cpu_times = psutil.cpu_times()
-            self.task_scheduler = AgentTaskSched(self.ctx, self.datastore, send_notification)
+            self.sampler = get_proc_sampler(ctx)
+            self.last_cpu_times = self.sampler.cpu_times()
+            # Delta metrics protocol, needs server support
+            self.delta_encoder = None
+            if self.config.get("delta_metrics", False):
+                self.delta_encoder = DeltaEncoder(int(self.config.get("delta_full_every", 60)))
+            self.task_scheduler = AgentTaskSched(self.ctx, self.datastore, queue_notification)
         except Exception as e:
             self.logger.error(f"Error initializing MonnetAgent: {e}")
             return
@@ -79,6 +89,15 @@ class MonnetAgent:
             self.logger.error(f"Error setting up task scheduler: {e}")
             return False
 
+        hires_sampler = get_hires_sampler(self.ctx)
+        if hires_sampler is not None:
+            hires_sampler.start()
+
+        # Optional, first sample is the baseline of the rates
+        process_stats = get_process_stats(self.ctx)
+        if process_stats is not None:
+            process_stats.sample()
+
         self.logger.debug("Agent Core initialized successfully.")
 
         return True
@@ -131,8 +150,9 @@ class MonnetAgent:
                 self.datastore.delete_data("collect_macs")
 
             self.logger.debug(f"Data values prepared for ping: {data_values}")
-            self._send_ping(data_values)
+            # Events first, when batched they go in this ping
             self._process_events()
+            self._send_ping(data_values)
 
             # Comprueba que el scheduler sigue vivo
             self.task_scheduler.ensure_running()
@@ -179,28 +199,21 @@ class MonnetAgent:
         send_notification(self.ctx, 'starting', starting_data)
 
     def _collect_system_data(self) -> Dict[str, Any]:
-        """Collect system metrics and return as a dictionary."""
+        """
+        Collect system metrics and return as a dictionary: the changed metric groups,
+        or the changed leaves ("metrics") with delta_metrics.
+        """
         system_metrics = {}
+        current_metrics = {}
 
-        # Get system info
-        # Load AVG
-        try:
-            current_load_avg = info_linux.get_load_avg()
-        except (FileNotFoundError, ValueError, OSError) as e:
-            self.logger.warning(f"Error load avg: {e}")
-            current_load_avg = None
-        # Memory
-        try:
-            current_memory_info = info_linux.get_memory_info()
-        except (FileNotFoundError, ValueError, OSError) as e:
-            self.logger.warning(f"Error memory info: {e}")
-            current_memory_info = None
-        # Disk
-        try:
-            current_disk_info = info_linux.get_disks_info()
-        except (FileNotFoundError, ValueError, OSError) as e:
-            self.logger.warning(f"Error memory info: {e}")
-            current_disk_info = None
+        # Get system info, one pass over the kept open /proc files
+        snapshot = self.sampler.sample()
+        current_load_avg = info_linux.load_avg_info(*snapshot.loadavg)
+        current_memory_info = info_linux.memory_info(snapshot.meminfo)
+        current_disk_info = info_linux.disks_info(snapshot.disks)
+
+        for metric in (current_load_avg, current_memory_info, current_disk_info):
+            current_metrics.update(metric)
 
         # Check and update load average
         if current_load_avg is not None and current_load_avg != self.datastore.get_data("last_load_avg"):
@@ -218,14 +231,19 @@ class MonnetAgent:
             system_metrics.update(current_disk_info)
 
         # Get and Update IOwait
-        current_cpu_times = psutil.cpu_times()
+        current_cpu_times = snapshot.cpu_times
         current_iowait = info_linux.get_iowait(self.last_cpu_times, current_cpu_times)
         current_iowait = round(current_iowait, 2)
         if current_iowait != self.datastore.get_data("last_iowait"):
             self.datastore.update_data("last_iowait", current_iowait)
             system_metrics.update({'iowait': current_iowait})
+        current_metrics['iowait'] = current_iowait
         self.last_cpu_times = current_cpu_times
 
+        if self.delta_encoder is not None:
+            delta = self.delta_encoder.encode(current_metrics)
+            return {"metrics": delta} if delta else {}
+
         return system_metrics
 
     def _send_ping(self, data_values: Dict[str, Any]):
@@ -236,11 +254,24 @@ class MonnetAgent:
             self.logger.debug("No data values to send in ping")
             data_values = {}
 
+        # Queued notifications piggyback on the ping
+        notification_queue = get_notification_queue(self.ctx)
+        batch = notification_queue.pop_all()
+        if batch:
+            data_values["notifications"] = batch
+
         self.logger.debug(f"Ping data: {data_values}")
         response = send_request(self.ctx, cmd="ping", data=data_values)
+        if response is None and batch:
+            self._spool_batch(batch)
+        if response is None and self.delta_encoder is not None:
+            # The server may have missed this delta, resync
+            self.delta_encoder.request_full()
 
         if response:
             self.logger.debug(f"Response received: {response}")
+            # Server reachable, deliver the notifications spooled during an outage
+            replay_outbox(self.ctx)
             valid_response = validate_response(self.ctx, response, self.config.get("token"))
             if valid_response:
                 self.logger.debug("Valid response received. Handling response...")
@@ -250,6 +281,29 @@ class MonnetAgent:
         else:
             self.logger.err("No response received from server")
 
+    def _spool_batch(self, batch: list):
+        """Keep the notifications of a failed ping in the outbox (or back in the queue)."""
+        if get_outbox(self.ctx) is None:
+            get_notification_queue(self.ctx).requeue(batch)
+            return
+        for notification in batch:
+            payload = build_notification(self.ctx, notification["name"], notification["data"], notification["meta"])
+            spool_notification(self.ctx, payload)
+
+    def _flush_notifications(self):
+        """Do not lose the queued notifications on stop: spooled in the outbox, or sent once."""
+        batch = get_notification_queue(self.ctx).pop_all()
+        if not batch:
+            return
+        outbox = get_outbox(self.ctx)
+        for notification in batch:
+            payload = build_notification(self.ctx, notification["name"], notification["data"], notification["meta"])
+            if outbox is not None:
+                spool_notification(self.ctx, payload)
+            else:
+                post_notification(self.ctx, payload)
+        self.logger.info(f"{len(batch)} queued notifications flushed on stop")
+
     def _handle_valid_response(self, response: Dict[str, Any]):
         """Handle valid server response."""
         data = response.get("data", {})
@@ -279,6 +333,10 @@ class MonnetAgent:
                     return
                 self.logger.info(f"Config file updated: {self.config.file_config}")
 
+        # Server lost the delta base, full metrics snapshot next ping
+        if isinstance(data, dict) and data.get("metrics_full") and self.delta_encoder is not None:
+            self.delta_encoder.request_full()
+
         # sendwol
         if isinstance(data, dict) and "sendwol" in data:
             sendwol_data = data["sendwol"]
@@ -307,12 +365,13 @@ class MonnetAgent:
         events = self.event_processor.process_changes(self.datastore)
         for event in events:
             self.logger.logpo(f"Sending event: {event}", "debug")
-            send_notification(self.ctx, event["name"], event["data"])
+            queue_notification(self.ctx, event["name"], event["data"])
 
     def _setup_handlers(self):
         """Setup signal handlers."""
         signal.signal(signal.SIGINT, lambda signum, frame: handle_signal(signum, frame, self.ctx))
         signal.signal(signal.SIGTERM, lambda signum, frame: handle_signal(signum, frame, self.ctx))
+        signal.signal(signal.SIGHUP, lambda signum, frame: handle_sighup(signum, frame, self.ctx))
 
     def _sleep_interval(self, start_time: float):
         """Sleep for the remaining interval time."""
@@ -333,5 +392,20 @@ class MonnetAgent:
         self.ctx.set_var("agent_running", False)
         if self.task_scheduler.is_running():
             self.task_scheduler.stop()
+        # Before closing the transport and the outbox
+        self._flush_notifications()
+        transport = self.ctx.get_var("transport")
+        if transport is not None:
+            transport.close()
+        outbox = self.ctx.get_var("outbox")
+        if outbox is not None:
+            outbox.close()
+        hires_sampler = self.ctx.get_var("hires_sampler")
+        if hires_sampler is not None:
+            hires_sampler.stop()
+        process_stats = self.ctx.get_var("process_stats")
+        if process_stats is not None:
+            process_stats.close()
+        self.sampler.close()
 
         self.logger.info("Agent stopped.")
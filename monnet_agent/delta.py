@@ -0,0 +1,117 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Delta
+
+@description Delta encoding of the ping system metrics. The metric groups are flattened to
+    leaf keys ("meminfo.free", "disksinfo.0.used") and only the leaves changed since the
+    previous payload are sent, chained by sequence number:
+
+    "metrics": {
+        "seq": int,          # Payload sequence
+        "base_seq": int,     # Sequence the delta applies to (absent on a full snapshot)
+        "full": bool,        # True: values replace the whole state
+        "values": dict,      # Changed (or all) leaves
+        "removed": list      # Leaves gone since base_seq
+    }
+
+    A full snapshot is sent every full_every payloads, after a failed ping and when the
+    server asks for it (data "metrics_full"), so a server missing a base_seq can resync.
+"""
+# Std
+from typing import Any, Dict
+
+SEPARATOR = "."
+
+
+def flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested dicts and lists to leaf keys.
+
+    Args:
+        metrics (dict): Nested metrics.
+        prefix (str): Key prefix.
+    Returns:
+        dict: {"group.key": value}
+    """
+    flat = {}
+    for key, value in metrics.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, path + SEPARATOR))
+        elif isinstance(value, list) and value:
+            flat.update(flatten(dict(enumerate(value)), path + SEPARATOR))
+        else:
+            flat[path] = value
+
+    return flat
+
+
+def apply_delta(state: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a "metrics" payload to a flattened state (receiver side of the protocol).
+
+    Args:
+        state (dict): Flattened state at base_seq.
+        metrics (dict): Payload "metrics".
+    Returns:
+        dict: New flattened state.
+    """
+    new_state = {} if metrics.get("full") else dict(state)
+    for key in metrics.get("removed", []):
+        new_state.pop(key, None)
+    new_state.update(metrics.get("values", {}))
+
+    return new_state
+
+
+class DeltaEncoder:
+    """
+    Keeps the last sent flattened metrics and builds the "metrics" payloads.
+    """
+
+    def __init__(self, full_every: int = 60):
+        """
+        Args:
+            full_every (int): Payloads between full snapshots.
+        """
+        self.full_every = max(1, int(full_every))
+        self.seq = 0
+        self._baseline: Dict[str, Any] = {}
+        self._since_full = 0
+        self._force_full = True
+
+    def encode(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the payload for the current metrics.
+
+        Args:
+            metrics (dict): Current metric groups (all of them, not only the changed).
+        Returns:
+            dict: "metrics" payload, empty if nothing changed.
+        """
+        flat = flatten(metrics)
+
+        if self._force_full or self._since_full >= self.full_every:
+            self.seq += 1
+            self._baseline = flat
+            self._since_full = 0
+            self._force_full = False
+            return {"seq": self.seq, "full": True, "values": dict(flat), "removed": []}
+
+        changed = {key: value for key, value in flat.items()
+                   if key not in self._baseline or self._baseline[key] != value}
+        removed = [key for key in self._baseline if key not in flat]
+        self._since_full += 1
+        if not changed and not removed:
+            return {}
+
+        base_seq = self.seq
+        self.seq += 1
+        self._baseline = flat
+
+        return {"seq": self.seq, "base_seq": base_seq, "full": False, "values": changed, "removed": removed}
+
+    def request_full(self) -> None:
+        """ Send a full snapshot next (failed ping or server request) """
+        self._force_full = True
@@ -97,14 +97,19 @@ class EventProcessor:
                     event_type = EventType.HIGH_CPU_USAGE
 
                     if self._should_send_event(event_id, current_time):
+                        event_data = {
+                            "cpu_usage": loadavg_data["usage"],
+                            "event_value": loadavg_data.get("usage"),
+                            "log_level": log_level,
+                            "event_type": event_type
+                        }
+                        # The culprits of the last stats interval, if process stats are enabled
+                        process_stats = self.ctx.get_var("process_stats")
+                        if process_stats is not None and process_stats.last_result is not None:
+                            event_data["top_processes"] = process_stats.last_result["top_cpu"]
                         events.append({
                             "name": "high_cpu_usage",
-                            "data": {
-                                "cpu_usage": loadavg_data["usage"],
-                                "event_value": loadavg_data.get("usage"),
-                                "log_level": log_level,
-                                "event_type": event_type
-                            }
+                            "data": event_data
                         })
                         self._mark_event(event_id, current_time)
             else:
@@ -16,10 +16,22 @@ import sys
 # Local
 import info_linux
 from monnet_shared.app_context import AppContext
+from monnet_agent.meta import invalidate_static_meta
 from monnet_agent.notifications import send_notification
 from monnet_shared.log_level import LogLevel
 from monnet_shared.event_type import EventType
 
+def handle_sighup(signum, frame, ctx: AppContext):
+    """
+    SIGHUP Handler: reload the cached host metadata, keep running
+
+    Returns:
+        None
+    """
+    ctx.get_logger().notice("Receive Signal SIGHUP, reloading host metadata")
+    invalidate_static_meta(ctx)
+
+
 def handle_signal(signum, frame, ctx: AppContext):
     """
     Signal Handler
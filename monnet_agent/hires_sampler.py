@@ -0,0 +1,195 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - High Resolution Sampler
+
+@description Background sampler: CPU, iowait and memory percent every second (config
+    hires_sample_period, 0 disables) into fixed size array('d') ring buffers, so the spikes
+    between pings are not lost. send_stats takes min/avg/max/p95 of the interval and resets
+    the buffers. Memory is bounded by the capacity (oldest samples overwritten) and the
+    sampler own CPU time is measured and reported.
+"""
+# Std
+import math
+import threading
+import time
+from array import array
+
+# Local
+from monnet_agent.proc_sampler import CpuTimes, ProcSampler, get_proc_sampler
+from monnet_shared.app_context import AppContext
+
+_hires_lock = threading.Lock()
+
+METRICS = ("cpu", "iowait", "memory")
+
+
+class RingBuffer:
+    """ Fixed size float ring buffer """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._data = array("d", bytes(8 * self.capacity))
+        self._next = 0
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self) -> list[float]:
+        """ Values, oldest first """
+        if self.count < self.capacity:
+            return self._data[:self.count].tolist()
+        return (self._data[self._next:] + self._data[:self._next]).tolist()
+
+    def clear(self) -> None:
+        self._next = 0
+        self.count = 0
+
+    def summary(self) -> dict | None:
+        """
+        Returns:
+            dict | None: min, avg, max and p95 (nearest rank), None if empty.
+        """
+        if not self.count:
+            return None
+        values = sorted(self.values())
+        p95 = values[max(0, math.ceil(0.95 * len(values)) - 1)]
+
+        return {
+            "min": round(values[0], 2),
+            "avg": round(sum(values) / len(values), 2),
+            "max": round(values[-1], 2),
+            "p95": round(p95, 2),
+        }
+
+
+def cpu_percentages(last: CpuTimes, current: CpuTimes) -> tuple[float, float]:
+    """
+    CPU busy and iowait percent between two samples (iowait as info_linux.get_iowait).
+
+    Returns:
+        tuple[float, float]: cpu, iowait
+    """
+    deltas = [now - before for now, before in zip(current, last)]
+    total = sum(deltas)
+    idle = current.idle - last.idle
+    iowait = current.iowait - last.iowait
+    # get_iowait total: user + nice + system + idle + iowait
+    iowait_total = sum(deltas[:5])
+
+    cpu = (total - idle - iowait) / total * 100 if total > 0 else 0.0
+    iowait_percent = iowait / iowait_total * 100 if iowait_total > 0 else 0.0
+
+    return max(0.0, cpu), max(0.0, iowait_percent)
+
+
+class HighResSampler:
+    """
+    Background sampler thread, shared through the AppContext var "hires_sampler",
+    use get_hires_sampler(ctx).
+    """
+
+    def __init__(self, ctx: AppContext, sampler: ProcSampler, period: float = 1.0, capacity: int = 600):
+        """
+        Args:
+            ctx (AppContext): Context.
+            sampler (ProcSampler): /proc reader.
+            period (float): Seconds between samples.
+            capacity (int): Samples kept per metric between reports.
+        """
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.sampler = sampler
+        self.period = period
+        self.buffers = {metric: RingBuffer(capacity) for metric in METRICS}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_cpu_times = None
+        # Own cost since the last report
+        self._cpu_time = 0.0
+        self._samples = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="hires_sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.period + 1)
+
+    def sample(self) -> None:
+        """ Take one sample """
+        cpu_times = self.sampler.cpu_times()
+        meminfo = self.sampler.memory()
+        with self._lock:
+            if self._last_cpu_times is not None:
+                cpu, iowait = cpu_percentages(self._last_cpu_times, cpu_times)
+                self.buffers["cpu"].append(cpu)
+                self.buffers["iowait"].append(iowait)
+            total = meminfo["MemTotal"]
+            if total > 0:
+                self.buffers["memory"].append((total - meminfo["MemAvailable"]) / total * 100)
+            self._last_cpu_times = cpu_times
+
+    def report(self) -> dict:
+        """
+        Summary of the samples since the last report, and reset.
+
+        Returns:
+            dict: {metric: {min, avg, max, p95}, "samples": int, "sampler_cpu_ms": float}
+        """
+        with self._lock:
+            stats = {metric: buffer.summary() for metric, buffer in self.buffers.items()}
+            stats["samples"] = self._samples
+            # Average own CPU time per sample
+            stats["sampler_cpu_ms"] = round(self._cpu_time / self._samples * 1000, 3) if self._samples else 0.0
+            for buffer in self.buffers.values():
+                buffer.clear()
+            self._cpu_time = 0.0
+            self._samples = 0
+
+        return stats
+
+    def _loop(self) -> None:
+        next_run = time.monotonic()
+        while not self._stop_event.is_set() and self.ctx.get_var("agent_running"):
+            start = time.thread_time()
+            try:
+                self.sample()
+            except (FileNotFoundError, ValueError, OSError) as e:
+                self.logger.warning(f"High resolution sampler: {e}")
+            with self._lock:
+                self._cpu_time += time.thread_time() - start
+                self._samples += 1
+            next_run += self.period
+            # Skip the missed periods instead of bursting
+            now = time.monotonic()
+            if next_run < now:
+                next_run = now + self.period
+            self._stop_event.wait(next_run - now)
+
+
+def get_hires_sampler(ctx: AppContext) -> HighResSampler | None:
+    """ Get the context shared sampler, None if disabled (hires_sample_period 0) """
+    with _hires_lock:
+        if ctx.has_var("hires_sampler"):
+            return ctx.get_var("hires_sampler")
+        config = ctx.get_config()
+        period = float(config.get("hires_sample_period", 1.0))
+        hires_sampler = None
+        if period > 0:
+            hires_sampler = HighResSampler(
+                ctx, get_proc_sampler(ctx), period, int(config.get("hires_sample_capacity", 600))
+            )
+        ctx.set_var("hires_sampler", hires_sampler)
+
+    return hires_sampler
@@ -9,10 +9,14 @@ This module provides functions to gather system information on Linux systems.
 import os
 import socket
 import subprocess
-import re
 import shutil
 
 from utils import create_machine_id
+from monnet_agent.sock_diag import get_listen_ports
+from monnet_agent.proc_sampler import ProcSampler, parse_cpu_ticks, parse_loadavg, parse_meminfo
+
+# Kept open between get_disks_info calls, the agent loop uses the context one (get_proc_sampler)
+_disks_sampler = None
 
 def get_cpus():
     """ Get number of CPUs """
@@ -62,6 +66,24 @@ def bytes_to_mb(bytes_value):
         return 0
     return round(bytes_value / (1024 ** 2))
 
+def load_avg_info(load1, load5, load15):
+    """
+    Build the loadavg metric.
+
+    Returns:
+        dict: Dictionary with load averages and CPU usage.
+    """
+    current_cpu_usage = cpu_usage(load1)
+
+    return {
+        "loadavg": {
+            "1min": round(load1, 2),
+            "5min": round(load5, 2),
+            "15min": round(load15, 2),
+            "usage": round(current_cpu_usage, 2)
+        }
+    }
+
 def get_load_avg():
     """Returns the system load average from /proc/loadavg.
 
@@ -74,53 +96,28 @@ def get_load_avg():
         Exception: For other unexpected errors.
     """
     try:
-        with open("/proc/loadavg", "r", encoding='utf-8') as f:
-            values = f.readline().split()
-            load1, load5, load15 = map(float, values[:3])
+        with open("/proc/loadavg", "rb") as f:
+            load1, load5, load15 = parse_loadavg(f.read())
 
     except FileNotFoundError as e:
         raise FileNotFoundError("/proc/loadavg not found (not a Linux system?)") from e
-    except (IndexError, ValueError) as e:
-        raise ValueError(f"Invalid /proc/loadavg format: {e}") from e
+    except ValueError:
+        raise
     except Exception as e:
         raise Exception(f"Unexpected error reading /proc/loadavg: {e}") from e
 
-    current_cpu_usage = cpu_usage(load1)  # Asumo que cpu_usage está definida en otro lugar
+    return load_avg_info(load1, load5, load15)
 
-    return {
-        "loadavg": {
-            "1min": round(load1, 2),
-            "5min": round(load5, 2),
-            "15min": round(load15, 2),
-            "usage": round(current_cpu_usage, 2)
-        }
-    }
-
-def get_memory_info():
+def memory_info(meminfo):
     """
-    Obtain memory info from /proc/meminfo.
+    Build the meminfo metric.
+
+    Args:
+        meminfo (dict): MEMINFO_FIELDS in bytes.
 
     Returns:
         dict: Dictionary with memory information in MB and percentages.
-
-    Raises:
-        FileNotFoundError: If /proc/meminfo does not exist.
-        OSError: If there are problems reading the file.
-        ValueError: If the data format is invalid.
     """
-    if not os.path.exists("/proc/meminfo"):
-        raise FileNotFoundError("/proc/meminfo does not exist")
-
-    meminfo = {}
-    try:
-        with open("/proc/meminfo", "r", encoding='utf-8') as f:
-            for line in f:
-                key, value = line.split(":")
-                meminfo[key.strip()] = int(value.split()[0]) * 1024  # Convert to bytes
-    except (OSError, ValueError) as e:
-        raise type(e)(f"Error processing /proc/meminfo: {e}") from e
-
-    # Calculate memory metrics
     total = meminfo.get("MemTotal", 0)
     available = meminfo.get("MemAvailable", 0)
     free = meminfo.get("MemFree", 0)
@@ -142,10 +139,64 @@ def get_memory_info():
         }
     }
 
-def get_disks_info():
+def get_memory_info():
+    """
+    Obtain memory info from /proc/meminfo.
+
+    Returns:
+        dict: Dictionary with memory information in MB and percentages.
+
+    Raises:
+        FileNotFoundError: If /proc/meminfo does not exist.
+        OSError: If there are problems reading the file.
+        ValueError: If the data format is invalid.
+    """
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            meminfo = parse_meminfo(f.read())
+    except FileNotFoundError:
+        raise
+    except (OSError, ValueError) as e:
+        raise type(e)(f"Error processing /proc/meminfo: {e}") from e
+
+    return memory_info(meminfo)
+
+def disks_info(disks):
+    """
+    Build the disksinfo metric.
+
+    Args:
+        disks (list[DiskUsage]): Filesystems usage in bytes.
+
+    Returns:
+        dict: Disk partitions info with keys: "disksinfo" (list of dicts).
+    """
+    disks_info_list = []
+    for disk in disks:
+        total = bytes_to_mb(disk.total)
+        free = bytes_to_mb(disk.free)
+        used = total - free
+        percent = (used / total) * 100 if total > 0 else 0
+
+        disks_info_list.append({
+            "device": disk.device,
+            "mountpoint": disk.mountpoint,
+            "fstype": disk.fstype,
+            "total": total,
+            "used": used,
+            "free": free,
+            "percent": round(percent, 2)
+        })
+
+    return {"disksinfo": disks_info_list}
+
+def get_disks_info(sampler: ProcSampler | None = None):
     """
     Obtain disk info from /proc/mounts.
 
+    Args:
+        sampler (ProcSampler): Shared sampler, a module one if None.
+
     Returns:
         dict: Disk partitions info with keys: "disksinfo" (list of dicts).
 
@@ -153,53 +204,19 @@ def get_disks_info():
         FileNotFoundError: If /proc/mounts does not exist.
         OSError: If there are problems reading the file or getting stats.
     """
-    if not os.path.exists("/proc/mounts"):
-        raise FileNotFoundError("/proc/mounts does not exist")
-
-    disks_info = []
-    real_filesystems = {
-        "ext4", "ext3", "ext2", "xfs", "zfs", "btrfs", "reiserfs",
-        "vfat", "fat32", "ntfs", "hfsplus", "exfat", "iso9660",
-        "udf", "f2fs", "nfs"
-    }
+    global _disks_sampler
 
+    if sampler is None:
+        if _disks_sampler is None:
+            _disks_sampler = ProcSampler()
+        sampler = _disks_sampler
     try:
-        with open("/proc/mounts", "r", encoding='utf-8') as mounts:
-            for line in mounts:
-                try:
-                    parts = line.split()
-                    if len(parts) < 3:
-                        continue
-
-                    device, mountpoint, fstype = parts[0], parts[1], parts[2]
-
-                    if fstype not in real_filesystems:
-                        continue
-
-                    stat = os.statvfs(mountpoint)
-                    total = bytes_to_mb(stat.f_blocks * stat.f_frsize)
-                    free = bytes_to_mb(stat.f_bfree * stat.f_frsize)
-                    used = total - free
-                    percent = (used / total) * 100 if total > 0 else 0
-
-                    disks_info.append({
-                        "device": device,
-                        "mountpoint": mountpoint,
-                        "fstype": fstype,
-                        "total": total,
-                        "used": used,
-                        "free": free,
-                        "percent": round(percent, 2)
-                    })
-
-                except (OSError, ValueError, IndexError) as e:
-                    continue # Skip this mount
-
+        return disks_info(sampler.disks())
+    except FileNotFoundError as e:
+        raise FileNotFoundError("/proc/mounts does not exist") from e
     except OSError as e:
         raise OSError(f"Error reading /proc/mounts: {e}") from e
 
-    return {"disksinfo": disks_info}
-
 
 def get_uptime():
     """
@@ -241,20 +258,11 @@ def read_cpu_stats():
         ValueError: If data format is invalid.
         OSError: For other I/O related errors.
     """
-    if not os.path.exists("/proc/stat"):
-        raise FileNotFoundError("/proc/stat does not exist")
-
     try:
-        with open("/proc/stat", "r", encoding='utf-8') as f:
-            for line in f:
-                if line.startswith("cpu "):
-                    parts = line.split()
-                    if len(parts) < 7:  # Ensure we have enough values
-                        raise ValueError("Malformed cpu line in /proc/stat")
-                    return tuple(map(int, parts[1:6]))
-
-        raise ValueError("No CPU data found in /proc/stat")
-
+        with open("/proc/stat", "rb") as f:
+            return parse_cpu_ticks(f.readline())[:5]
+    except FileNotFoundError:
+        raise
     except (OSError, ValueError) as e:
         raise type(e)(f"Error reading CPU stats: {e}") from e
 
@@ -263,8 +271,8 @@ def get_iowait(last_cpu_times, current_cpu_times):
     Calculate the percentage of I/O wait time.
 
     Args:
-        last_cpu_times (scputimes): Previous CPU times.
-        current_cpu_times (scputimes): Current CPU times.
+        last_cpu_times (CpuTimes): Previous CPU times.
+        current_cpu_times (CpuTimes): Current CPU times.
 
     Returns:
         float: Calculated I/O wait percentage.
@@ -294,85 +302,15 @@ def get_iowait(last_cpu_times, current_cpu_times):
 
 def get_listen_ports_info():
     """
-    Fetch active listening ports using the `ss` command.
+    Fetch active listening ports (sock_diag netlink, /proc/net fallback).
 
     Returns:
         dict: {"listen_ports_info": [list of port dictionaries]}.
 
     Raises:
-        FileNotFoundError: If the `ss` command is not available.
-        subprocess.CalledProcessError: If the `ss` command fails.
-        Exception: For other unexpected errors.
+        OSError: If neither sock_diag nor /proc/net are available.
     """
-    ports_flattened = []
-    seen_ports = set()
-
-    # Check for ss command first
-    if not shutil.which("ss"):
-        raise FileNotFoundError("ss command not found in PATH")
-
-    try:
-        # Run `ss` command to list listening sockets
-        output = subprocess.check_output(
-            ['ss', '-tulnp'],
-            stderr=subprocess.PIPE,
-            text=True
-        ).splitlines()
-
-        ss_regex = re.compile(
-            r'(?P<state>LISTEN|UNCONN)\s+\d+\s+\d+\s+'
-            r'(?P<local_address>\[.*?\]|[^:\s]+|\*)\:(?P<port>\d+)\s+'
-            r'[^\s]+:\*\s+users:\(\((?P<service>.+?)\)\)'
-        )
-
-        for line in output:
-            try:
-                match = ss_regex.search(line)
-                if not match:
-                    continue
-
-                local_address = match.group('local_address')
-                port = int(match.group('port'))
-                services_raw = match.group('service')
-
-                # Extract service name
-                first_service = re.search(r'"([^"]+)"', services_raw)
-                service = first_service.group(1) if first_service else "unknown"
-
-                # Determine protocol and IP version
-                protocol = 'tcp' if 'tcp' in line else 'udp'
-                ip_version = 'ipv6' if ':' in local_address else 'ipv4'
-
-                # Deduplication
-                dedup_key = (local_address, port, protocol, ip_version)
-                if dedup_key in seen_ports:
-                    continue
-
-                # Format interface address
-                interface = '0.0.0.0' if local_address == '*' and ip_version == 'ipv4' else (
-                    '[::]' if local_address == '*' and ip_version == 'ipv6' else local_address
-                )
-
-                ports_flattened.append({
-                    'interface': interface,
-                    'port': port,
-                    'service': service,
-                    'protocol': protocol,
-                    'ip_version': ip_version
-                })
-                seen_ports.add(dedup_key)
-
-            except (ValueError, AttributeError) as e:
-                # Skip malformed lines but continue processing
-                continue
-
-    except subprocess.CalledProcessError as e:
-        error_msg = f"ss command failed: {e.stderr.strip()}" if e.stderr else "ss command failed"
-        raise subprocess.CalledProcessError(
-            e.returncode, e.cmd, error_msg
-        ) from e
-
-    return {"listen_ports_info": ports_flattened}
+    return {"listen_ports_info": get_listen_ports()}
 
 def is_system_shutting_down() -> bool:
     """
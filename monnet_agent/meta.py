@@ -2,25 +2,28 @@
 @copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
 
 Monnet Agent - Requests
+
+@description Payload metadata. The host part (hostname, ip address, timezone) is cached in
+    the AppContext var "static_meta", refreshed by the hourly task and on SIGHUP, so a slow
+    resolver does not stall every request. Timestamp and uuid are per message.
 """
 
+import threading
 import uuid
 from monnet_agent import agent_config, info_linux
 from monnet_shared import time_utils
 from monnet_shared.app_context import AppContext
 
+_meta_lock = threading.Lock()
 
-def get_meta(ctx: AppContext):
+
+def build_static_meta() -> dict:
     """
-    Build metadata.
+    Build the host metadata (blocking, resolves the hostname).
 
-    Args:
-        ctx (AppContext): Context.
     Returns:
-        dict: Dictionary with metadata.
+        dict: Dictionary with the static metadata.
     """
-
-    timestamp = time_utils.date_now()
     local_timezone = time_utils.get_local_timezone()
     hostname = info_linux.get_hostname()
     nodename = info_linux.get_nodename()
@@ -29,16 +32,57 @@ def get_meta(ctx: AppContext):
     else:
         ip_address = None
 
-    _uuid = str(uuid.uuid4())
-
-    meta = {
-        "timestamp": timestamp,                       # Timestamp  UTC
+    return {
         "timezone": str(local_timezone),              # Timezone
         "hostname": hostname,
         "nodename": nodename,
         "ip_address": ip_address,
         "agent_version": str(agent_config.AGENT_VERSION),
-        "uuid": _uuid                                 # ID uniq
+    }
+
+
+def refresh_static_meta(ctx: AppContext) -> dict:
+    """
+    Rebuild the cached host metadata.
+
+    Args:
+        ctx (AppContext): Context.
+    Returns:
+        dict: Dictionary with the static metadata.
+    """
+    # Built outside the lock, senders keep using the previous one meanwhile
+    static_meta = build_static_meta()
+    with _meta_lock:
+        ctx.set_var("static_meta", static_meta)
+
+    return static_meta
+
+
+def invalidate_static_meta(ctx: AppContext) -> None:
+    """ Rebuild the host metadata on next use (SIGHUP) """
+    # No lock: called from the signal handler, which may interrupt the main thread
+    # holding _meta_lock (non reentrant). A single assignment is atomic.
+    ctx.set_var("static_meta", None)
+
+
+def get_meta(ctx: AppContext):
+    """
+    Build metadata.
+
+    Args:
+        ctx (AppContext): Context.
+    Returns:
+        dict: Dictionary with metadata.
+    """
+    with _meta_lock:
+        static_meta = ctx.get_var("static_meta")
+    if static_meta is None:
+        static_meta = refresh_static_meta(ctx)
+
+    meta = {
+        "timestamp": time_utils.date_now(),          # Timestamp  UTC
+        **static_meta,
+        "uuid": str(uuid.uuid4())                     # ID uniq
     }
     # log(f"Metadata: {meta}", "debug")
     return meta
@@ -4,18 +4,73 @@
 Monnet Agent - Notifications
 """
 # Std
-import ssl
-import http.client
-import json
+from collections import deque
+import threading
 
 # Local
 from monnet_agent.meta import get_meta
+from monnet_agent.outbox import get_outbox
+from monnet_agent.transport import get_transport
 from monnet_shared.app_context import AppContext
+from monnet_shared.log_level import LogLevel
 from monnet_agent import agent_config
 
-def send_notification(ctx: AppContext, name: str, data: dict):
+_queue_lock = threading.Lock()
+
+
+class NotificationQueue:
+    """
+    Notifications waiting for the next ping, sent in its payload as one batch.
+    """
+
+    def __init__(self, max_size: int = 500):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._queue: deque = deque()
+        self.dropped = 0
+
+    def put(self, name: str, data: dict, meta: dict) -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append({"name": name, "data": data or {}, "meta": meta})
+
+    def pop_all(self) -> list[dict]:
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+
+        return batch
+
+    def requeue(self, batch: list[dict]) -> None:
+        """ Put back a batch not delivered, before the newer notifications """
+        with self._lock:
+            self._queue.extendleft(reversed(batch))
+            while len(self._queue) > self.max_size:
+                self._queue.popleft()
+                self.dropped += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+
+def get_notification_queue(ctx: AppContext) -> NotificationQueue:
+    """ Get the context shared queue (var "notification_queue"), created on first use """
+    with _queue_lock:
+        queue = ctx.get_var("notification_queue")
+        if queue is None:
+            queue = NotificationQueue(int(ctx.get_config().get("batch_max_notifications", 500)))
+            ctx.set_var("notification_queue", queue)
+
+    return queue
+
+
+def queue_notification(ctx: AppContext, name: str, data: dict):
     """
-    Send notification to the server.
+    Queue a notification for the next ping (config batch_notifications). ALERT or
+    more urgent notifications, or with batching disabled, are sent at once.
 
     Args:
         ctx (AppContext): Context.
@@ -24,53 +79,118 @@ def send_notification(ctx: AppContext, name: str, data: dict):
     Returns:
         None.
     """
+    log_level = (data or {}).get("log_level")
+    urgent = log_level is not None and int(log_level) <= LogLevel.ALERT
+    if urgent or not ctx.get_config().get("batch_notifications", False):
+        send_notification(ctx, name, data)
+        return
+
+    # Meta built now: the timestamp and uuid of the notification, not of the ping
+    get_notification_queue(ctx).put(name, data, get_meta(ctx))
+
+def build_notification(ctx: AppContext, name: str, data: dict, meta: dict | None = None) -> dict:
+    """
+    Notification payload.
+
+    Args:
+        ctx (AppContext): Context.
+        name (str): Name of the notification.
+        data (dict): Extra data to send.
+        meta (dict): Meta, built now if None.
+    Returns:
+        dict: Payload.
+    """
+    config = ctx.get_config()
+
+    return {
+        "id": config.get("id"),
+        "cmd": "notification",
+        "token": config.get("token"),
+        "version": agent_config.AGENT_VERSION,
+        "name": name,
+        "data": data or {},
+        "meta": meta or get_meta(ctx)
+    }
+
+
+def post_notification(ctx: AppContext, payload: dict) -> bool:
+    """
+    Post a notification payload.
+
+    Returns:
+        bool: False if it must be retried (server unreachable or 5xx). Rejected
+            notifications (4xx) are logged and not retried.
+    """
     config = ctx.get_config()
     logger = ctx.get_logger()
+    server_host = config.get("server_host")
 
     try:
-        token = config.get("token")
-        idx = config.get("id")
-        ignore_cert = config.get("ignore_cert")
-        server_host = config.get("server_host")
-        server_endpoint = config.get("server_endpoint")
-        meta = get_meta(ctx)
-
-        payload = {
-            "id": idx,
-            "cmd": "notification",
-            "token": token,
-            "version": agent_config.AGENT_VERSION,
-            "name": name,
-            "data": data or {},
-            "meta": meta
-        }
+        status, reason, _ = get_transport(ctx).post_json(config.get("server_endpoint"), payload)
+    except Exception as e:
+        logger.err(f"Error sending notification to {server_host}: {e}")
+        return False
+
+    logger.debug(f"Notification response: {status} {reason}")
+    # 200 need to handle response?, 204 no content to return
+    if status in (200, 204):
+        return True
+    logger.err(f"Notification response error: {status} {reason}")
+
+    return status < 500
+
+
+def send_notification(ctx: AppContext, name: str, data: dict) -> bool:
+    """
+    Send notification to the server. Not delivered notifications are spooled in
+    the outbox and replayed when the server is reachable again.
+
+    Args:
+        ctx (AppContext): Context.
+        name (str): Name of the notification.
+        data (dict): Extra data to send.
+    Returns:
+        bool: True if delivered.
+    """
+    logger = ctx.get_logger()
+
+    try:
+        payload = build_notification(ctx, name, data)
         logger.debug(f"Notification payload: {payload}")
-        connection = None
-        try:
-            context = ssl._create_unverified_context() if ignore_cert else None
-            connection = http.client.HTTPSConnection(server_host, context=context)
-            headers = {"Content-Type": "application/json"}
-            connection.request("POST", server_endpoint, body=json.dumps(payload), headers=headers)
-            response = connection.getresponse()
-
-            if response.status == 200:
-                # Successfully sent notification, need to handle response?
-                pass
-            elif response.status == 204:
-                # Successfully sent notification, no content to return
-                pass
-            else:
-                logger.err(f"Notification response error: {response.status} {response.reason}")
-
-            logger.debug(f"Notification response: {response.status} {response.reason}")
-        except Exception as e:
-            logger.err(f"Error sending notification to {server_host}: {e}")
-        finally:
-            if connection:
-                connection.close()
-
-            logger.debug("Notification process completed")
+        if post_notification(ctx, payload):
+            return True
+        spool_notification(ctx, payload)
     except Exception as e:
         logger.err(f"Unexpected error in send_notification: {e}")
+    finally:
+        logger.debug("Notification process completed")
+
+    return False
+
 
+def spool_notification(ctx: AppContext, payload: dict) -> bool:
+    """ Keep a not delivered notification in the outbox """
+    outbox = get_outbox(ctx)
+    if outbox is None:
+        return False
+    if outbox.put(payload):
+        ctx.get_logger().info(f"Notification {payload.get('name')} spooled in the outbox")
+
+    return True
+
+
+def replay_outbox(ctx: AppContext) -> int:
+    """
+    Send the spooled notifications, in order and with back-off.
+
+    Returns:
+        int: Notifications delivered.
+    """
+    outbox = get_outbox(ctx)
+    if outbox is None:
+        return 0
+    delivered = outbox.replay(lambda payload: post_notification(ctx, payload))
+    if delivered:
+        ctx.get_logger().info(f"Outbox: {delivered} spooled notifications delivered")
 
+    return delivered
@@ -0,0 +1,168 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Outbox
+
+@description Durable spool of the notifications not delivered while the server is
+    unreachable. SQLite in WAL mode: each notification is one appended row (no whole
+    file rewrite), deduplicated by its meta uuid and capped in size dropping the oldest.
+    Replayed in order with exponential back-off once the server answers again.
+"""
+# Std
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+# Local
+from monnet_agent import agent_config
+from monnet_shared.app_context import AppContext
+
+_outbox_lock = threading.Lock()
+
+
+class Outbox:
+    """
+    Notification spool, shared through the AppContext var "outbox", use get_outbox(ctx).
+    """
+
+    def __init__(self, ctx: AppContext, path: str, max_bytes: int = 5 * 1024 * 1024,
+                 min_delay: float = 5, max_delay: float = 300):
+        """
+        Args:
+            ctx (AppContext): Context.
+            path (str): SQLite database file.
+            max_bytes (int): Max total payload size, the oldest rows are dropped above it.
+            min_delay (float): First retry delay in seconds after a failed replay.
+            max_delay (float): Max retry delay in seconds.
+        """
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._delay = 0.0
+        self._next_try = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used by the main loop and the scheduler thread, serialized by self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uuid TEXT UNIQUE,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+
+    def put(self, payload: dict) -> bool:
+        """
+        Spool a payload.
+
+        Args:
+            payload (dict): Notification payload, payload["meta"]["uuid"] deduplicates.
+        Returns:
+            bool: False if already spooled.
+        """
+        body = json.dumps(payload)
+        _uuid = (payload.get("meta") or {}).get("uuid")
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (uuid, payload, size, created) VALUES (?, ?, ?, ?)",
+                (_uuid, body, len(body), time.time())
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._enforce_cap()
+
+        return True
+
+    def replay(self, send: Callable[[dict], bool], limit: int = 100) -> int:
+        """
+        Send the spooled payloads in order, stop at the first failure and back off.
+
+        Args:
+            send (Callable[[dict], bool]): Delivery function, False to retry later.
+            limit (int): Max payloads per call.
+        Returns:
+            int: Payloads delivered.
+        """
+        if time.monotonic() < self._next_try:
+            return 0
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+        delivered = 0
+        for row_id, body in rows:
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError:
+                self.logger.warning(f"Outbox: dropping corrupted entry {row_id}")
+                payload = None
+            if payload is not None and not send(payload):
+                self._delay = min(max(self._delay * 2, self.min_delay), self.max_delay)
+                self._next_try = time.monotonic() + self._delay
+                self.logger.debug(f"Outbox: replay failed, next try in {self._delay:.0f}s")
+                break
+            with self._lock:
+                self._conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            delivered += 1
+        else:
+            self._delay = 0.0
+            self._next_try = 0.0
+
+        return delivered
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _enforce_cap(self) -> None:
+        """ Drop the oldest rows above max_bytes """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM outbox").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        dropped = 0
+        for row_id, size in self._conn.execute("SELECT id, size FROM outbox ORDER BY id").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            total -= size
+            dropped += 1
+        self.logger.warning(f"Outbox full, dropped {dropped} oldest notifications")
+
+
+def get_outbox(ctx: AppContext) -> Outbox | None:
+    """ Get the context shared outbox, None if it can't be opened """
+    with _outbox_lock:
+        if ctx.has_var("outbox"):
+            return ctx.get_var("outbox")
+        config = ctx.get_config()
+        path = config.get("outbox_path", agent_config.OUTBOX_PATH)
+        try:
+            outbox = Outbox(ctx, path, int(config.get("outbox_max_bytes", 5 * 1024 * 1024)))
+        except (OSError, sqlite3.Error) as e:
+            ctx.get_logger().err(f"Outbox disabled, can't open {path}: {e}")
+            outbox = None
+        ctx.set_var("outbox", outbox)
+
+    return outbox
@@ -0,0 +1,258 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Proc Sampler
+
+@description Single pass /proc sampler for the agent collectors. /proc/loadavg, /proc/meminfo,
+    /proc/stat and /proc/mounts are opened once and re-read with os.pread at offset 0 (no
+    reopen per loop), only the needed fields are parsed, and the mounts list is reparsed
+    only when /proc/mounts changes. Replaces psutil.cpu_times (CpuTimes keeps the same
+    user/nice/system/idle/iowait attributes, in seconds).
+"""
+# Std
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Local
+from monnet_shared.app_context import AppContext
+
+_sampler_lock = threading.Lock()
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+CpuTimes = namedtuple("CpuTimes", "user nice system idle iowait irq softirq steal")
+DiskUsage = namedtuple("DiskUsage", "device mountpoint fstype total free")
+
+MEMINFO_FIELDS = ("MemTotal", "MemAvailable", "MemFree", "Cached", "Buffers")
+
+REAL_FILESYSTEMS = {
+    "ext4", "ext3", "ext2", "xfs", "zfs", "btrfs", "reiserfs",
+    "vfat", "fat32", "ntfs", "hfsplus", "exfat", "iso9660",
+    "udf", "f2fs", "nfs"
+}
+
+PROC_FILES = {
+    "loadavg": "/proc/loadavg",
+    "meminfo": "/proc/meminfo",
+    "stat": "/proc/stat",
+    "mounts": "/proc/mounts",
+}
+
+
+def parse_loadavg(data: bytes) -> tuple[float, float, float]:
+    """
+    Parse /proc/loadavg.
+
+    Returns:
+        tuple[float, float, float]: 1, 5 and 15 minutes load.
+    Raises:
+        ValueError: Invalid format.
+    """
+    try:
+        load1, load5, load15 = map(float, data.split()[:3])
+    except ValueError as e:
+        raise ValueError(f"Invalid /proc/loadavg format: {e}") from e
+
+    return load1, load5, load15
+
+
+def parse_meminfo(data: bytes) -> dict[str, int]:
+    """
+    Parse the MEMINFO_FIELDS of /proc/meminfo.
+
+    Returns:
+        dict[str, int]: {field: bytes}, missing fields are 0.
+    Raises:
+        ValueError: Invalid format.
+    """
+    meminfo = dict.fromkeys(MEMINFO_FIELDS, 0)
+    pending = len(MEMINFO_FIELDS)
+    try:
+        for line in data.splitlines():
+            key, _, value = line.partition(b":")
+            key = key.decode()
+            if key in meminfo:
+                meminfo[key] = int(value.split()[0]) * 1024
+                pending -= 1
+                if not pending:
+                    break
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"Invalid /proc/meminfo format: {e}") from e
+
+    return meminfo
+
+
+def parse_cpu_ticks(data: bytes) -> tuple[int, ...]:
+    """
+    Parse the aggregated "cpu" line of /proc/stat.
+
+    Returns:
+        tuple[int, ...]: user, nice, system, idle, iowait, irq, softirq, steal ticks.
+    Raises:
+        ValueError: Missing or malformed cpu line.
+    """
+    if not data.startswith(b"cpu "):
+        raise ValueError("No CPU data found in /proc/stat")
+    parts = data.split(b"\n", 1)[0].split()
+    if len(parts) < 6:
+        raise ValueError("Malformed cpu line in /proc/stat")
+    ticks = tuple(map(int, parts[1:9]))
+
+    return ticks + (0,) * (8 - len(ticks))
+
+
+def parse_cpu_times(data: bytes) -> CpuTimes:
+    """ Parse /proc/stat CPU times, in seconds """
+    return CpuTimes(*(tick / CLK_TCK for tick in parse_cpu_ticks(data)))
+
+
+def parse_mounts(data: bytes) -> list[tuple[str, str, str]]:
+    """
+    Parse /proc/mounts, only REAL_FILESYSTEMS.
+
+    Returns:
+        list[tuple[str, str, str]]: (device, mountpoint, fstype)
+    """
+    mounts = []
+    for line in data.decode("utf-8", "replace").splitlines():
+        parts = line.split()
+        if len(parts) < 3 or parts[2] not in REAL_FILESYSTEMS:
+            continue
+        mounts.append((parts[0], parts[1], parts[2]))
+
+    return mounts
+
+
+class ProcSnapshot:
+    """ One sample of all the collectors """
+    __slots__ = ("timestamp", "loadavg", "meminfo", "cpu_times", "disks")
+
+    def __init__(self, timestamp: float, loadavg: tuple, meminfo: dict, cpu_times: CpuTimes, disks: list):
+        self.timestamp = timestamp
+        self.loadavg = loadavg
+        self.meminfo = meminfo
+        self.cpu_times = cpu_times
+        self.disks = disks
+
+
+class ProcSampler:
+    """
+    Keeps the /proc files open, shared through the AppContext var "proc_sampler",
+    use get_proc_sampler(ctx). pread does not move a shared offset, safe between threads.
+    """
+
+    def __init__(self, files: dict | None = None):
+        """
+        Args:
+            files (dict): {name: path}, PROC_FILES by default.
+        """
+        self.files = dict(files or PROC_FILES)
+        self._fds: dict[str, int] = {}
+        # Read size per file, grows with the file
+        self._sizes = dict.fromkeys(self.files, 4096)
+        self._sizes["stat"] = 512
+        self._mounts_raw = None
+        self._mounts: list[tuple[str, str, str]] = []
+        self._lock = threading.Lock()
+
+    def read(self, name: str, whole: bool = True) -> bytes:
+        """
+        Re-read a /proc file from offset 0. Read until EOF (empty read): seq_file backed
+        files (/proc/mounts) return at most about one page per read, whatever the size.
+
+        Args:
+            name (str): PROC_FILES key.
+            whole (bool): False if the first read is enough (/proc/stat cpu line).
+        Raises:
+            FileNotFoundError: File does not exist (not a Linux system?).
+            OSError: Read error.
+        """
+        fd = self._fds.get(name)
+        if fd is None:
+            with self._lock:
+                fd = self._fds.get(name)
+                if fd is None:
+                    fd = os.open(self.files[name], os.O_RDONLY)
+                    self._fds[name] = fd
+        try:
+            size = self._sizes[name]
+            data = os.pread(fd, size, 0)
+            if not whole or not data:
+                return data
+            chunks = [data]
+            offset = len(data)
+            while True:
+                data = os.pread(fd, size, offset)
+                if not data:
+                    break
+                chunks.append(data)
+                offset += len(data)
+            # Next time the whole file in one read when the file allows it
+            if offset > size:
+                self._sizes[name] = offset * 2
+            return b"".join(chunks)
+        except OSError:
+            self._close_fd(name)
+            raise
+
+    def load_avg(self) -> tuple[float, float, float]:
+        return parse_loadavg(self.read("loadavg"))
+
+    def memory(self) -> dict[str, int]:
+        return parse_meminfo(self.read("meminfo"))
+
+    def cpu_times(self) -> CpuTimes:
+        return parse_cpu_times(self.read("stat", whole=False))
+
+    def disks(self) -> list[DiskUsage]:
+        """ Real filesystems usage in bytes, unreadable mounts are skipped """
+        raw = self.read("mounts")
+        if raw != self._mounts_raw:
+            self._mounts = parse_mounts(raw)
+            self._mounts_raw = raw
+
+        disks = []
+        for device, mountpoint, fstype in self._mounts:
+            try:
+                stat = os.statvfs(mountpoint)
+            except OSError:
+                continue
+            disks.append(DiskUsage(device, mountpoint, fstype,
+                                   stat.f_blocks * stat.f_frsize, stat.f_bfree * stat.f_frsize))
+
+        return disks
+
+    def sample(self) -> ProcSnapshot:
+        """
+        Read all the collectors.
+
+        Raises:
+            FileNotFoundError, ValueError, OSError: Read or parse error.
+        """
+        return ProcSnapshot(time.time(), self.load_avg(), self.memory(), self.cpu_times(), self.disks())
+
+    def close(self) -> None:
+        for name in list(self._fds):
+            self._close_fd(name)
+
+    def _close_fd(self, name: str) -> None:
+        with self._lock:
+            fd = self._fds.pop(name, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def get_proc_sampler(ctx: AppContext) -> ProcSampler:
+    """ Get the context shared sampler """
+    with _sampler_lock:
+        sampler = ctx.get_var("proc_sampler")
+        if sampler is None:
+            sampler = ProcSampler()
+            ctx.set_var("proc_sampler", sampler)
+
+    return sampler
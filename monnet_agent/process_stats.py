@@ -0,0 +1,273 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Process Stats
+
+@description Optional (config process_stats) per CPU and per process accounting: top N
+    processes by CPU, RSS and IO, and the busy percent of each CPU, between two samples.
+    /proc/<pid>/stat and /proc/<pid>/io are kept open (up to process_max_fds, re-read with
+    os.pread) and the counters diffed per pid. Each sample is capped by process_max_pids
+    and process_time_budget_ms, a capped scan resumes where it stopped on the next sample.
+"""
+# Std
+import heapq
+import os
+import threading
+import time
+
+# Local
+from monnet_shared.app_context import AppContext
+
+_process_stats_lock = threading.Lock()
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def parse_pid_stat(data: bytes) -> tuple[str, int, int, int]:
+    """
+    Parse /proc/<pid>/stat.
+
+    Returns:
+        tuple[str, int, int, int]: name, utime + stime ticks, rss pages, start time.
+    Raises:
+        ValueError: Invalid format.
+    """
+    # The name may contain spaces and parentheses
+    start = data.find(b"(")
+    end = data.rfind(b")")
+    if start < 0 or end < start:
+        raise ValueError("Invalid /proc/<pid>/stat format")
+    fields = data[end + 2:].split()
+    try:
+        return (data[start + 1:end].decode("utf-8", "replace"),
+                int(fields[11]) + int(fields[12]), int(fields[21]), int(fields[19]))
+    except IndexError as e:
+        raise ValueError("Invalid /proc/<pid>/stat format") from e
+
+
+def parse_pid_io(data: bytes) -> int:
+    """
+    Parse /proc/<pid>/io.
+
+    Returns:
+        int: read_bytes + write_bytes (storage IO).
+    """
+    fields = data.split()
+    # Fixed layout: rchar, wchar, syscr, syscw, read_bytes, write_bytes, ...
+    if len(fields) > 11 and fields[8] == b"read_bytes:" and fields[10] == b"write_bytes:":
+        return int(fields[9]) + int(fields[11])
+
+    total = 0
+    for line in data.splitlines():
+        key, _, value = line.partition(b":")
+        if key in (b"read_bytes", b"write_bytes"):
+            total += int(value)
+
+    return total
+
+
+def parse_per_cpu(data: bytes) -> list[tuple[int, int]]:
+    """
+    Parse the cpuN lines of /proc/stat.
+
+    Returns:
+        list[tuple[int, int]]: (busy, total) ticks per CPU.
+    """
+    cpus = []
+    for line in data.splitlines():
+        if not line.startswith(b"cpu"):
+            break
+        if line.startswith(b"cpu "):
+            continue
+        # user nice system idle iowait irq softirq steal
+        ticks = [int(value) for value in line.split()[1:9]]
+        total = sum(ticks)
+        cpus.append((total - ticks[3] - (ticks[4] if len(ticks) > 4 else 0), total))
+
+    return cpus
+
+
+class ProcessStats:
+    """
+    Process accounting collector, shared through the AppContext var "process_stats",
+    use get_process_stats(ctx).
+    """
+
+    def __init__(self, top_n: int = 5, max_pids: int = 2000, max_fds: int = 256, time_budget: float = 0.05,
+                 proc_path: str = "/proc"):
+        """
+        Args:
+            top_n (int): Processes reported per ranking.
+            max_pids (int): Max processes read per sample.
+            max_fds (int): Max open /proc/<pid> files kept between samples.
+            time_budget (float): Max seconds per sample.
+            proc_path (str): procfs mount.
+        """
+        self.top_n = top_n
+        self.max_pids = max_pids
+        self.max_fds = max_fds
+        self.time_budget = time_budget
+        self.proc_path = proc_path
+        # {pid: {"fds": {name: fd}, "start": int, "ticks": int, "io": int, "time": float, "no_io": bool,
+        #        "last": dict, "round": int}}
+        self._pids: dict[int, dict] = {}
+        self._open_fds = 0
+        self._cursor = 0
+        self._round = 0
+        self._last_cpus: list[tuple[int, int]] = []
+        # Result of the last sample, read by the events without resetting the baselines
+        self.last_result: dict | None = None
+        self._lock = threading.Lock()
+
+    def sample(self) -> dict:
+        """
+        Sample the processes and CPUs, rates since the previous sample of each pid.
+        Every sample resets the baselines, only the stats task samples, the rest read
+        last_result.
+
+        Returns:
+            dict: {"top_cpu", "top_rss", "top_io": [{"pid", "name", "cpu", "rss", "io"}],
+                   "per_cpu": [percent], "scanned": int, "truncated": bool}
+        """
+        with self._lock:
+            deadline = time.monotonic() + self.time_budget
+            pids = [int(pid) for pid in os.listdir(self.proc_path) if pid.isdigit()]
+            alive = set(pids)
+            for pid in [pid for pid in self._pids if pid not in alive]:
+                self._forget(pid)
+
+            # Resume a capped scan where it stopped
+            if pids:
+                start = self._cursor % len(pids)
+                pids = pids[start:] + pids[:start]
+
+            self._round += 1
+            scanned = 0
+            for pid in pids:
+                if scanned >= self.max_pids or time.monotonic() >= deadline:
+                    break
+                scanned += 1
+                self._sample_pid(pid)
+            truncated = scanned < len(pids)
+            self._cursor += scanned
+
+            # A capped scan also ranks the pids read on the previous sample
+            oldest = self._round - 1 if truncated else self._round
+            processes = [state["last"] for state in self._pids.values()
+                         if state["last"] is not None and state["round"] >= oldest]
+
+            self.last_result = {
+                "top_cpu": heapq.nlargest(self.top_n, processes, key=lambda p: p["cpu"]),
+                "top_rss": heapq.nlargest(self.top_n, processes, key=lambda p: p["rss"]),
+                "top_io": heapq.nlargest(self.top_n, processes, key=lambda p: p["io"]),
+                "per_cpu": self._sample_cpus(),
+                "scanned": scanned,
+                "truncated": truncated,
+            }
+
+            return self.last_result
+
+    def close(self) -> None:
+        with self._lock:
+            for pid in list(self._pids):
+                self._forget(pid)
+
+    def _read(self, pid: int, state: dict, name: str) -> bytes:
+        """ pread the kept open file, or open/read/close above max_fds """
+        fd = state["fds"].get(name)
+        if fd is not None:
+            return os.pread(fd, 4096, 0)
+
+        fd = os.open(f"{self.proc_path}/{pid}/{name}", os.O_RDONLY)
+        if self._open_fds < self.max_fds:
+            state["fds"][name] = fd
+            self._open_fds += 1
+            return os.pread(fd, 4096, 0)
+        try:
+            return os.pread(fd, 4096, 0)
+        finally:
+            os.close(fd)
+
+    def _sample_pid(self, pid: int) -> None:
+        state = self._pids.get(pid)
+        if state is None:
+            state = {"fds": {}, "start": None, "ticks": None, "io": None, "time": None, "no_io": False,
+                     "last": None, "round": 0}
+            self._pids[pid] = state
+        now = time.monotonic()
+        try:
+            name, ticks, rss, start = parse_pid_stat(self._read(pid, state, "stat"))
+        except (OSError, ValueError):
+            # Gone (kept fd returns ESRCH)
+            self._forget(pid)
+            return
+        io = None
+        if not state["no_io"]:
+            try:
+                io = parse_pid_io(self._read(pid, state, "io"))
+            except (OSError, ValueError):
+                # Not allowed (other user) or no task IO accounting, not retried
+                state["no_io"] = True
+
+        if state["start"] != start:
+            # New or reused pid, no baseline
+            state.update(start=start, ticks=None, io=None, time=None)
+        cpu = io_rate = 0.0
+        if state["time"] is not None and now > state["time"]:
+            elapsed = now - state["time"]
+            cpu = (ticks - state["ticks"]) / CLK_TCK / elapsed * 100
+            if io is not None and state["io"] is not None:
+                io_rate = (io - state["io"]) / elapsed
+        state.update(ticks=ticks, io=io, time=now, round=self._round, last={
+            "pid": pid,
+            "name": name,
+            "cpu": round(cpu, 2),                        # Percent of one CPU
+            "rss": round(rss * PAGE_SIZE / 1024 ** 2),   # MB
+            "io": round(io_rate),                        # Bytes/s
+        })
+
+    def _sample_cpus(self) -> list[float]:
+        try:
+            with open(f"{self.proc_path}/stat", "rb") as f:
+                cpus = parse_per_cpu(f.read())
+        except (OSError, ValueError):
+            return []
+        percents = []
+        if len(cpus) == len(self._last_cpus):
+            for (busy, total), (last_busy, last_total) in zip(cpus, self._last_cpus):
+                delta = total - last_total
+                percents.append(round((busy - last_busy) / delta * 100, 2) if delta > 0 else 0.0)
+        self._last_cpus = cpus
+
+        return percents
+
+    def _forget(self, pid: int) -> None:
+        state = self._pids.pop(pid, None)
+        if state is None:
+            return
+        for fd in state["fds"].values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            self._open_fds -= 1
+
+
+def get_process_stats(ctx: AppContext) -> ProcessStats | None:
+    """ Get the context shared collector, None if disabled (config process_stats) """
+    with _process_stats_lock:
+        if ctx.has_var("process_stats"):
+            return ctx.get_var("process_stats")
+        config = ctx.get_config()
+        process_stats = None
+        if config.get("process_stats", False):
+            process_stats = ProcessStats(
+                int(config.get("process_top_n", 5)),
+                int(config.get("process_max_pids", 2000)),
+                int(config.get("process_max_fds", 256)),
+                float(config.get("process_time_budget_ms", 50)) / 1000,
+            )
+        ctx.set_var("process_stats", process_stats)
+
+    return process_stats
@@ -4,11 +4,11 @@
 Monnet Agent - Requests
 """
 
-import http
+import http.client
 import json
-import ssl
 from monnet_agent import agent_config
 from monnet_agent.meta import get_meta
+from monnet_agent.transport import get_transport
 from monnet_shared.app_context import AppContext
 
 
@@ -32,7 +32,6 @@ def send_request(ctx: AppContext, cmd="ping", data=None):
         token = config.get("token")
         idx = config.get("id")
         interval = config.get("interval")
-        ignore_cert = config.get("ignore_cert")
         server_host = config.get("server_host")
         server_endpoint = config.get("server_endpoint")
     except KeyError as e:
@@ -52,43 +51,27 @@ def send_request(ctx: AppContext, cmd="ping", data=None):
         "meta": meta
     }
 
-    connection = None
     try:
         logger.debug(f"Attempting to send request to {server_host} with endpoint {server_endpoint}")
         logger.debug(f"Payload: {payload}")
 
-        # Accept all certs
-        context = ssl._create_unverified_context() if ignore_cert else None
-
-        connection = http.client.HTTPSConnection(server_host, context=context)
-        headers = {"Content-Type": "application/json"}
-        connection.request("POST", server_endpoint, body=json.dumps(payload), headers=headers)
-
-        # Response
-        response = connection.getresponse()
-        raw_data = response.read().decode()
-        logger.debug(f"Response status: {response.status}, reason: {response.reason}")
+        status, reason, raw_data = get_transport(ctx).post_json(server_endpoint, payload)
+        logger.debug(f"Response status: {status}, reason: {reason}")
         logger.debug(f"Raw response: {raw_data}")
 
-        if response.status == 200:
+        if status == 200:
             if raw_data:
                 try:
                     return json.loads(raw_data)
                 except json.JSONDecodeError as e:
                     logger.err(f"Error decoding JSON response: {e} Raw data: {raw_data}")
         else:
-            logger.err(f"HTTP Error: {response.status} {response.reason}, Raw data: {raw_data}")
+            logger.err(f"HTTP Error: {status} {reason}, Raw data: {raw_data}")
 
     except http.client.HTTPException as e:
         logger.err(f"HTTP exception occurred: {e}")
     except Exception as e:
         logger.err(f"Unexpected error on request: {e}")
-    finally:
-        if connection:
-            try:
-                connection.close()
-            except Exception as e:
-                logger.err(f"Error closing connection: {e}")
 
     return None
 
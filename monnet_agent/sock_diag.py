@@ -0,0 +1,329 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Sock Diag
+
+@description Native listening sockets collector, replaces forking and parsing `ss -tulnp`.
+    The TCP/UDP sockets in LISTEN or UNCONN (close) state are dumped by the kernel over
+    NETLINK_SOCK_DIAG, filtered by state kernel side. Without sock_diag support it falls
+    back to /proc/net/{tcp,tcp6,udp,udp6} (no bound device, no dual stack flag there).
+    Socket inodes are mapped to the owning process scanning /proc/<pid>/fd, stopping once
+    all are found, and the owners are cached between calls.
+"""
+# Std
+import os
+import socket
+import struct
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+INET_DIAG_SKV6ONLY = 11
+
+TCP_CLOSE = 7
+TCP_LISTEN = 10
+# Same states than `ss -l`: LISTEN and UNCONN
+LISTEN_STATES = (1 << TCP_LISTEN) | (1 << TCP_CLOSE)
+
+_NLMSGHDR = struct.Struct("=IHHII")
+# inet_diag_req_v2: family, protocol, ext, pad, states, inet_diag_sockid (zeroed)
+_DIAG_REQ = struct.Struct("=BBBxI48x")
+# inet_diag_msg: family, state, timer, retrans, sport, dport, src, dst, if, cookie,
+# expires, rqueue, wqueue, uid, inode
+_DIAG_MSG = struct.Struct("=BBBB2s2s16s16sI8sIIIII")
+_RTATTR = struct.Struct("=HH")
+
+_PROC_NET = (
+    ("udp", socket.AF_INET, "/proc/net/udp"),
+    ("udp", socket.AF_INET6, "/proc/net/udp6"),
+    ("tcp", socket.AF_INET, "/proc/net/tcp"),
+    ("tcp", socket.AF_INET6, "/proc/net/tcp6"),
+)
+_PROTOCOLS = {"tcp": socket.IPPROTO_TCP, "udp": socket.IPPROTO_UDP}
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def parse_diag_messages(data: bytes, protocol: str) -> tuple[list[dict], bool]:
+    """
+    Parse a netlink sock_diag dump response buffer.
+
+    Args:
+        data (bytes): Received buffer (one or more netlink messages).
+        protocol (str): tcp or udp.
+    Returns:
+        tuple[list[dict], bool]: Sockets and True when the dump is done.
+    Raises:
+        OSError: Netlink error message.
+    """
+    sockets = []
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        msg_len, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if msg_len < _NLMSGHDR.size:
+            break
+        if msg_type == NLMSG_DONE:
+            return sockets, True
+        if msg_type == NLMSG_ERROR:
+            errno = -struct.unpack_from("=i", data, offset + _NLMSGHDR.size)[0]
+            raise OSError(errno, f"sock_diag: {os.strerror(errno)}")
+
+        body = offset + _NLMSGHDR.size
+        (family, state, _, _, sport, _, src, _, ifindex, _, _, _, _, _, inode) = _DIAG_MSG.unpack_from(data, body)
+        v6only = None
+        attr = body + _DIAG_MSG.size
+        while attr + _RTATTR.size <= offset + msg_len:
+            attr_len, attr_type = _RTATTR.unpack_from(data, attr)
+            if attr_len < _RTATTR.size:
+                break
+            if attr_type == INET_DIAG_SKV6ONLY:
+                v6only = bool(data[attr + _RTATTR.size])
+            attr += _align(attr_len)
+
+        sockets.append({
+            "protocol": protocol,
+            "family": family,
+            "state": state,
+            "address": src[:4] if family == socket.AF_INET else src,
+            "port": struct.unpack("!H", sport)[0],
+            "ifindex": ifindex,
+            "v6only": v6only,
+            "inode": inode,
+        })
+        offset += _align(msg_len)
+
+    return sockets, False
+
+
+def dump_sockets(protocol: str, family: int, states: int = LISTEN_STATES) -> list[dict]:
+    """
+    Dump sockets over NETLINK_SOCK_DIAG.
+
+    Args:
+        protocol (str): tcp or udp.
+        family (int): AF_INET or AF_INET6.
+        states (int): TCP states bitmask.
+    Returns:
+        list[dict]: Sockets.
+    Raises:
+        OSError: Netlink not available or error.
+    """
+    request = _DIAG_REQ.pack(family, _PROTOCOLS[protocol], 0, states)
+    header = _NLMSGHDR.pack(_NLMSGHDR.size + len(request), SOCK_DIAG_BY_FAMILY, NLM_F_REQUEST | NLM_F_DUMP, 1, 0)
+    sockets = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_SOCK_DIAG) as sock:
+        sock.sendto(header + request, (0, 0))
+        done = False
+        while not done:
+            data = sock.recv(65536)
+            if not data:
+                break
+            found, done = parse_diag_messages(data, protocol)
+            sockets.extend(found)
+
+    return sockets
+
+
+def _proc_address(hex_address: str) -> bytes:
+    # Kernel prints the address as host order 32 bit words
+    words = [int(hex_address[i:i + 8], 16) for i in range(0, len(hex_address), 8)]
+    return struct.pack(f"={len(words)}I", *words)
+
+
+def parse_proc_net(lines: list[str], protocol: str, family: int, states: int = LISTEN_STATES) -> list[dict]:
+    """
+    Parse /proc/net/{tcp,tcp6,udp,udp6} lines.
+
+    Args:
+        lines (list[str]): File lines, header included.
+        protocol (str): tcp or udp.
+        family (int): AF_INET or AF_INET6.
+        states (int): TCP states bitmask.
+    Returns:
+        list[dict]: Sockets.
+    """
+    sockets = []
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        try:
+            state = int(fields[3], 16)
+            if not states & (1 << state):
+                continue
+            hex_address, hex_port = fields[1].split(":")
+            sockets.append({
+                "protocol": protocol,
+                "family": family,
+                "state": state,
+                "address": _proc_address(hex_address),
+                "port": int(hex_port, 16),
+                "ifindex": 0,
+                "v6only": None,
+                "inode": int(fields[9]),
+            })
+        except ValueError:
+            continue
+
+    return sockets
+
+
+def format_address(family: int, address: bytes, ifindex: int = 0, v6only: bool | None = None) -> str:
+    """
+    Format a local address like ss: 0.0.0.0, [::1], * (dual stack) and %device.
+    """
+    if family == socket.AF_INET6:
+        if address == bytes(16) and v6only is False:
+            text = "*"
+        else:
+            text = f"[{socket.inet_ntop(family, address)}]"
+    else:
+        text = socket.inet_ntop(family, address)
+
+    if ifindex:
+        try:
+            text += f"%{socket.if_indextoname(ifindex)}"
+        except OSError:
+            pass
+
+    return text
+
+
+class SocketOwners:
+    """
+    Map socket inodes to the owning process name. Unreadable processes are skipped
+    (not root), like ss. The owners of the last call are kept and only the inodes not
+    seen there are searched.
+    """
+
+    def __init__(self):
+        # {inode: process name or None if not visible} of the last call
+        self._cache: dict[int, str | None] = {}
+
+    def lookup(self, inodes: set[int]) -> dict[int, str | None]:
+        """
+        Args:
+            inodes (set[int]): Socket inodes.
+        Returns:
+            dict[int, str | None]: {inode: process name, None if not found}
+        """
+        owners = {inode: self._cache[inode] for inode in inodes if inode in self._cache}
+        missing = set(inodes) - owners.keys()
+        if missing:
+            for pid in os.listdir("/proc"):
+                if not pid.isdigit():
+                    continue
+                fd_dir = f"/proc/{pid}/fd"
+                try:
+                    fds = os.listdir(fd_dir)
+                except OSError:
+                    continue
+                name = None
+                for fd in fds:
+                    try:
+                        link = os.readlink(f"{fd_dir}/{fd}")
+                    except OSError:
+                        continue
+                    if not link.startswith("socket:["):
+                        continue
+                    inode = int(link[8:-1])
+                    if inode not in missing:
+                        continue
+                    if name is None:
+                        try:
+                            with open(f"/proc/{pid}/comm", "r", encoding="utf-8") as f:
+                                name = f.read().strip()
+                        except OSError:
+                            name = "unknown"
+                    owners[inode] = name
+                    missing.discard(inode)
+                if not missing:
+                    break
+            # Kernel or other users sockets, not searched again
+            owners.update(dict.fromkeys(missing))
+
+        self._cache = owners
+
+        return owners
+
+
+# Shared by get_listen_ports callers that do not keep their own
+_socket_owners = SocketOwners()
+
+
+def collect_listen_sockets() -> list[dict]:
+    """
+    Listening TCP/UDP sockets, from sock_diag or /proc/net.
+
+    Returns:
+        list[dict]: Sockets.
+    Raises:
+        OSError: Neither sock_diag nor /proc/net available.
+    """
+    try:
+        sockets = []
+        for protocol, family, _ in _PROC_NET:
+            sockets.extend(dump_sockets(protocol, family))
+        return sockets
+    except OSError:
+        pass
+
+    sockets = []
+    for protocol, family, path in _PROC_NET:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                sockets.extend(parse_proc_net(f.readlines(), protocol, family))
+        except FileNotFoundError:
+            # No IPv6
+            if family == socket.AF_INET:
+                raise
+
+    return sockets
+
+
+def get_listen_ports(socket_owners: SocketOwners | None = None) -> list[dict]:
+    """
+    Listening ports with the owning process, in the `ss -tulnp` based format.
+
+    Args:
+        socket_owners (SocketOwners | None): Owners cache, the module one by default.
+    Returns:
+        list[dict]: [{"interface", "port", "service", "protocol", "ip_version"}]
+    """
+    sockets = collect_listen_sockets()
+    if socket_owners is None:
+        socket_owners = _socket_owners
+    owners = socket_owners.lookup({sock["inode"] for sock in sockets if sock["inode"]})
+
+    ports = []
+    seen_ports = set()
+    for sock in sockets:
+        service = owners.get(sock["inode"])
+        # ss only reports the sockets with a visible process
+        if service is None:
+            continue
+        local_address = format_address(sock["family"], sock["address"], sock["ifindex"], sock["v6only"])
+        if local_address == "*":
+            # Dual stack socket, reported as ss output parsing did
+            interface, ip_version = "0.0.0.0", "ipv4"
+        else:
+            interface = local_address
+            ip_version = "ipv6" if sock["family"] == socket.AF_INET6 else "ipv4"
+
+        dedup_key = (local_address, sock["port"], sock["protocol"], ip_version)
+        if dedup_key in seen_ports:
+            continue
+        seen_ports.add(dedup_key)
+        ports.append({
+            "interface": interface,
+            "port": sock["port"],
+            "service": service,
+            "protocol": sock["protocol"],
+            "ip_version": ip_version,
+        })
+
+    return ports
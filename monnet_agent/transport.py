@@ -0,0 +1,249 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Agent - Transport
+
+@description Shared HTTPS transport to the server. One HTTP/1.1 keep-alive connection is
+    reused by the requests and the notifications, the SSL context is built once and a
+    reconnect resumes the previous TLS session. A request failing on a reused connection
+    (closed by the server) is retried once on a new connection.
+
+    Optional payload compression (gzip, or zstd with the zstandard module) above a size
+    threshold, sent with Content-Encoding, and payload version 2: msgpack body (msgpack
+    module). A server answering 415 gets plain JSON from then on.
+"""
+# Std
+import gzip
+import http.client
+import importlib
+import json
+import ssl
+import threading
+
+# Local
+from monnet_shared.app_context import AppContext
+
+_transport_lock = threading.Lock()
+
+PAYLOAD_VERSION_JSON = 1
+PAYLOAD_VERSION_MSGPACK = 2
+
+
+def _optional_module(name: str):
+    """ Import an optional dependency, None if not installed """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+class _ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """ HTTPSConnection offering the last TLS session on connect """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tls_session = None
+
+    def connect(self):
+        # TCP connect (and proxy tunnel) from HTTPConnection, TLS here with the session
+        http.client.HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=self.tls_session)
+
+    def save_session(self) -> None:
+        """ Keep the TLS session (TLS 1.3 tickets arrive after the handshake) """
+        if isinstance(self.sock, ssl.SSLSocket) and self.sock.session is not None:
+            self.tls_session = self.sock.session
+
+
+class AgentTransport:
+    """
+    Keep-alive HTTPS transport shared through the AppContext var "transport",
+    use get_transport(ctx).
+    """
+
+    def __init__(self, ctx: AppContext, server_host: str, ignore_cert: bool = False, timeout: float = 15,
+                 compression: str = "none", compress_min_bytes: int = 1024,
+                 payload_version: int = PAYLOAD_VERSION_JSON):
+        """
+        Args:
+            ctx (AppContext): Context.
+            server_host (str): Server host[:port].
+            ignore_cert (bool): Accept any certificate.
+            timeout (float): Socket timeout in seconds.
+            compression (str): none, gzip or zstd (gzip if zstandard is not installed).
+            compress_min_bytes (int): Bodies smaller than this are not compressed.
+            payload_version (int): 1 JSON, 2 msgpack (JSON if msgpack is not installed).
+        """
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.server_host = server_host
+        self.ignore_cert = bool(ignore_cert)
+        self.timeout = timeout
+        # Requested settings, compared by get_transport
+        self.settings = (str(compression).lower(), int(compress_min_bytes), int(payload_version))
+        self.compress_min_bytes = int(compress_min_bytes)
+        self._zstd = None
+        self._msgpack = None
+        self.compression = self._init_compression(str(compression).lower())
+        self.payload_version = self._init_payload_version(int(payload_version))
+        # Built once, not per request
+        self.ssl_context = ssl._create_unverified_context() if self.ignore_cert else ssl.create_default_context()
+        self._lock = threading.Lock()
+        self._connection: _ResumingHTTPSConnection | None = None
+        self._tls_session = None
+
+    def post_json(self, endpoint: str, payload: dict) -> tuple[int, str, str]:
+        """
+        POST a payload (JSON, or msgpack with payload version 2).
+
+        Args:
+            endpoint (str): Server endpoint.
+            payload (dict): Payload.
+        Returns:
+            tuple[int, str, str]: Status, reason and response body.
+        Raises:
+            http.client.HTTPException, OSError: Request failed (after one retry).
+        """
+        with self._lock:
+            result = self._post_retry(endpoint, payload)
+            if result[0] == 415 and (self.compression != "none" or self.payload_version != PAYLOAD_VERSION_JSON):
+                self.logger.notice("Server does not accept compressed or compact payloads, using plain JSON")
+                self.compression = "none"
+                self.payload_version = PAYLOAD_VERSION_JSON
+                result = self._post_retry(endpoint, payload)
+
+        return result
+
+    def encode(self, payload: dict) -> tuple[bytes, dict]:
+        """
+        Encode and compress a payload.
+
+        Returns:
+            tuple[bytes, dict]: Body and headers.
+        """
+        headers = {"Connection": "keep-alive", "Accept-Encoding": "gzip"}
+        if self.payload_version == PAYLOAD_VERSION_MSGPACK:
+            body = self._msgpack.packb(payload, use_bin_type=True)
+            headers["Content-Type"] = "application/msgpack"
+            headers["X-Monnet-Payload-Version"] = str(PAYLOAD_VERSION_MSGPACK)
+        else:
+            body = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+
+        if self.compression != "none" and len(body) >= self.compress_min_bytes:
+            if self.compression == "zstd":
+                body = self._zstd.ZstdCompressor(level=3).compress(body)
+            else:
+                body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = self.compression
+
+        return body, headers
+
+    def close(self) -> None:
+        """ Close the connection """
+        with self._lock:
+            self._close_connection()
+
+    def _post_retry(self, endpoint: str, payload: dict) -> tuple[int, str, str]:
+        body, headers = self.encode(payload)
+        reused = self._connection is not None
+        try:
+            return self._post(endpoint, body, headers)
+        except TimeoutError:
+            self._close_connection()
+            raise
+        except (http.client.HTTPException, OSError) as e:
+            self._close_connection()
+            # A kept-alive connection may have been closed by the server
+            if not reused:
+                raise
+            self.logger.debug(f"Keep-alive connection lost ({e}), reconnecting")
+
+        try:
+            return self._post(endpoint, body, headers)
+        except (http.client.HTTPException, OSError):
+            self._close_connection()
+            raise
+
+    def _post(self, endpoint: str, body: bytes, headers: dict) -> tuple[int, str, str]:
+        if self._connection is None:
+            self._connection = _ResumingHTTPSConnection(
+                self.server_host, timeout=self.timeout, context=self.ssl_context
+            )
+            self._connection.tls_session = self._tls_session
+
+        connection = self._connection
+        connection.request("POST", endpoint, body=body, headers=headers)
+        response = connection.getresponse()
+        raw_data = response.read()
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            raw_data = gzip.decompress(raw_data)
+        raw_data = raw_data.decode()
+        connection.save_session()
+        self._tls_session = connection.tls_session
+        if response.will_close:
+            self._close_connection()
+
+        return response.status, response.reason, raw_data
+
+    def _init_compression(self, compression: str) -> str:
+        if compression == "zstd":
+            self._zstd = _optional_module("zstandard")
+            if self._zstd is None:
+                self.logger.notice("zstandard is not installed, using gzip compression")
+                return "gzip"
+            return "zstd"
+        if compression == "gzip":
+            return "gzip"
+
+        return "none"
+
+    def _init_payload_version(self, payload_version: int) -> int:
+        if payload_version == PAYLOAD_VERSION_MSGPACK:
+            self._msgpack = _optional_module("msgpack")
+            if self._msgpack is None:
+                self.logger.notice("msgpack is not installed, using JSON payloads")
+                return PAYLOAD_VERSION_JSON
+            return PAYLOAD_VERSION_MSGPACK
+
+        return PAYLOAD_VERSION_JSON
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except OSError:
+                pass
+            self._connection = None
+
+
+def get_transport(ctx: AppContext) -> AgentTransport:
+    """
+    Get the context shared transport, created on first use and rebuilt
+    if the server config changes.
+    """
+    config = ctx.get_config()
+    server_host = config.get("server_host")
+    ignore_cert = bool(config.get("ignore_cert"))
+    settings = (
+        str(config.get("payload_compression", "none")).lower(),
+        int(config.get("compress_min_bytes", 1024)),
+        int(config.get("payload_version", PAYLOAD_VERSION_JSON)),
+    )
+
+    with _transport_lock:
+        transport = ctx.get_var("transport")
+        if transport is not None and (
+            transport.server_host != server_host
+            or transport.ignore_cert != ignore_cert
+            or transport.settings != settings
+        ):
+            transport.close()
+            transport = None
+        if transport is None:
+            transport = AgentTransport(
+                ctx, server_host, ignore_cert, float(config.get("server_timeout", 15)), *settings
+            )
+            ctx.set_var("transport", transport)
+
+    return transport
@@ -6,6 +6,7 @@ Monnet Gateway - Event Log Service
 """
 
 from monnet_gateway.database.dbmanager import DBManager
+from monnet_shared.time_utils import utc_date_now
 
 
 class EventHostModel:
@@ -22,6 +23,9 @@ class EventHostModel:
     - `ack` (tinyint(1)): Acknowledgment status (0 = not acknowledged, 1 = acknowledged).
     - `date` (Index, datetime): Timestamp of the log entry.
     - 'reference' varchar(255) reference to the event (optional, can be NULL).
+
+    The table may be RANGE partitioned by `date` (see PartitionsModel), inserts always
+    set `date` and filters must use the bare `date` column so MySQL can prune partitions.
     """
 
     def __init__(self, db: DBManager):
@@ -38,12 +42,12 @@ class EventHostModel:
         Insert a new log entry into the `hosts_logs` table.
 
         Args:
-            log_data (dict): Dictionary containing log details.
+            log_data (dict): Dictionary containing log details, `date` defaults to now (UTC).
 
         Returns:
             int: ID of the newly inserted log entry.
         """
-        return self.db.insert("hosts_logs", log_data)
+        return self.db.insert("hosts_logs", {**log_data, "date": log_data.get("date") or utc_date_now()})
 
     def commit(self) -> None:
         """
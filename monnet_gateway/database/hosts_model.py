@@ -15,7 +15,7 @@ class HostsModel:
     - `id` (Primary, int, AUTO_INCREMENT): Unique identifier for each host.
     - `title` (char(32), nullable): Title or name of the host.
     - `hostname` (varchar(1024), nullable): Hostname of the host.
-    - `ip` (char(18), unique): IP address of the host.
+    - `ip` (char(18), unique): IP address of the host, IPv6 hosts need varchar(45).
     - `category` (int): Category of the host (default is 1).
     - `mac` (char(17), nullable): MAC address of the host.
     - `highlight` (tinyint(1)): Highlight status (default is 0).
@@ -52,6 +52,30 @@ class HostsModel:
         """ Get all hosts """
         return self.db.fetchall("SELECT * FROM hosts")
 
+    def get_all_ips(self) -> list[str]:
+        """ Get the IP of all hosts """
+        rows = self.db.fetchall("SELECT ip FROM hosts") or []
+
+        return [row["ip"] for row in rows]
+
+    def get_ips_by_ids(self, host_ids: list[int]) -> list[str]:
+        """
+        Get the IPs of a list of hosts.
+
+        Args:
+            host_ids (list[int]): List of host IDs.
+
+        Returns:
+            list[str]: IPs of the hosts found.
+        """
+        if not host_ids:
+            return []
+        placeholders = ",".join(["%s"] * len(host_ids))
+        query = f"SELECT ip FROM hosts WHERE id IN ({placeholders})"
+        rows = self.db.fetchall(query, tuple(host_ids)) or []
+
+        return [row["ip"] for row in rows]
+
     def get_all_enabled(self) -> list[dict]:
         """ Get all hosts enabled """
         return self.db.fetchall("SELECT * FROM hosts WHERE disable = 0")
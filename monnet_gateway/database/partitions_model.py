@@ -0,0 +1,177 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Partitions Model
+@description: DB operations to manage MySQL RANGE partitions on date based tables.
+
+"""
+
+from datetime import date
+from monnet_gateway.database.dbmanager import DBManager
+
+# Catch-all partition, new partitions are split from it
+MAX_PARTITION = "pmax"
+
+
+def to_days(day: date) -> int:
+    """
+    Python equivalent of MySQL TO_DAYS()
+
+    Args:
+        day (date): Date to convert.
+    Returns:
+        int: Days since year 0, as MySQL computes it.
+    """
+    return day.toordinal() + 365
+
+
+class PartitionsModel:
+    """
+    DB Operations to manage date partitions.
+
+    Managed tables are partitioned with `PARTITION BY RANGE (TO_DAYS(date))`,
+    one partition per period named `pYYYYMMDD` after the first day it holds,
+    plus the catch-all `pmax` partition (VALUES LESS THAN MAXVALUE).
+
+    MySQL only prunes partitions when the `date` column is compared directly,
+    queries on these tables must not wrap `date` in functions.
+    """
+
+    def __init__(self, db: DBManager):
+        self.db = db
+
+    def get_partitions(self, table: str) -> list[dict]:
+        """
+        Get the partitions of a table ordered by position.
+
+        Args:
+            table (str): Table name.
+        Returns:
+            list[dict]: name, method and less_than (int, or None for MAXVALUE).
+        """
+        query = """
+            SELECT PARTITION_NAME AS name, PARTITION_METHOD AS method,
+                   PARTITION_DESCRIPTION AS less_than
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """
+        partitions = self.db.fetchall(query, (table,)) or []
+        for partition in partitions:
+            less_than = partition.get("less_than")
+            if less_than is None or str(less_than).upper() == "MAXVALUE":
+                partition["less_than"] = None
+            else:
+                partition["less_than"] = int(less_than)
+
+        return partitions
+
+    def is_partitioned(self, table: str) -> bool:
+        """ Check if the table is RANGE partitioned """
+        partitions = self.get_partitions(table)
+        return bool(partitions) and partitions[0].get("method") == "RANGE"
+
+    def get_unique_keys(self, table: str) -> dict[str, list[str]]:
+        """
+        Get the primary and unique keys of a table.
+
+        Args:
+            table (str): Table name.
+        Returns:
+            dict[str, list[str]]: {key name: columns in order}, the primary key is "PRIMARY".
+        """
+        query = """
+            SELECT INDEX_NAME AS name, COLUMN_NAME AS col
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """
+        keys: dict[str, list[str]] = {}
+        for row in self.db.fetchall(query, (table,)) or []:
+            keys.setdefault(row["name"], []).append(row["col"])
+
+        return keys
+
+    def add_date_to_keys(self, table: str) -> list[str]:
+        """
+        Append the `date` column to the primary/unique keys without it, MySQL requires
+        the partitioning column in every unique key. Keys that already include it are
+        kept, so their duplicates are detected as before.
+
+        Args:
+            table (str): Table name.
+        Returns:
+            list[str]: Names of the changed keys.
+        """
+        clauses = []
+        changed = []
+        for name, columns in self.get_unique_keys(table).items():
+            if "date" in columns:
+                continue
+            key_columns = ", ".join(f"`{column}`" for column in columns + ["date"])
+            if name == "PRIMARY":
+                clauses.append(f"DROP PRIMARY KEY, ADD PRIMARY KEY ({key_columns})")
+            else:
+                clauses.append(f"DROP INDEX `{name}`, ADD UNIQUE KEY `{name}` ({key_columns})")
+            changed.append(name)
+        if clauses:
+            self.db.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+
+        return changed
+
+    def partition_table(self, table: str, partitions: list[tuple[str, int]]) -> None:
+        """
+        Convert a table to RANGE partitioning on TO_DAYS(date).
+
+        The table primary/unique keys must include the `date` column (add_date_to_keys).
+
+        Args:
+            table (str): Table name.
+            partitions (list[tuple[str, int]]): (name, TO_DAYS upper bound) ascending.
+        """
+        query = (
+            f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS(date)) "
+            f"({self._partitions_clause(partitions)})"
+        )
+        self.db.execute(query)
+
+    def add_partitions(self, table: str, partitions: list[tuple[str, int]]) -> None:
+        """
+        Add partitions splitting them from the catch-all partition.
+
+        Args:
+            table (str): Table name.
+            partitions (list[tuple[str, int]]): (name, TO_DAYS upper bound) ascending.
+        """
+        if not partitions:
+            return
+        query = (
+            f"ALTER TABLE {table} REORGANIZE PARTITION {MAX_PARTITION} "
+            f"INTO ({self._partitions_clause(partitions)})"
+        )
+        self.db.execute(query)
+
+    def drop_partitions(self, table: str, names: list[str]) -> None:
+        """
+        Drop partitions and all their rows.
+
+        Args:
+            table (str): Table name.
+            names (list[str]): Partitions to drop.
+        """
+        if not names:
+            return
+        if MAX_PARTITION in names:
+            raise ValueError(f"Refusing to drop the catch-all partition {MAX_PARTITION}")
+        self.db.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(names)}")
+
+    @staticmethod
+    def _partitions_clause(partitions: list[tuple[str, int]]) -> str:
+        """ Build the partition definitions, always ending with the catch-all """
+        definitions = [
+            f"PARTITION {name} VALUES LESS THAN ({int(less_than)})"
+            for name, less_than in partitions
+        ]
+        definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE")
+
+        return ", ".join(definitions)
@@ -7,8 +7,15 @@ Monnet Gateway - Ansible Reports Model
 """
 
 from monnet_gateway.database.dbmanager import DBManager
+from monnet_shared.time_utils import utc_date_now
 
 class ReportsModel:
+    """
+    Handles operations related to the `reports` table.
+
+    The table may be RANGE partitioned by `date` (see PartitionsModel), inserts always
+    set `date` and filters must use the bare `date` column so MySQL can prune partitions.
+    """
     def __init__(self, db: DBManager):
         self.db = db
 
@@ -17,13 +24,13 @@ class ReportsModel:
         Save a report into the reports table.
 
         Args:
-            report_data (dict): The report data to save.
+            report_data (dict): The report data to save, `date` defaults to now (UTC).
         """
         query = """
             INSERT INTO reports (host_id, pid,  source_id, rtype, report, status, date)
             VALUES (%(host_id)s, %(pid)s, %(source_id)s, %(rtype)s, %(report)s, %(status)s, %(date)s)
         """
-        self.db.execute(query, report_data)
+        self.db.execute(query, {**report_data, "date": report_data.get("date") or utc_date_now()})
 
     def commit(self):
         """
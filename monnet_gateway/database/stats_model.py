@@ -6,6 +6,7 @@ Monnet Gateway - Stats Model
 """
 
 from monnet_gateway.database.dbmanager import DBManager
+from monnet_shared.time_utils import utc_date_now
 
 class StatsModel:
     """
@@ -16,6 +17,11 @@ class StatsModel:
     - `type` (tinyint, UNSIGNED): Type of the stat (1: ping, 2: load avg, 3: iowait).
     - `host_id` (Index, int): ID of the host associated with the stat.
     - `value` (float): Value of the stat.
+
+    Rows are unique per `host_id`, `type` and `date`, the key `update_stats_bulk` relies on.
+
+    The table may be RANGE partitioned by `date` (see PartitionsModel), inserts always
+    set `date` and filters must use the bare `date` column so MySQL can prune partitions.
     """
 
     def __init__(self, db: DBManager):
@@ -30,11 +36,11 @@ class StatsModel:
         """
         Add a new stats record to the database.
         Args:
-            stats_data: A dictionary containing 'type', 'host_id', and 'value'.
+            stats_data: A dictionary containing 'type', 'host_id', 'value' and 'date' (default now, UTC).
         Returns:
             The ID of the inserted record.
         """
-        return self.db.insert("stats", stats_data)
+        return self.db.insert("stats", {**stats_data, "date": stats_data.get("date") or utc_date_now()})
 
     def get_by_host_and_date(self, host_id: int, type: int, start_date: str, end_date: str) -> list:
         """
@@ -75,17 +81,48 @@ class StatsModel:
         params = (host_id, type, hours)
         return self.db.fetchall(query, params)
 
+    def get_buckets_last_hours(self, types: list[int], hours: int = 24, bucket_secs: int = 900) -> list[dict]:
+        """
+        Retrieve the stats of all hosts for the given types from the last X hours,
+        aggregated in time buckets.
+        Args:
+            types: The types of the stats (e.g., [1, 2] for ping and load avg).
+            hours: The number of hours to look back (default is 24).
+            bucket_secs: Size of the buckets in seconds (default is 900).
+        Returns:
+            A list of records with host_id, type, bucket (0 is the newest), value (mean of the
+            valid samples or -1 if none), samples and lost (NULL or negative values) counts.
+        """
+        if not types:
+            return []
+        placeholders = ",".join(["%s"] * len(types))
+        query = f"""
+        SELECT host_id, type,
+            FLOOR(TIMESTAMPDIFF(SECOND, date, UTC_TIMESTAMP()) / %s) AS bucket,
+            COALESCE(AVG(CASE WHEN value >= 0 THEN value END), -1) AS value,
+            COUNT(*) AS samples,
+            SUM(value IS NULL OR value < 0) AS lost
+        FROM stats
+        WHERE type IN ({placeholders}) AND date >= UTC_TIMESTAMP() - INTERVAL %s HOUR
+        GROUP BY host_id, type, bucket
+        """
+        params = (bucket_secs,) + tuple(types) + (hours,)
+        return self.db.fetchall(query, params)
+
     def update_stats_bulk(self, stats_data: list[dict]) -> None:
         """
         Update multiple stats records in the database.
         Args:
             stats_data: A list of dictionaries, each containing 'type', 'host_id', 'value', and 'date'.
+                A repeated host_id, type and date updates the value.
         """
+        # date is part of the unique key, also on partitioned tables
         query = """
         INSERT INTO stats (type, host_id, value, date)
         VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE value = VALUES(value), date = VALUES(date)
+        ON DUPLICATE KEY UPDATE value = VALUES(value)
         """
-        params = [(stat["type"], stat["host_id"], stat["value"], stat["date"]) for stat in stats_data]
+        now = utc_date_now()
+        params = [(stat["type"], stat["host_id"], stat["value"], stat.get("date") or now) for stat in stats_data]
         self.db.executemany(query, params)
         self.db.commit()
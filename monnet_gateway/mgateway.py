@@ -28,6 +28,8 @@ sys.path.append(str(BASE_DIR))
 # Local
 from monnet_shared.app_context import AppContext
 from monnet_shared.clogger import Logger
+from monnet_gateway.networking.reverse_resolver import close_reverse_resolver
+from monnet_gateway.networking.socket_raw import get_icmp_backend
 from monnet_gateway.services.ansible_service import AnsibleService
 from monnet_gateway.server import run_server, stop_server
 from monnet_gateway.tasks.task_scheduler import TaskSched
@@ -104,6 +106,7 @@ def run(ctx: AppContext):
             server_thread.join(timeout=20)
         if task_thread is not None:
             task_thread.stop()
+        close_reverse_resolver(ctx)
 
 def main():
     parser = argparse.ArgumentParser()
@@ -141,6 +144,11 @@ def main():
     config = DBConfig(ctx, mgateway_config.CONFIG_DB_PATH)
     ctx.set_config(config)
 
+    # ICMP sockets: unprivileged ping sockets when allowed, raw otherwise
+    icmp_backend = get_icmp_backend(ctx)
+    if icmp_backend:
+        logger.info(f"ICMP back end: {icmp_backend}")
+
     # Setting up signal handlers
     signal.signal(signal.SIGTERM, lambda sig, frame: signal_handler(sig, frame, ctx))
     signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, ctx))
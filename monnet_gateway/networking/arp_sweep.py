@@ -0,0 +1,178 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - ARP Sweep
+@description: Layer 2 discovery of directly attached subnets. ARP requests are sent over
+    an AF_PACKET socket at a controlled rate and the replies give liveness and MAC in one
+    pass, hosts dropping ICMP still answer ARP.
+
+"""
+# Std
+import ipaddress
+import select
+import socket
+import struct
+from time import monotonic
+from typing import Iterable
+
+# Local
+from monnet_gateway.networking.gw_net_utils import get_hw_address, get_ip_and_netmask
+from monnet_shared.app_context import AppContext
+
+ETH_P_ARP = 0x0806
+ETH_BROADCAST = b"\xff" * 6
+ARP_REQUEST = 1
+ARP_REPLY = 2
+
+
+def build_arp_request(src_mac: bytes, src_ip: bytes, target_ip: bytes) -> bytes:
+    """
+    Ethernet broadcast frame with an ARP who-has request.
+
+    Args:
+        src_mac (bytes): Sender MAC (6 bytes).
+        src_ip (bytes): Sender IPv4 (4 bytes).
+        target_ip (bytes): Requested IPv4 (4 bytes).
+    Returns:
+        bytes: Frame.
+    """
+    eth_header = ETH_BROADCAST + src_mac + struct.pack("!H", ETH_P_ARP)
+    # htype ethernet, ptype IPv4, hlen 6, plen 4
+    arp = struct.pack("!HHBBH", 1, 0x0800, 6, 4, ARP_REQUEST)
+    arp += src_mac + src_ip + b"\x00" * 6 + target_ip
+
+    return eth_header + arp
+
+
+def parse_arp_reply(frame: bytes) -> tuple[str, str] | None:
+    """
+    Parse an ARP reply frame.
+
+    Returns:
+        tuple[str, str] | None: (sender ip, sender mac) or None if not an ARP reply.
+    """
+    if len(frame) < 42 or struct.unpack("!H", frame[12:14])[0] != ETH_P_ARP:
+        return None
+    if struct.unpack("!H", frame[20:22])[0] != ARP_REPLY:
+        return None
+    mac = ":".join(f"{b:02x}" for b in frame[22:28])
+    ip = socket.inet_ntoa(frame[28:32])
+
+    return ip, mac
+
+
+class ArpSweeper:
+    """
+    ARP sweep over the on-link networks of the gateway.
+
+    Requires CAP_NET_RAW, sweep() raises PermissionError without it so the
+    caller can fall back to ICMP.
+    """
+
+    def __init__(self, ctx: AppContext, rate: float = 200, wait: float = 1.0):
+        """
+        Args:
+            ctx (AppContext): Context.
+            rate (float): Max ARP requests per second.
+            wait (float): Seconds to wait for replies after the last request.
+        """
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.rate = max(float(rate), 1.0)
+        self.wait = wait
+        self.interfaces = self.load_interfaces() if hasattr(socket, "AF_PACKET") else []
+
+    def load_interfaces(self) -> list[dict]:
+        """
+        Get the interfaces with an IPv4 address and a MAC.
+
+        Returns:
+            list[dict]: name, ip, mac and network (IPv4Network) per interface.
+        """
+        interfaces = []
+        for _, name in socket.if_nameindex():
+            try:
+                ip, netmask = get_ip_and_netmask(name)
+                mac = get_hw_address(name)
+            except OSError:
+                # No IPv4 address
+                continue
+            network = ipaddress.IPv4Network(f"{ip}/{netmask}", strict=False)
+            if network.is_loopback or mac == "00:00:00:00:00:00":
+                continue
+            interfaces.append({"name": name, "ip": ip, "mac": mac, "network": network})
+
+        return interfaces
+
+    def interface_for(self, ip: str) -> dict | None:
+        """ On-link interface to reach the IP, None if the IP is not directly attached """
+        try:
+            addr = ipaddress.IPv4Address(ip)
+        except ValueError:
+            return None
+        for iface in self.interfaces:
+            if addr in iface["network"] and ip != iface["ip"]:
+                return iface
+
+        return None
+
+    def sweep(self, iface: dict, targets: Iterable[str]) -> dict[str, dict]:
+        """
+        Send an ARP request to each target and collect the replies.
+
+        Args:
+            iface (dict): Interface from load_interfaces.
+            targets (Iterable[str]): IPs on the interface network.
+        Returns:
+            dict[str, dict]: ip: {"mac", "latency" (ms)} of the hosts that replied.
+        Raises:
+            PermissionError: Raw sockets not allowed.
+        """
+        src_mac = bytes.fromhex(iface["mac"].replace(":", ""))
+        src_ip = socket.inet_aton(iface["ip"])
+        sent_at = {}
+        found = {}
+
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+        try:
+            sock.bind((iface["name"], 0))
+            sock.setblocking(False)
+            interval = 1.0 / self.rate
+            next_send = monotonic()
+
+            for ip in targets:
+                # Read the replies while waiting for the next send slot
+                self._receive(sock, sent_at, found, next_send)
+                try:
+                    sock.send(build_arp_request(src_mac, src_ip, socket.inet_aton(ip)))
+                except (BlockingIOError, OSError) as e:
+                    self.logger.debug(f"ARP send to {ip} failed: {e}")
+                    continue
+                sent_at[ip] = monotonic()
+                next_send = sent_at[ip] + interval
+
+            self._receive(sock, sent_at, found, monotonic() + self.wait)
+        finally:
+            sock.close()
+
+        return found
+
+    def _receive(self, sock: socket.socket, sent_at: dict, found: dict, until: float) -> None:
+        """ Collect the replies of the sent requests until the given monotonic time """
+        while True:
+            remaining = until - monotonic()
+            if remaining <= 0:
+                return
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                return
+            try:
+                frame = sock.recv(128)
+            except BlockingIOError:
+                continue
+            reply = parse_arp_reply(frame)
+            if reply is None:
+                continue
+            ip, mac = reply
+            if ip in sent_at and ip not in found:
+                found[ip] = {"mac": mac, "latency": round((monotonic() - sent_at[ip]) * 1000, 3)}
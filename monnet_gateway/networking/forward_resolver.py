@@ -0,0 +1,133 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Forward Resolver
+@description: Cached hostname to IPv4 resolution for the host checks.
+
+    Fresh entries are returned directly. Expired entries inside the stale window are
+    also returned while a background refresh runs (stale-while-revalidate), so a probe
+    only waits on DNS the first time a name is seen or after a long outage. A failed
+    refresh keeps the stale address until the stale window ends.
+
+"""
+# Std
+import ipaddress
+import socket
+import threading
+from time import monotonic
+
+# Local
+from monnet_shared.app_context import AppContext
+
+_resolver_lock = threading.Lock()
+
+
+class ForwardResolver:
+    """
+    Forward DNS cache shared through the AppContext var "forward_resolver",
+    use get_forward_resolver(ctx).
+
+    The system resolver does not expose the record TTL, the cache TTL is
+    configurable (dns_forward_ttl) and should match the zones TTL.
+    """
+
+    def __init__(self, ttl: float = 300, stale_ttl: float = 3600, negative_ttl: float = 30):
+        """
+        Args:
+            ttl (float): Seconds an address is fresh.
+            stale_ttl (float): Extra seconds an expired address is served while refreshed.
+            negative_ttl (float): Seconds to cache a failed resolution.
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # host: (ip or None, fresh until)
+        self._cache: dict[str, tuple[str | None, float]] = {}
+        self._refreshing: set[str] = set()
+
+    def resolve(self, host: str) -> str:
+        """
+        Resolve a hostname to an IPv4 address.
+
+        Args:
+            host (str): Hostname or IP.
+        Returns:
+            str: IP address.
+        Raises:
+            RuntimeError: If the host can't be resolved.
+        """
+        if self._is_ip(host):
+            return host
+
+        now = monotonic()
+        with self._lock:
+            entry = self._cache.get(host)
+
+        if entry is not None:
+            ip, fresh_until = entry
+            if now < fresh_until:
+                if ip is None:
+                    raise RuntimeError(f"Failed to resolve host {host}: cached failure")
+                return ip
+            if ip is not None and now < fresh_until + self.stale_ttl:
+                self._refresh_background(host)
+                return ip
+
+        ip = self._lookup(host)
+        if ip is None:
+            raise RuntimeError(f"Failed to resolve host {host}")
+
+        return ip
+
+    def invalidate(self, host: str) -> None:
+        """ Remove a host from the cache """
+        with self._lock:
+            self._cache.pop(host, None)
+
+    def _refresh_background(self, host: str) -> None:
+        with self._lock:
+            if host in self._refreshing:
+                return
+            self._refreshing.add(host)
+        threading.Thread(target=self._lookup, args=(host, True), daemon=True).start()
+
+    def _lookup(self, host: str, refresh: bool = False) -> str | None:
+        try:
+            ip = socket.gethostbyname(host)
+        except (socket.gaierror, socket.herror, OSError, UnicodeError):
+            ip = None
+
+        with self._lock:
+            if ip is not None:
+                self._cache[host] = (ip, monotonic() + self.ttl)
+            elif not refresh:
+                self._cache[host] = (None, monotonic() + self.negative_ttl)
+            # Failed refresh keeps the stale entry
+            self._refreshing.discard(host)
+
+        return ip
+
+    @staticmethod
+    def _is_ip(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+
+def get_forward_resolver(ctx: AppContext) -> ForwardResolver:
+    """ Get the context shared resolver, created on first use """
+    with _resolver_lock:
+        resolver = ctx.get_var("forward_resolver")
+        if resolver is None:
+            config = ctx.get_config()
+            resolver = ForwardResolver(
+                ttl=float(config.get("dns_forward_ttl", 300)),
+                stale_ttl=float(config.get("dns_forward_stale", 3600)),
+                negative_ttl=float(config.get("dns_forward_negative_ttl", 30)),
+            )
+            ctx.set_var("forward_resolver", resolver)
+
+    return resolver
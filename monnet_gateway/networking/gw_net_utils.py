@@ -23,12 +23,17 @@ def is_valid_ip(ip):
         return False
 
 def get_mac(ip):
-    """Get the MAC address for a given IP address."""
-    if not is_valid_ip(ip):
+    """
+    Get the MAC address for a given IP address from the ARP (IPv4) or
+    neighbour discovery (IPv6) table.
+    """
+    try:
+        family = "-6" if ipaddress.ip_address(ip).version == 6 else "-4"
+    except ValueError:
         return None
 
     try:
-        result = subprocess.check_output(['ip', 'neigh', 'show', ip], stderr=subprocess.STDOUT)
+        result = subprocess.check_output(['ip', family, 'neigh', 'show', ip], stderr=subprocess.STDOUT)
         result = result.decode('utf-8')
     except (subprocess.CalledProcessError, FileNotFoundError, OSError):
         return None
@@ -41,6 +46,30 @@ def get_mac(ip):
     return None
 
 
+def get_neighbours(version: int = 6) -> dict[str, str]:
+    """
+    Resolved entries of the ARP (IPv4) or neighbour discovery (IPv6) table.
+
+    Returns:
+        dict[str, str]: {ip: mac}, empty if the table can not be read.
+    """
+    try:
+        result = subprocess.check_output(['ip', f'-{version}', 'neigh', 'show'], stderr=subprocess.STDOUT)
+        result = result.decode('utf-8')
+    except (subprocess.CalledProcessError, FileNotFoundError, OSError):
+        return {}
+
+    neighbours = {}
+    for line in result.splitlines():
+        fields = line.split()
+        # FAILED and INCOMPLETE entries have no lladdr
+        if "lladdr" not in fields:
+            continue
+        neighbours[fields[0]] = fields[fields.index("lladdr") + 1]
+
+    return neighbours
+
+
 def _format_mac_vendor(mac: str):
     # Remove any non-alphanumeric characters
     cleaned_mac = re.sub(r'[^a-fA-F0-9]', '', mac)
@@ -148,6 +177,20 @@ def get_ip_and_netmask(iface):
 
     return ip, netmask
 
+def get_hw_address(iface):
+    """Get the MAC address of an interface"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        info = fcntl.ioctl(
+            sock.fileno(),
+            0x8927,  # SIOCGIFHWADDR
+            struct.pack('256s', iface[:15].encode('utf-8'))
+        )
+    finally:
+        sock.close()
+
+    return ':'.join(f'{b:02x}' for b in info[18:24])
+
 def is_local_ip(ip):
     """
     Returns True if the IP is private or loopback.
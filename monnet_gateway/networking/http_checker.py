@@ -0,0 +1,360 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - HTTP Checker
+@description: HTTP/HTTPS service checks over pooled keep-alive connections.
+
+    Connections are opened by hand (resolve, TCP connect, TLS handshake) so each phase
+    is timed, then handed to http.client. Idle connections are kept per scheme, host,
+    port and verify mode and reused by the next check of the same service. Any error on
+    a reused connection (closed by the server, or silently dropped by a NAT/firewall and
+    timing out) is retried once on a new connection.
+
+"""
+# Std
+from datetime import datetime, timezone
+import hashlib
+import http.client
+import socket
+import ssl
+import threading
+from time import monotonic
+
+# Third party
+from cryptography import x509
+
+# Local
+from monnet_gateway.networking.forward_resolver import get_forward_resolver
+from monnet_shared.app_context import AppContext
+
+_checker_lock = threading.Lock()
+
+
+def parse_status_codes(value) -> set[int]:
+    """
+    Parse the expected status codes config.
+
+    Args:
+        value: list of codes or a string like "200-299,301,302".
+    Returns:
+        set[int]: Status codes.
+    """
+    if isinstance(value, int):
+        return {value}
+    if isinstance(value, (list, tuple, set)):
+        return {int(code) for code in value}
+
+    codes = set()
+    for item in str(value).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            low, high = item.split("-", 1)
+            codes.update(range(int(low), int(high) + 1))
+        else:
+            codes.add(int(item))
+
+    return codes
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def parse_certificate(der: bytes) -> dict:
+    """
+    Parse a DER certificate.
+
+    Returns:
+        dict: fingerprint (sha256 hex), subject, issuer, not_after (UTC) and san (DNS names).
+    """
+    cert = x509.load_der_x509_certificate(der)
+    try:
+        san = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+        san_names = san.get_values_for_type(x509.DNSName)
+    except x509.ExtensionNotFound:
+        san_names = []
+
+    return {
+        "fingerprint": hashlib.sha256(der).hexdigest(),
+        "subject": cert.subject.rfc4514_string(),
+        "issuer": cert.issuer.rfc4514_string(),
+        "not_after": cert.not_valid_after_utc.strftime("%Y-%m-%d %H:%M:%S"),
+        "san": san_names,
+    }
+
+
+class CertCache:
+    """
+    Parsed peer certificates per host:port, parsed again only when the
+    fingerprint changes. Also tracks the notified events so each certificate
+    (or error) is reported once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (host, port): {"info": dict, "notified": set}
+        self._certs: dict[tuple[str, int], dict] = {}
+        # (host, port): last reported error
+        self._errors: dict[tuple[str, int], str] = {}
+
+    def update(self, key: tuple[str, int], der: bytes) -> dict:
+        """ Store the certificate of a handshake, return its info """
+        fingerprint = hashlib.sha256(der).hexdigest()
+        with self._lock:
+            entry = self._certs.get(key)
+            if entry is not None and entry["info"]["fingerprint"] == fingerprint:
+                return entry["info"]
+        info = parse_certificate(der)
+        with self._lock:
+            self._certs[key] = {"info": info, "notified": set()}
+
+        return info
+
+    def get(self, key: tuple[str, int]) -> dict | None:
+        """ Info of the last certificate seen """
+        with self._lock:
+            entry = self._certs.get(key)
+
+        return entry["info"] if entry else None
+
+    def mark_notified(self, key: tuple[str, int], event: str) -> bool:
+        """ Mark an event of the current certificate, False if already notified """
+        with self._lock:
+            entry = self._certs.get(key)
+            if entry is None or event in entry["notified"]:
+                return False
+            entry["notified"].add(event)
+
+        return True
+
+    def mark_error(self, key: tuple[str, int], error: str) -> bool:
+        """ Track a certificate error, False if the same error was already reported """
+        with self._lock:
+            if self._errors.get(key) == error:
+                return False
+            self._errors[key] = error
+
+        return True
+
+    def clear_error(self, key: tuple[str, int]) -> None:
+        with self._lock:
+            self._errors.pop(key, None)
+
+
+def days_left(cert: dict) -> int:
+    """ Days until the certificate not_after """
+    not_after = datetime.strptime(cert["not_after"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+    return (not_after - datetime.now(timezone.utc)).days
+
+
+class HttpChecker:
+    """
+    Pooled HTTP/HTTPS checker shared through the AppContext var "http_checker",
+    use get_http_checker(ctx).
+    """
+
+    def __init__(self, ctx: AppContext, method: str = "HEAD", expected_status=None,
+                 max_idle: int = 2, max_read: int = 65536):
+        """
+        Args:
+            ctx (AppContext): Context.
+            method (str): HEAD, or GET (body not downloaded beyond max_read).
+            expected_status: Status codes considered online (default 200).
+            max_idle (int): Idle connections kept per service.
+            max_read (int): Max GET body read to keep the connection alive.
+        """
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.method = method.upper() if method else "HEAD"
+        self.expected_status = parse_status_codes(expected_status if expected_status is not None else 200)
+        self.max_idle = max_idle
+        self.max_read = max_read
+        self._lock = threading.Lock()
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        # SSL contexts built once
+        self._ssl_verify = ssl.create_default_context()
+        self._ssl_noverify = ssl.create_default_context()
+        self._ssl_noverify.check_hostname = False
+        self._ssl_noverify.verify_mode = ssl.CERT_NONE
+        self.certs = CertCache()
+
+    def check(self, host: str, port: int, https: bool = False, verify: bool = True,
+              timeout: float = 5.0, path: str = "/") -> dict:
+        """
+        Check an HTTP/HTTPS service.
+
+        Args:
+            host (str): Hostname or IP, sent in the Host header and SNI.
+            port (int): Port.
+            https (bool): Use TLS.
+            verify (bool): Verify the certificate (HTTPS).
+            timeout (float): Socket timeout.
+            path (str): Request path.
+        Returns:
+            dict: online, status_code, error, reused, timings (ms): dns, connect, tls, ttfb
+                and cert (HTTPS, peer certificate info from the handshake).
+        Raises:
+            ssl.SSLCertVerificationError: Certificate verification failed.
+        """
+        key = ("https" if https else "http", host, port, verify if https else None)
+        result = {"online": 0, "status_code": None, "error": None, "reused": False, "timings": {}}
+
+        conn = self._get_idle(key)
+        if conn is not None:
+            result["reused"] = True
+            if https:
+                result["cert"] = self.certs.get((host, port))
+            try:
+                conn.sock.settimeout(timeout)
+                self._request(conn, key, path, result)
+                return result
+            except (http.client.HTTPException, OSError) as e:
+                # A kept-alive connection may have been closed or dropped
+                conn.close()
+                self.logger.debug(f"Idle connection to {host}:{port} lost ({e}), reconnecting")
+                result["reused"] = False
+                result["timings"] = {}
+            except Exception:
+                conn.close()
+                raise
+
+        conn = self._connect(host, port, https, verify, timeout, result)
+        try:
+            self._request(conn, key, path, result)
+        except Exception:
+            conn.close()
+            raise
+
+        return result
+
+    def close(self) -> None:
+        """ Close all the idle connections """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _connect(self, host: str, port: int, https: bool, verify: bool,
+                 timeout: float, result: dict) -> http.client.HTTPConnection:
+        """ Open a connection timing each phase """
+        start = monotonic()
+        ip = get_forward_resolver(self.ctx).resolve(host)
+        resolved = monotonic()
+        sock = socket.create_connection((ip, port), timeout=timeout)
+        connected = monotonic()
+        result["timings"]["dns"] = _ms(resolved - start)
+        result["timings"]["connect"] = _ms(connected - resolved)
+
+        if https:
+            ssl_context = self._ssl_verify if verify else self._ssl_noverify
+            try:
+                sock = ssl_context.wrap_socket(sock, server_hostname=host)
+            except Exception:
+                sock.close()
+                raise
+            result["timings"]["tls"] = _ms(monotonic() - connected)
+            # Binary form is available even without verification
+            der = sock.getpeercert(binary_form=True)
+            if der:
+                try:
+                    result["cert"] = self.certs.update((host, port), der)
+                except ValueError as e:
+                    self.logger.warning(f"Invalid certificate from {host}:{port}: {e}")
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        # http.client only connects when sock is None
+        conn.sock = sock
+
+        return conn
+
+    def _request(self, conn: http.client.HTTPConnection, key: tuple, path: str, result: dict) -> None:
+        """ Send the request, read the status and keep the connection if reusable """
+        method = self.method
+        response = self._send(conn, method, path, result)
+        # Servers without HEAD support
+        if method == "HEAD" and response.status in (405, 501):
+            reusable = self._drain(response)
+            if not reusable:
+                conn.close()
+                conn = self._reconnect(conn, key, result)
+            method = "GET"
+            response = self._send(conn, method, path, result)
+
+        result["status_code"] = response.status
+        if response.status in self.expected_status:
+            result["online"] = 1
+        else:
+            result["error"] = f"HTTP status {response.status}"
+
+        if self._drain(response):
+            self._put_idle(key, conn)
+        else:
+            conn.close()
+
+    def _send(self, conn: http.client.HTTPConnection, method: str, path: str,
+              result: dict) -> http.client.HTTPResponse:
+        start = monotonic()
+        conn.request(method, path, headers={"User-Agent": "Monnet", "Accept": "*/*"})
+        response = conn.getresponse()
+        result["timings"]["ttfb"] = _ms(monotonic() - start)
+
+        return response
+
+    def _drain(self, response: http.client.HTTPResponse) -> bool:
+        """
+        Finish the response. Small bodies are read so the connection can be reused,
+        big or unknown length bodies are not downloaded (early close).
+
+        Returns:
+            bool: True if the connection can be reused.
+        """
+        if response.will_close:
+            response.close()
+            return False
+        if response.length is None or response.length > self.max_read:
+            response.close()
+            return False
+        response.read()
+
+        return True
+
+    def _reconnect(self, conn: http.client.HTTPConnection, key: tuple, result: dict) -> http.client.HTTPConnection:
+        scheme, host, port, verify = key
+        return self._connect(host, port, scheme == "https", bool(verify), conn.timeout, result)
+
+    def _get_idle(self, key: tuple) -> http.client.HTTPConnection | None:
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop()
+
+        return None
+
+    def _put_idle(self, key: tuple, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+
+def get_http_checker(ctx: AppContext) -> HttpChecker:
+    """ Get the context shared checker, created on first use """
+    with _checker_lock:
+        checker = ctx.get_var("http_checker")
+        if checker is None:
+            config = ctx.get_config()
+            checker = HttpChecker(
+                ctx,
+                method=config.get("http_check_method", "HEAD"),
+                expected_status=config.get("http_expected_status", 200),
+            )
+            ctx.set_var("http_checker", checker)
+
+    return checker
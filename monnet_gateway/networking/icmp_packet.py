@@ -5,11 +5,36 @@ Monnet Gateway
 
 """
 
+import itertools
+import os
 import struct
+import threading
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACHABLE = 3
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+ICMPV6_DEST_UNREACHABLE = 1
+
+_identifier_lock = threading.Lock()
+_identifiers = itertools.count(os.getpid() & 0xFFFF)
+
+
+def next_identifier() -> int:
+    """ Echo identifier unique per ping (16 bits, wraps) """
+    with _identifier_lock:
+        return next(_identifiers) & 0xFFFF
+
 
 class ICMPPacket:
-    def __init__(self, identifier: int = 1, sequence: int = 1, payload: bytes = b"ping"):
-        self.type = 8  # Echo Request (ICMP)
+    def __init__(self, identifier: int = 1, sequence: int = 1, payload: bytes = b"ping", ipv6: bool = False):
+        """
+        ICMP echo request. With ipv6 an ICMPv6 echo request is built with checksum 0,
+        the kernel computes it on IPPROTO_ICMPV6 sockets (it covers the IPv6 pseudo header).
+        """
+        self.ipv6 = ipv6
+        self.type = ICMPV6_ECHO_REQUEST if ipv6 else ICMP_ECHO_REQUEST
         self.code = 0
         self.checksum = 0
         self.identifier = identifier
@@ -27,6 +52,8 @@ class ICMPPacket:
             self.sequence
         )
         packet = header + self.payload
+        if self.ipv6:
+            return packet
         self.checksum = self.calculate_checksum(packet)
         # Reempaqueta con el checksum correcto
         header = struct.pack(
@@ -0,0 +1,90 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Known IP Index
+@description: Compact index of the known IPv4 addresses, kept as a sorted array of
+    32 bit integers (4 bytes per host) and searched with bisect. The few IPv6 hosts
+    are kept in a set of integers.
+
+"""
+# Std
+from array import array
+from bisect import bisect_left
+import ipaddress
+import threading
+from typing import Iterable
+
+
+class KnownIPIndex:
+    """
+    Sorted array('I') of the known IPv4 addresses, set of the IPv6 ones.
+
+    Shared through the AppContext var "known_ip_index", built on each discovery
+    run and updated by HostService when hosts are added or deleted.
+    """
+
+    def __init__(self, ips: Iterable[str] = ()):
+        values = set()
+        self._ipv6: set[int] = set()
+        for ip in ips:
+            address = self._parse(ip)
+            if address is None:
+                continue
+            if address.version == 6:
+                self._ipv6.add(int(address))
+            else:
+                values.add(int(address))
+        self._ips = array("I", sorted(values))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ips) + len(self._ipv6)
+
+    def __contains__(self, ip) -> bool:
+        if isinstance(ip, int):
+            value = ip
+        else:
+            address = self._parse(ip)
+            if address is None:
+                return False
+            if address.version == 6:
+                return int(address) in self._ipv6
+            value = int(address)
+        i = bisect_left(self._ips, value)
+
+        return i < len(self._ips) and self._ips[i] == value
+
+    def add(self, ip: str) -> None:
+        """ Add an address, invalid addresses are ignored """
+        address = self._parse(ip)
+        if address is None:
+            return
+        value = int(address)
+        with self._lock:
+            if address.version == 6:
+                self._ipv6.add(value)
+                return
+            i = bisect_left(self._ips, value)
+            if i == len(self._ips) or self._ips[i] != value:
+                self._ips.insert(i, value)
+
+    def discard(self, ip: str) -> None:
+        """ Remove an address if present """
+        address = self._parse(ip)
+        if address is None:
+            return
+        value = int(address)
+        with self._lock:
+            if address.version == 6:
+                self._ipv6.discard(value)
+                return
+            i = bisect_left(self._ips, value)
+            if i < len(self._ips) and self._ips[i] == value:
+                del self._ips[i]
+
+    @staticmethod
+    def _parse(ip: str) -> ipaddress.IPv4Address | ipaddress.IPv6Address | None:
+        try:
+            return ipaddress.ip_address(ip)
+        except (ValueError, TypeError):
+            return None
@@ -0,0 +1,153 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - IP Sweep
+@description: Lazy random order iteration over the host addresses of several networks.
+
+    Addresses are numbered 0..N-1 over all the networks and visited following a full period
+    LCG modulo the next power of two, values >= N are skipped (cycle walking). The iterator
+    state fits in a few integers, so a sweep can be stopped at any point and resumed later
+    from its cursor.
+
+"""
+# Std
+from bisect import bisect_right
+import hashlib
+import ipaddress
+import random
+from time import time
+from typing import Iterator
+
+
+class IPSweep:
+    """
+    Random order, resumable sweep over the host addresses of a list of networks.
+
+    Cursor (dict, JSON serializable):
+        - seed: LCG parameters seed.
+        - state: last LCG value.
+        - steps: LCG steps done in the current cycle.
+        - signature: networks signature, a change starts a new cycle.
+    """
+
+    def __init__(self, networks: list[ipaddress.IPv4Network | ipaddress.IPv6Network], cursor: dict | None = None):
+        # Sorted supernets come before their subnets, drop the overlapped ones
+        self.networks = []
+        for network in sorted(set(networks), key=lambda network: (network.version, network)):
+            if (not self.networks or self.networks[-1].version != network.version
+                    or not network.subnet_of(self.networks[-1])):
+                self.networks.append(network)
+        self.starts = []
+        self.offsets = []
+        self.size = 0
+        for network in self.networks:
+            first, count = self._host_range(network)
+            self.starts.append(first)
+            self.offsets.append(self.size)
+            self.size += count
+
+        # LCG modulus, power of two >= size (min 4 so a % 4 == 1 is meaningful)
+        self.modulus = 4
+        while self.modulus < self.size:
+            self.modulus <<= 1
+        self.signature = self._signature()
+
+        if not self._valid_cursor(cursor):
+            cursor = self._new_cursor()
+        self._set_cursor(cursor)
+
+    @property
+    def cursor(self) -> dict:
+        """ Current position, to be persisted and passed back to resume the sweep """
+        return {
+            "seed": self.seed,
+            "state": self.state,
+            "steps": self.steps,
+            "signature": self.signature,
+        }
+
+    @property
+    def completed(self) -> bool:
+        """ True when every address of the current cycle has been visited """
+        return self.steps >= self.modulus
+
+    def restart(self) -> None:
+        """ Start a new cycle with a new random order """
+        self._set_cursor(self._new_cursor())
+
+    def addresses(self, deadline: float | None = None) -> Iterator[str]:
+        """
+        Yield the pending addresses of the current cycle.
+
+        The cursor is advanced before each yield, so it always points after the
+        last address returned.
+
+        Args:
+            deadline (float): Optional time() limit, stop yielding once reached.
+        Yields:
+            str: IP address.
+        """
+        while self.steps < self.modulus:
+            if deadline is not None and time() >= deadline:
+                return
+            self.state = (self.multiplier * self.state + self.increment) % self.modulus
+            self.steps += 1
+            if self.state < self.size:
+                yield self.ip_at(self.state)
+
+    def ip_at(self, index: int) -> str:
+        """ Address at position index (0..size-1) of the sweep """
+        i = bisect_right(self.offsets, index) - 1
+        value = self.starts[i] + index - self.offsets[i]
+        if self.networks[i].version == 6:
+            return str(ipaddress.IPv6Address(value))
+
+        return str(ipaddress.IPv4Address(value))
+
+    def _set_cursor(self, cursor: dict) -> None:
+        self.seed = int(cursor["seed"])
+        self.state = int(cursor["state"])
+        self.steps = int(cursor["steps"])
+        rng = random.Random(self.seed)
+        # Full period modulo 2^k: increment odd and multiplier % 4 == 1
+        self.multiplier = 4 * rng.randrange(self.modulus // 4) + 1
+        self.increment = 2 * rng.randrange(self.modulus // 2) + 1
+
+    def _new_cursor(self) -> dict:
+        return {
+            "seed": random.getrandbits(32),
+            "state": random.randrange(self.modulus),
+            "steps": 0,
+            "signature": self.signature,
+        }
+
+    def _valid_cursor(self, cursor: dict | None) -> bool:
+        if not isinstance(cursor, dict) or cursor.get("signature") != self.signature:
+            return False
+        try:
+            state = int(cursor["state"])
+            steps = int(cursor["steps"])
+            int(cursor["seed"])
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        return 0 <= state < self.modulus and 0 <= steps <= self.modulus
+
+    def _signature(self) -> str:
+        networks = ",".join(str(network) for network in self.networks)
+
+        return hashlib.sha1(networks.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _host_range(network: ipaddress.IPv4Network | ipaddress.IPv6Network) -> tuple[int, int]:
+        """
+        (first host as int, number of hosts), like hosts(): excludes the network and broadcast
+        addresses, and the subnet router anycast address on IPv6.
+        """
+        first = int(network.network_address)
+        if network.prefixlen >= network.max_prefixlen - 1:
+            return first, network.num_addresses
+        if network.version == 6:
+            return first + 1, network.num_addresses - 1
+
+        return first + 1, network.num_addresses - 2
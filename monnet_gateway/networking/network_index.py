@@ -0,0 +1,81 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Network Index
+@description: Longest prefix match of IPv4 and IPv6 addresses against the networks table.
+
+"""
+# Std
+import ipaddress
+
+
+class NetworkIndex:
+    """
+    Index of the networks by address family, prefix length and network address.
+
+    A lookup masks the IP with each prefix length in use of its family, from the most
+    specific to the least, so 0.0.0.0/0 only matches when nothing else does. The cost
+    is bounded by the number of distinct prefix lengths (max 33, 129 for IPv6).
+
+    Built by NetworksService.build_index once per discovery pass or hosts batch.
+    """
+
+    def __init__(self, networks: list[dict], logger=None):
+        self.networks = []
+        # version: {prefixlen: {network address int: network row}}
+        self._by_prefix: dict[int, dict[int, dict[int, dict]]] = {4: {}, 6: {}}
+
+        for network in networks or []:
+            network_str = network.get("network")
+            if not network_str:
+                if logger:
+                    logger.warning(f"Network CIDR not found for network: {network.get('name')}")
+                continue
+            try:
+                cidr = ipaddress.ip_network(network_str, strict=False)
+            except ValueError:
+                if logger:
+                    logger.warning(f"Invalid CIDR notation: {network_str}")
+                continue
+            self.networks.append(network)
+            # First defined wins on duplicated networks
+            by_prefix = self._by_prefix[cidr.version]
+            by_prefix.setdefault(cidr.prefixlen, {}).setdefault(int(cidr.network_address), network)
+
+        self._prefixes = {version: sorted(by_prefix, reverse=True) for version, by_prefix in self._by_prefix.items()}
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def lookup(self, ip: str) -> dict | None:
+        """
+        Most specific network containing the IP.
+
+        Args:
+            ip (str): IPv4 or IPv6 address.
+        Returns:
+            dict | None: Network row, None if no network matches or the IP is invalid.
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except (TypeError, ValueError):
+            return None
+
+        value = int(address)
+        bits = address.max_prefixlen
+        by_prefix = self._by_prefix[address.version]
+        for prefixlen in self._prefixes[address.version]:
+            mask = ((1 << prefixlen) - 1) << (bits - prefixlen)
+            network = by_prefix[prefixlen].get(value & mask)
+            if network is not None:
+                return network
+
+        return None
+
+    def network_id(self, ip: str, default: int = 1) -> int:
+        """ Id of the most specific network containing the IP, or default """
+        network = self.lookup(ip)
+        if network is None:
+            return default
+
+        return network.get("id", default)
@@ -0,0 +1,160 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Reverse Resolver
+@description: Concurrent PTR lookups with a positive/negative TTL cache. gethostbyaddr
+    blocks (seconds for unresolvable addresses), lookups run in a thread pool and
+    concurrent requests of the same IP share the same lookup. The cache is capped,
+    when full the expired entries and then the oldest ones are dropped.
+
+"""
+# Std
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import socket
+import threading
+from time import monotonic
+from typing import Iterable
+
+# Local
+from monnet_shared.app_context import AppContext
+
+_resolver_lock = threading.Lock()
+
+
+class ReverseResolver:
+    """
+    Reverse DNS resolver shared through the AppContext var "reverse_resolver",
+    use get_reverse_resolver(ctx).
+    """
+
+    def __init__(self, max_workers: int = 16, ttl: float = 3600, negative_ttl: float = 300,
+                 max_entries: int = 65536):
+        """
+        Args:
+            max_workers (int): Concurrent lookups.
+            ttl (float): Seconds to cache a resolved hostname.
+            negative_ttl (float): Seconds to cache a failed lookup.
+            max_entries (int): Max cached IPs.
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rdns")
+        self._lock = threading.Lock()
+        # ip: (hostname or None, expire time), in insertion order
+        self._cache: dict[str, tuple[str | None, float]] = {}
+        # ip: lookup in progress
+        self._pending: dict[str, Future] = {}
+
+    def get(self, ip: str) -> str | None:
+        """
+        Non blocking lookup. Return the cached hostname, a missing or expired entry
+        is resolved in background and will be available in a next call.
+
+        Args:
+            ip (str): IP address.
+        Returns:
+            str | None: Hostname if cached.
+        """
+        found, hostname = self._cached(ip)
+        if not found:
+            self._submit(ip)
+
+        return hostname
+
+    def resolve_many(self, ips: Iterable[str], timeout: float | None = None) -> dict[str, str | None]:
+        """
+        Resolve a list of IPs concurrently.
+
+        Args:
+            ips (Iterable[str]): IP addresses, duplicates are resolved once.
+            timeout (float): Max seconds to wait, None waits for all lookups.
+        Returns:
+            dict[str, str | None]: ip: hostname, None if not resolved (or not in time).
+        """
+        results = {}
+        futures = {}
+        for ip in set(ips):
+            found, hostname = self._cached(ip)
+            if found:
+                results[ip] = hostname
+            else:
+                futures[ip] = self._submit(ip)
+
+        if futures:
+            wait(futures.values(), timeout=timeout)
+        for ip, future in futures.items():
+            results[ip] = future.result() if future.done() else None
+
+        return results
+
+    def close(self) -> None:
+        """ Stop the pool without waiting for the pending lookups """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cached(self, ip: str) -> tuple[bool, str | None]:
+        with self._lock:
+            entry = self._cache.get(ip)
+        if entry is None or entry[1] < monotonic():
+            return False, None
+
+        return True, entry[0]
+
+    def _submit(self, ip: str) -> Future:
+        with self._lock:
+            future = self._pending.get(ip)
+            if future is None:
+                future = self._executor.submit(self._lookup, ip)
+                self._pending[ip] = future
+
+        return future
+
+    def _lookup(self, ip: str) -> str | None:
+        try:
+            hostname = socket.gethostbyaddr(ip)[0]
+        except (socket.herror, socket.gaierror, OSError, UnicodeError):
+            hostname = None
+        ttl = self.ttl if hostname else self.negative_ttl
+        now = monotonic()
+        with self._lock:
+            # Re inserted at the end, the oldest entries stay first
+            self._cache.pop(ip, None)
+            if len(self._cache) >= self.max_entries:
+                self._prune(now)
+            self._cache[ip] = (hostname, now + ttl)
+            self._pending.pop(ip, None)
+
+        return hostname
+
+    def _prune(self, now: float) -> None:
+        """ Drop the expired entries, then the oldest until there is room for one. Lock held. """
+        for ip in [ip for ip, (_, expire) in self._cache.items() if expire < now]:
+            del self._cache[ip]
+        while len(self._cache) >= self.max_entries:
+            del self._cache[next(iter(self._cache))]
+
+
+def get_reverse_resolver(ctx: AppContext) -> ReverseResolver:
+    """ Get the context shared resolver, created on first use """
+    with _resolver_lock:
+        resolver = ctx.get_var("reverse_resolver")
+        if resolver is None:
+            config = ctx.get_config()
+            resolver = ReverseResolver(
+                max_workers=int(config.get("dns_resolver_workers", 16)),
+                ttl=float(config.get("dns_cache_ttl", 3600)),
+                negative_ttl=float(config.get("dns_negative_ttl", 300)),
+                max_entries=int(config.get("dns_cache_max_entries", 65536)),
+            )
+            ctx.set_var("reverse_resolver", resolver)
+
+    return resolver
+
+
+def close_reverse_resolver(ctx: AppContext) -> None:
+    """ Close the context shared resolver, if created, on gateway stop """
+    with _resolver_lock:
+        resolver = ctx.get_var("reverse_resolver")
+        if resolver is not None:
+            resolver.close()
+            ctx.set_var("reverse_resolver", None)
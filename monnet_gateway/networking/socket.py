@@ -9,21 +9,29 @@ import socket
 from typing import Optional, Tuple
 
 # Local
+from monnet_gateway.networking.forward_resolver import ForwardResolver
 from monnet_shared.app_context import AppContext
 
 
+class SocketTimeoutError(ConnectionError):
+    """ Socket operation timed out """
+
+
 class SocketHandler:
-    def __init__(self, timeout: float = 5.0):
+    def __init__(self, timeout: float = 5.0, resolver: Optional[ForwardResolver] = None):
         """
         Sockets (TCP/UDP).
 
         Args:
             timeout: Sockets timeout in seconds
+            resolver: Optional shared forward DNS cache
         """
         self.timeout = timeout
+        self.resolver = resolver
         self.socket: Optional[socket.socket] = None
         self.connection: Optional[socket.socket] = None  # Para sockets TCP (modo servidor)
         self.client_address: Optional[Tuple[str, int]] = None  # Para sockets TCP (modo servidor)
+        self.udp_peer: Optional[Tuple[str, int]] = None  # UDP socket connected (udp_connect)
 
     def create_tcp_socket(self, family: int = socket.AF_INET) -> bool:
         """Crea un socket TCP."""
@@ -34,10 +42,10 @@ class SocketHandler:
         except OSError as e:
             raise OSError(f"Failed to create TCP socket: {e}")
 
-    def create_udp_socket(self) -> bool:
+    def create_udp_socket(self, family: int = socket.AF_INET) -> bool:
         """Crea un socket UDP."""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket = socket.socket(family, socket.SOCK_DGRAM)
             self.socket.settimeout(self.timeout)
             return True
         except OSError as e:
@@ -94,12 +102,30 @@ class SocketHandler:
             self.socket.connect((resolved_host, port))
             return True
         except socket.timeout:
-            raise ConnectionError(f"Connection to {host}:{port} timed out")
+            raise SocketTimeoutError(f"Connection to {host}:{port} timed out")
         except OSError as e:
             raise ConnectionError(f"Failed to connect to {host}:{port}: {e}")
 
+    def udp_connect(self, host: str, port: int) -> bool:
+        """
+        Connect the UDP socket to a peer. Only its datagrams are received and an
+        ICMP port unreachable is reported as ConnectionRefusedError by send/receive.
+        """
+        if not self._validate_socket(socket.SOCK_DGRAM):
+            raise RuntimeError("Socket is not valid or not created")
+
+        try:
+            resolved_host = self.resolve_host(host)
+            self.socket.connect((resolved_host, port))
+            self.udp_peer = (resolved_host, port)
+            return True
+        except OSError as e:
+            raise ConnectionError(f"Failed to connect UDP socket to {host}:{port}: {e}")
+
     def resolve_host(self, host: str) -> str:
         """Resuelve un dominio a una dirección IP."""
+        if self.resolver is not None:
+            return self.resolver.resolve(host)
         try:
             return socket.gethostbyname(host)
         except socket.gaierror as e:
@@ -121,12 +147,17 @@ class SocketHandler:
             else:
                 if not self._validate_socket(socket.SOCK_DGRAM):
                     return False
-                if not address:
+                if address:
+                    self.socket.sendto(data, address)
+                elif self.udp_peer:
+                    self.socket.send(data)
+                else:
                     raise ValueError("UDP send requires a destination address")
-                self.socket.sendto(data, address)
             return True
         except socket.timeout:
-            raise ConnectionError("Socket operation timed out")
+            raise SocketTimeoutError("Socket operation timed out")
+        except ConnectionRefusedError:
+            raise
         except OSError as e:
             raise ConnectionError(f"Socket error: {e}")
         except Exception as e:
@@ -159,7 +190,9 @@ class SocketHandler:
 
                 return data, address
         except socket.timeout:
-            raise ConnectionError("Socket operation timed out")
+            raise SocketTimeoutError("Socket operation timed out")
+        except ConnectionRefusedError:
+            raise
         except OSError as e:
             raise ConnectionError(f"Failed to receive data: {e}")
 
@@ -180,6 +213,7 @@ class SocketHandler:
                 raise RuntimeError(f"Error closing socket: {e}")
             finally:
                 self.socket = None
+                self.udp_peer = None
 
     def set_timeout(self, timeout: float):
         """ Set Socket Timeout """
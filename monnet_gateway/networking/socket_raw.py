@@ -2,28 +2,117 @@
 @copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
 
 Monnet Gateway - Raw Socket
+@description: ICMP sockets. Two back ends, chosen once per process (get_icmp_backend):
+    "dgram" ping sockets (SOCK_DGRAM, allowed by net.ipv4.ping_group_range, no root),
+    the kernel sets the echo identifier and checksum and only delivers the replies of
+    the socket. "raw" sockets (CAP_NET_RAW) receive every ICMP packet of the host.
 
 """
 # Std
+import ipaddress
 import socket
+import struct
+import threading
+from time import monotonic
 
 # Local
+from monnet_gateway.networking.forward_resolver import get_forward_resolver
+from monnet_gateway.networking.icmp_packet import (
+    ICMP_DEST_UNREACHABLE, ICMP_ECHO_REPLY, ICMPV6_DEST_UNREACHABLE, ICMPV6_ECHO_REPLY
+)
 from monnet_shared.app_context import AppContext
 
+# linux/icmpv6.h, not exported by the socket module
+ICMP6_FILTER = 1
+
+ICMP_BACKEND_DGRAM = "dgram"
+ICMP_BACKEND_RAW = "raw"
+
+_backend_lock = threading.Lock()
+
+
+def detect_icmp_backend(preferred: str = "auto") -> str | None:
+    """
+    Find the usable ICMP socket type. Ping sockets are preferred, the kernel
+    filters the replies by identifier.
+
+    Args:
+        preferred (str): auto, dgram or raw.
+    Returns:
+        str | None: ICMP_BACKEND_DGRAM, ICMP_BACKEND_RAW or None if none is allowed.
+    """
+    candidates = {
+        ICMP_BACKEND_DGRAM: socket.SOCK_DGRAM,
+        ICMP_BACKEND_RAW: socket.SOCK_RAW,
+    }
+    if preferred in candidates:
+        order = [preferred] + [name for name in candidates if name != preferred]
+    else:
+        order = list(candidates)
+
+    for name in order:
+        try:
+            socket.socket(socket.AF_INET, candidates[name], socket.IPPROTO_ICMP).close()
+            return name
+        except OSError:
+            continue
+
+    return None
+
+
+def get_icmp_backend(ctx: AppContext) -> str | None:
+    """ ICMP back end of the context (var "icmp_backend"), detected on first use """
+    with _backend_lock:
+        backend = ctx.get_var("icmp_backend")
+        if backend is None:
+            preferred = ctx.get_config().get("icmp_backend", "auto")
+            backend = detect_icmp_backend(preferred)
+            if backend is None:
+                ctx.get_logger().warning("No ICMP socket allowed (ping_group_range or CAP_NET_RAW), ping disabled")
+            else:
+                ctx.set_var("icmp_backend", backend)
+
+    return backend
+
+
+def icmp6_filter(*allowed: int) -> bytes:
+    """ struct icmp6_filter passing only the given ICMPv6 types (a set bit blocks the type) """
+    data = [0xFFFFFFFF] * 8
+    for icmp_type in allowed:
+        data[icmp_type >> 5] &= ~(1 << (icmp_type & 31))
+
+    return struct.pack("=8I", *data)
+
+
 class SocketRawHandler:
 
-    def __init__(self, ctx: AppContext, timeout: float = 0.2, buffer_size: int = 1024):
+    def __init__(self, ctx: AppContext, timeout: float = 0.2, buffer_size: int = 1024, dgram: bool = False):
         self.ctx = ctx
         self.logger = ctx.get_logger()
         self.socket = None
         self.timeout = timeout
         self.buffer_size = buffer_size
+        # Ping socket (SOCK_DGRAM): no IP header and identifier set by the kernel
+        self.dgram = dgram
 
-    def create_socket(self):
-        """Crea un socket RAW para ICMP."""
+    def create_socket(self, family: int = socket.AF_INET):
+        """
+        Crea un socket RAW para ICMP (AF_INET) o ICMPv6 (AF_INET6).
+
+        ICMPv6 raw sockets get no IP header, the kernel computes the checksum and
+        the ICMP6_FILTER drops in kernel every type but echo reply and unreachable.
+        """
+        sock_type = socket.SOCK_DGRAM if self.dgram else socket.SOCK_RAW
         try:
-            protocol_number = 1 # ICMP
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, protocol_number)
+            if family == socket.AF_INET6:
+                self.socket = socket.socket(socket.AF_INET6, sock_type, socket.IPPROTO_ICMPV6)
+                if not self.dgram:
+                    self.socket.setsockopt(
+                        socket.IPPROTO_ICMPV6, ICMP6_FILTER, icmp6_filter(ICMPV6_ECHO_REPLY, ICMPV6_DEST_UNREACHABLE)
+                    )
+            else:
+                protocol_number = 1 # ICMP
+                self.socket = socket.socket(socket.AF_INET, sock_type, protocol_number)
             self.socket.settimeout(self.timeout)
 
         except socket.error as e:
@@ -98,12 +187,101 @@ class SocketRawHandler:
         finally:
             self.socket = None
 
+    def receive_echo_replies(self, expected_host: str, identifier: int, sent_at: dict[int, float],
+                             replies: dict[int, float], until: float) -> bool:
+        """
+        Collect the echo replies of a pipelined ping until all the sent sequences
+        are answered or the given monotonic time.
+
+        Args:
+            expected_host (str): Pinged IP (IPv4 or IPv6, same family as the socket).
+            identifier (int): Echo identifier.
+            sent_at (dict[int, float]): seq: monotonic send time.
+            replies (dict[int, float]): seq: RTT in ms, filled with the replies.
+            until (float): Monotonic time to stop waiting.
+        Returns:
+            bool: True if a destination unreachable for this ping was received.
+        """
+        if not self.socket:
+            self.logger.error("Socket is not initialized")
+            return False
+
+        if self.socket.family == socket.AF_INET6:
+            expected_host = ipaddress.IPv6Address(expected_host).compressed
+            echo_reply, unreachable = ICMPV6_ECHO_REPLY, ICMPV6_DEST_UNREACHABLE
+        else:
+            echo_reply, unreachable = ICMP_ECHO_REPLY, ICMP_DEST_UNREACHABLE
+        if self.dgram:
+            # The kernel replaced the identifier by the socket local port
+            identifier = self.socket.getsockname()[1]
+
+        while len(replies) < len(sent_at):
+            remaining = until - monotonic()
+            if remaining <= 0:
+                return False
+            self.socket.settimeout(remaining)
+            try:
+                buffer, from_ip = self.socket.recvfrom(self.buffer_size)
+            except socket.timeout:
+                return False
+            received = monotonic()
+
+            icmp, inner_dst, inner_id = self._parse_icmp(buffer)
+            if icmp is None:
+                continue
+            icmp_type = icmp[0]
+            icmp_id, icmp_seq = int.from_bytes(icmp[4:6], "big"), int.from_bytes(icmp[6:8], "big")
+
+            if icmp_type == unreachable:
+                # Original datagram: IP header + first bytes of our echo request
+                if inner_dst == expected_host and inner_id == identifier:
+                    return True
+                continue
+
+            # Link local sources come with the scope (fe80::1%eth0)
+            source = from_ip[0].split("%", 1)[0]
+            if icmp_type != echo_reply or source != expected_host or icmp_id != identifier:
+                continue
+            if icmp_seq in sent_at and icmp_seq not in replies:
+                replies[icmp_seq] = round((received - sent_at[icmp_seq]) * 1000, 3)
+
+        return False
+
+    def _parse_icmp(self, buffer: bytes) -> tuple[bytes | None, str | None, int | None]:
+        """
+        Split a received packet.
+
+        Returns:
+            tuple: ICMP header (8 bytes), and for errors the destination and echo
+                identifier of the original datagram.
+        """
+        if self.dgram:
+            # Ping sockets: ICMP header only, errors are not delivered as packets
+            icmp = buffer[:8]
+        elif self.socket.family == socket.AF_INET6:
+            # No IPv6 header on ICMPv6 raw sockets, original datagram IPv6 header is 40 bytes
+            icmp = buffer[:8]
+            inner = buffer[8:]
+            if len(inner) >= 46:
+                return icmp, socket.inet_ntop(socket.AF_INET6, inner[24:40]), int.from_bytes(inner[44:46], "big")
+        else:
+            if len(buffer) < 20:
+                return None, None, None
+            ihl = (buffer[0] & 0x0F) * 4
+            icmp = buffer[ihl:ihl + 8]
+            inner = buffer[ihl + 8:]
+            inner_ihl = (inner[0] & 0x0F) * 4 if inner else 0
+            if len(inner) >= inner_ihl + 6 >= 26:
+                return icmp, socket.inet_ntoa(inner[16:20]), int.from_bytes(inner[inner_ihl + 4:inner_ihl + 6], "big")
+
+        if len(icmp) < 8:
+            return None, None, None
+
+        return icmp, None, None
+
     def resolve_host(self, host: str) -> str:
-        """Resuelve un dominio a una dirección IP."""
-        try:
-            return socket.gethostbyname(host)
-        except socket.gaierror as e:
-            raise RuntimeError(f"Failed to resolve host {host}: {e}")
+        """Resuelve un dominio a una dirección IP (cache compartida)."""
+        return get_forward_resolver(self.ctx).resolve(host)
 
     def close_socket(self):
         """Cierra el socket."""
@@ -0,0 +1,149 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - TCP Sweep
+@description: Parallel TCP connect checks. Non-blocking sockets are connected at once
+    and the results collected with selectors (epoll on Linux), with a global limit of
+    connects in flight and a per target limit so a host never sees a burst.
+
+"""
+# Std
+from collections import deque
+import errno
+import ipaddress
+import os
+import selectors
+import socket
+from time import monotonic
+
+
+class TcpSweeper:
+    """
+    Check many ip:port pairs concurrently.
+    """
+
+    def __init__(self, max_inflight: int = 256, per_target: int = 8):
+        """
+        Args:
+            max_inflight (int): Max connects in progress.
+            per_target (int): Max connects in progress to the same IP.
+        """
+        self.max_inflight = max(1, max_inflight)
+        self.per_target = max(1, per_target)
+
+    def check(self, targets: list[tuple[str, int, float]]) -> dict[tuple[str, int], dict]:
+        """
+        Connect to each target.
+
+        Args:
+            targets (list[tuple[str, int, float]]): (ip, port, timeout).
+        Returns:
+            dict[tuple[str, int], dict]: (ip, port): {"online", "latency", "error"}, latency
+                is the connect time in ms (time until failure for offline ports).
+        """
+        results = {}
+        # Pending targets per IP, IPs served round robin
+        queues: dict[str, deque] = {}
+        for ip, port, timeout in targets:
+            queues.setdefault(ip, deque()).append((port, timeout))
+        order = deque(queues)
+        inflight_by_ip = dict.fromkeys(queues, 0)
+        inflight = 0
+
+        selector = selectors.DefaultSelector()
+        try:
+            while order or inflight:
+                # Start new connects within the limits
+                skipped = 0
+                while order and inflight < self.max_inflight and skipped < len(order):
+                    ip = order[0]
+                    order.rotate(-1)
+                    if inflight_by_ip[ip] >= self.per_target:
+                        skipped += 1
+                        continue
+                    skipped = 0
+                    port, timeout = queues[ip].popleft()
+                    if not queues[ip]:
+                        order.remove(ip)
+                    if self._start(selector, ip, port, timeout, results):
+                        inflight += 1
+                        inflight_by_ip[ip] += 1
+
+                if not inflight:
+                    continue
+
+                now = monotonic()
+                next_deadline = min(key.data[3] for key in selector.get_map().values())
+                for key, _ in selector.select(max(0.0, next_deadline - now)):
+                    self._finish(selector, key, results)
+                    inflight -= 1
+                    inflight_by_ip[key.data[0]] -= 1
+
+                now = monotonic()
+                for key in list(selector.get_map().values()):
+                    if key.data[3] <= now:
+                        ip, port = key.data[0], key.data[1]
+                        self._close(selector, key.fileobj)
+                        results[(ip, port)] = self._offline(
+                            key.data[2], f"Connection to {ip}:{port} timed out"
+                        )
+                        inflight -= 1
+                        inflight_by_ip[ip] -= 1
+        finally:
+            for key in list(selector.get_map().values()):
+                self._close(selector, key.fileobj)
+            selector.close()
+
+        return results
+
+    def _start(self, selector: selectors.BaseSelector, ip: str, port: int,
+               timeout: float, results: dict) -> bool:
+        """ Start a non-blocking connect, True if in progress """
+        try:
+            family = socket.AF_INET6 if ipaddress.ip_address(ip).version == 6 else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+        except (ValueError, OSError) as e:
+            results[(ip, port)] = {"online": 0, "latency": 0.0, "error": f"Failed to connect to {ip}:{port}: {e}"}
+            return False
+
+        sock.setblocking(False)
+        start = monotonic()
+        err = sock.connect_ex((ip, port))
+        if err == 0:
+            results[(ip, port)] = {"online": 1, "latency": self._ms(start), "error": None}
+            sock.close()
+            return False
+        if err not in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            results[(ip, port)] = self._offline(start, f"Failed to connect to {ip}:{port}: {os.strerror(err)}")
+            sock.close()
+            return False
+
+        selector.register(sock, selectors.EVENT_WRITE, (ip, port, start, start + timeout))
+
+        return True
+
+    def _finish(self, selector: selectors.BaseSelector, key: selectors.SelectorKey, results: dict) -> None:
+        """ Connect completed (or failed) """
+        ip, port, start, _ = key.data
+        err = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err == 0:
+            results[(ip, port)] = {"online": 1, "latency": self._ms(start), "error": None}
+        else:
+            results[(ip, port)] = self._offline(start, f"Failed to connect to {ip}:{port}: {os.strerror(err)}")
+        self._close(selector, key.fileobj)
+
+    @staticmethod
+    def _close(selector: selectors.BaseSelector, sock: socket.socket) -> None:
+        try:
+            selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    @classmethod
+    def _offline(cls, start: float, error: str) -> dict:
+        return {"online": 0, "latency": cls._ms(start), "error": error}
+
+    @staticmethod
+    def _ms(start: float) -> float:
+        return round((monotonic() - start) * 1000, 3)
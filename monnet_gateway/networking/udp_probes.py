@@ -0,0 +1,110 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - UDP Probes
+@description: Protocol payloads for the UDP port checks. UDP services only answer
+    requests of their own protocol, the probe is selected by service name or port.
+    Services that never answer (syslog) are marked silent, no reply and no ICMP
+    port unreachable is reported offline as open|filtered.
+
+"""
+# Std
+import os
+import struct
+from typing import Callable
+
+
+class UdpProbe:
+    """
+    UDP probe payload.
+    """
+
+    def __init__(self, name: str, payload: bytes | Callable[[], bytes], silent: bool = False):
+        """
+        Args:
+            name (str): Probe name.
+            payload (bytes | Callable): Payload or payload builder (per request fields like ids).
+            silent (bool): The service does not reply.
+        """
+        self.name = name
+        self.payload = payload
+        self.silent = silent
+
+    def build(self) -> bytes:
+        """ Payload to send """
+        return self.payload() if callable(self.payload) else self.payload
+
+
+def dns_query() -> bytes:
+    """ Standard query, recursion desired, for the root NS records """
+    header = struct.pack("!HHHHHH", int.from_bytes(os.urandom(2), "big"), 0x0100, 1, 0, 0, 0)
+    # Root name, type NS, class IN
+    return header + b"\x00" + struct.pack("!HH", 2, 1)
+
+
+def snmp_get_sysdescr(community: bytes = b"public") -> bytes:
+    """ SNMPv2c GetRequest sysDescr.0 """
+    varbind_list = b"\x30\x0e\x30\x0c\x06\x08\x2b\x06\x01\x02\x01\x01\x01\x00\x05\x00"
+    # request-id, error-status 0, error-index 0
+    pdu = b"\x02\x04" + os.urandom(4) + b"\x02\x01\x00\x02\x01\x00" + varbind_list
+    pdu = b"\xa0" + bytes([len(pdu)]) + pdu
+    message = b"\x02\x01\x01" + b"\x04" + bytes([len(community)]) + community + pdu
+
+    return b"\x30" + bytes([len(message)]) + message
+
+
+# NTPv3 client request (LI 0, VN 3, mode 3)
+NTP_REQUEST = b"\x1b" + b"\x00" * 47
+# NetBIOS node status request for the wildcard name
+NETBIOS_NBSTAT = (
+    b"\x80\xf0\x00\x10\x00\x01\x00\x00\x00\x00\x00\x00"
+    b"\x20CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01"
+)
+
+DEFAULT_PROBE = UdpProbe("generic", b"ping")
+
+_probes_by_port: dict[int, UdpProbe] = {}
+_probes_by_name: dict[str, UdpProbe] = {}
+
+
+def register_probe(probe: UdpProbe, ports: list[int], names: list[str] | None = None) -> None:
+    """
+    Register a probe for ports and service names.
+
+    Args:
+        probe (UdpProbe): Probe.
+        ports (list[int]): Ports using the probe.
+        names (list[str]): Service names (case insensitive), the probe name is always added.
+    """
+    for port in ports:
+        _probes_by_port[port] = probe
+    for name in [probe.name] + (names or []):
+        _probes_by_name[name.lower()] = probe
+
+
+def get_probe(port: int, service: str | None = None) -> UdpProbe:
+    """
+    Probe for a port, the service name takes precedence over the port.
+
+    Args:
+        port (int): Port number.
+        service (str): Service name.
+    Returns:
+        UdpProbe: Registered probe or the generic one.
+    """
+    if service:
+        probe = _probes_by_name.get(service.strip().lower())
+        if probe is not None:
+            return probe
+
+    return _probes_by_port.get(port, DEFAULT_PROBE)
+
+
+register_probe(UdpProbe("echo", b"monnet"), [7])
+register_probe(UdpProbe("dns", dns_query), [53], ["domain"])
+register_probe(UdpProbe("mdns", dns_query), [5353])
+register_probe(UdpProbe("ntp", NTP_REQUEST), [123])
+register_probe(UdpProbe("netbios-ns", NETBIOS_NBSTAT), [137])
+register_probe(UdpProbe("snmp", snmp_get_sysdescr), [161])
+# Empty datagram, nothing written to the remote log
+register_probe(UdpProbe("syslog", b"", silent=True), [514])
@@ -16,6 +16,10 @@ from monnet_gateway.services.network_scanner import NetworkScanner
 from monnet_gateway.services.hosts_service import HostService
 from monnet_gateway.services.ports_service import PortsService
 from monnet_gateway.networking.gw_net_utils import get_mac
+from monnet_gateway.networking.http_checker import days_left, get_http_checker
+from monnet_shared.event_type import EventType
+from monnet_shared.log_type import LogType
+from monnet_shared.stat_type import StatType
 
 class HostsScanner:
     """
@@ -44,6 +48,10 @@ class HostsScanner:
             return []
 
         ip_status = []
+        # TCP port checks run together after the loop: (scan_result, (host, port, timeout))
+        tcp_checks = []
+        # Host checks send several echoes for loss/jitter stats
+        ping_count = int(self.ctx.get_config().get("ping_count", 3))
 
         now_utc = datetime.now(timezone.utc)
         f_now_utc = now_utc.strftime('%Y-%m-%d %H:%M:%S')
@@ -95,9 +103,24 @@ class HostsScanner:
                 if "hostname" in host:
                     scan_result["hostname"] = host["hostname"]
 
-                ping_result = self.network_scanner.ping(ip_or_host, timeout)
+                ping_result = self.network_scanner.ping(ip_or_host, timeout, count=ping_count)
                 scan_result.update(ping_result)
 
+                # Dual stack, hosts.ip holds the IPv4 address and misc the IPv6 one
+                ipv6 = host.get("misc", {}).get("ipv6") if isinstance(host.get("misc"), dict) else None
+                if ipv6:
+                    ping6_result = self.network_scanner.ping(ipv6, timeout, count=ping_count)
+                    scan_result["ipv6_status"] = {
+                        "ip": ipv6,
+                        "online": ping6_result.get("online", 0),
+                        "latency": ping6_result.get("latency"),
+                        "error": ping6_result.get("error"),
+                    }
+                    if not scan_result.get("online") and ping6_result.get("online"):
+                        scan_result["online"] = 1
+                        scan_result["latency"] = ping6_result.get("latency")
+                        scan_result["ping_stats"] = ping6_result.get("ping_stats")
+
                 if "retries" in host:
                     scan_result["retries"] = host["retries"] + 1
                 else:
@@ -141,9 +164,11 @@ class HostsScanner:
                         continue
 
                     if protocol == 1:                   # TCP Port
-                        port_result = self.network_scanner.check_tcp_port(ip_or_host, pnumber, timeout)
+                        tcp_checks.append((scan_result, (ip_or_host, pnumber, timeout)))
+                        port_result = {}
                     elif protocol == 2:                 # UDP Port
-                        port_result = self.network_scanner.check_udp_port(ip_or_host, pnumber, timeout)
+                        service = host_port.get("custom_service") or host_port.get("service")
+                        port_result = self.network_scanner.check_udp_port(ip_or_host, pnumber, timeout, service)
                     elif protocol == 3:                 # HTTPS
                         port_result = self.network_scanner.check_https(ip_or_host, pnumber, timeout, verify_ssl=True)
                     elif protocol == 4:                 # HTTPS Self-Signed
@@ -161,12 +186,20 @@ class HostsScanner:
                         scan_result["retries"] = 0
 
                     ip_status.append(scan_result)
-                    sleep(0.1)
+                    if protocol != 1:
+                        sleep(0.1)
             else:
                 self.logger.warning(f"Unknown check method for host {host}, skipping.")
                 continue
 
-            sleep(0.1)
+            # Ports hosts are paced per port, TCP ones by the sweep limits
+            if check_method == 1:
+                sleep(0.1)
+
+        if tcp_checks:
+            port_results = self.network_scanner.check_tcp_ports([target for _, target in tcp_checks])
+            for (scan_result, _), port_result in zip(tcp_checks, port_results):
+                scan_result.update(port_result)
 
         return ip_status
 
@@ -183,9 +216,54 @@ class HostsScanner:
                     if new_host_status["online"] == 1:
                         host_status["online"] = 1
                         host_status["latency"] = new_host_status.get("latency")
+                        if "ping_stats" in new_host_status:
+                            host_status["ping_stats"] = new_host_status["ping_stats"]
                         break
                     sleep(0.2)
 
+    def _cert_checks(self, host_id: int, host_status: dict, host_update: dict) -> None:
+        """
+        Store the peer certificate captured by the HTTPS checks and create the
+        certificate error / expiry soon events, once per error or certificate.
+        """
+        cert = host_status.get("cert")
+        cert_error = host_status.get("cert_error")
+        if not cert and not cert_error:
+            return
+
+        key = (host_status.get("host"), host_status.get("port"))
+        certs = get_http_checker(self.ctx).certs
+
+        if cert_error:
+            if certs.mark_error(key, cert_error):
+                self.hosts_service.create_event(
+                    host_id,
+                    f"Certificate error on {key[0]}:{key[1]}: {cert_error}",
+                    LogType.EVENT_WARN,
+                    EventType.CERT_ERROR
+                )
+            return
+
+        # Verified handshake
+        if host_status.get("protocol") == 3:
+            certs.clear_error(key)
+
+        host_update["misc"].setdefault("certs", {})[str(key[1])] = cert
+
+        warn_days = int(self.ctx.get_config().get("cert_expiry_warn_days", 14))
+        remaining = days_left(cert)
+        if remaining <= warn_days and certs.mark_notified(key, "expiry"):
+            if remaining < 0:
+                when = f"expired {-remaining} days ago"
+            else:
+                when = f"expires in {remaining} days"
+            self.hosts_service.create_event(
+                host_id,
+                f"Certificate of {key[0]}:{key[1]} {when} ({cert.get('not_after')} UTC)",
+                LogType.EVENT_WARN,
+                EventType.CERT_EXPIRY_SOON
+            )
+
     def pre_update_hosts(self, hosts_status: list[dict]):
         """
         Prepare data to update the status of hosts and ports.
@@ -193,6 +271,8 @@ class HostsScanner:
         host_updates = defaultdict(lambda: {"online": 0, "misc": {"latency": 0}})
         port_updates = []
         stats_updates = {}
+        # Multi echo ping stats, several rows per host
+        ping_stats_rows = []
 
         now_utc = datetime.now(timezone.utc)
         f_now_utc = now_utc.strftime('%Y-%m-%d %H:%M:%S')
@@ -222,8 +302,13 @@ class HostsScanner:
                     "latency": port_latency,
                     "last_check": host_status.get("last_check")
                 })
+                self._cert_checks(host_id, host_status, host_updates[host_id])
             else:
                 host_updates[host_id]["online"] = host_status.get("online", 0)
+                ipv6_status = host_status.get("ipv6_status")
+                if ipv6_status:
+                    host_updates[host_id]["misc"]["ipv6_online"] = ipv6_status.get("online", 0)
+                    host_updates[host_id]["misc"]["ipv6_latency"] = ipv6_status.get("latency")
 
 
             host_updates[host_id]["misc"]["latency"] = host_status.get("latency")
@@ -237,6 +322,9 @@ class HostsScanner:
                     mac_actual = host_status.get("mac")
                     if ip:
                         mac_result = get_mac(ip)
+                        if not mac_result and host_status.get("ipv6_status"):
+                            # Neighbour discovery table, filled by the ICMPv6 ping
+                            mac_result = get_mac(host_status["ipv6_status"]["ip"])
                         if mac_result and isinstance(mac_result, str):
                             if mac_result != mac_actual:
                                 host_updates[host_id]["mac"] = mac_result
@@ -246,11 +334,26 @@ class HostsScanner:
 
             # Stats update
             stats_updates[host_id] = {
-                "type": 1,
+                "type": StatType.PING,
                 "host_id": host_id,
                 "value": host_status.get("latency"),
                 "date": host_status.get("last_check")
             }
+            ping_stats = host_status.get("ping_stats")
+            if ping_stats and "port" not in host_status:
+                for stat_type, field in (
+                    (StatType.PING_MIN, "min"),
+                    (StatType.PING_MAX, "max"),
+                    (StatType.PING_MDEV, "mdev"),
+                    (StatType.PING_LOSS, "loss"),
+                ):
+                    if ping_stats.get(field) is not None:
+                        ping_stats_rows.append({
+                            "type": stat_type,
+                            "host_id": host_id,
+                            "value": ping_stats[field],
+                            "date": host_status.get("last_check")
+                        })
 
 
         for host_id, set_host in host_updates.items():
@@ -262,5 +365,5 @@ class HostsScanner:
         if stats_updates:
             # self.logger.debug(f"stats_updates: {stats_updates}");
             # Convert stats_updates to a list of dictionaries
-            stats_data = list(stats_updates.values())
+            stats_data = list(stats_updates.values()) + ping_stats_rows
             self.stats_model.update_stats_bulk(stats_data)
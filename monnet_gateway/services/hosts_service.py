@@ -14,7 +14,10 @@ from monnet_shared.log_type import LogType
 from monnet_shared.event_type import EventType
 from monnet_gateway.database.dbmanager import DBManager
 from monnet_gateway.database.hosts_model import HostsModel
-from monnet_gateway.networking.gw_net_utils import get_hostname, get_mac, get_org_from_mac
+from monnet_gateway.networking.ip_index import KnownIPIndex
+from monnet_gateway.networking.network_index import NetworkIndex
+from monnet_gateway.networking.reverse_resolver import get_reverse_resolver
+from monnet_gateway.networking.gw_net_utils import get_mac, get_org_from_mac
 from monnet_gateway.services.event_host import EventHostService
 from monnet_gateway.services.networks_service import NetworksService
 
@@ -46,6 +49,19 @@ class HostService:
             self.logger.error(f"Failed to reconnect to the database: {e}")
             raise
 
+    def load_known_ip_index(self) -> KnownIPIndex:
+        """
+        Build the known IPs index from the hosts table and share it in the context.
+
+        Returns:
+            KnownIPIndex: The new index.
+        """
+        self._ensure_db_connection()
+        known_ips = KnownIPIndex(self.host_model.get_all_ips())
+        self.ctx.set_var("known_ip_index", known_ips)
+
+        return known_ips
+
     def get_all(self) -> list[dict]:
         """Retrieve all hosts with deserialize misc' field."""
         self._ensure_db_connection()
@@ -90,28 +106,42 @@ class HostService:
 
         return host
 
-    def add_host(self, host: dict, commit: bool = True) -> int:
+    def add_host(self, host: dict, commit: bool = True, network_index: NetworkIndex | None = None) -> int:
         """
         Add a new host after validating the data.
 
         Args:
             host (dict): Host data to insert.
             commit (bool): Whether to commit the transaction. Default is True.
+            network_index (NetworkIndex): Index to assign the network of hosts without one,
+                built from the networks table if not given (pass it when adding many).
 
         Returns:
             int: ID of the inserted host.
         """
         self._ensure_db_connection()
 
-        required_fields = ["ip", "network"]
-        for field in required_fields:
-            if field not in host:
-                raise ValueError(f"Missing required field: {field}")
+        if "ip" not in host:
+            raise ValueError("Missing required field: ip")
 
         try:
-            ipaddress.IPv4Address(host["ip"])
+            # IPv6 hosts need hosts.ip widened to varchar(45), see README
+            host["ip"] = ipaddress.ip_address(host["ip"]).compressed
         except ValueError:
             raise ValueError(f"Invalid IP address: {host['ip']}")
+
+        # The IPv6 address of dual stack hosts goes in misc
+        ipv6 = host.get("misc", {}).get("ipv6") if isinstance(host.get("misc"), dict) else None
+        if ipv6:
+            try:
+                host["misc"]["ipv6"] = ipaddress.IPv6Address(ipv6).compressed
+            except ValueError:
+                raise ValueError(f"Invalid IPv6 address: {ipv6}")
+
+        if not host.get("network"):
+            if network_index is None:
+                network_index = NetworksService(self.ctx).build_index()
+            host["network"] = network_index.network_id(host["ip"])
         if "misc" in host and isinstance(host["misc"], dict):
             self._serialize_misc(host)
         self.host_model.insert_host(host)
@@ -120,6 +150,10 @@ class HostService:
 
         last_id = self.host_model.last_id()
 
+        known_ips = self.ctx.get_var("known_ip_index")
+        if known_ips is not None:
+            known_ips.add(host["ip"])
+
         self.create_event(
             last_id,
             f'Found new host {host.get("ip")} on network {host.get("network")}',
@@ -129,28 +163,41 @@ class HostService:
 
         return last_id
 
-    def add_hosts(self, hosts: list[dict]) -> list[int]:
+    def add_hosts(self, hosts: list[dict], network_index: NetworkIndex | None = None) -> list[int]:
         """
         Add multiple hosts after validating the data.
 
         Args:
             hosts (list[dict]): List of host data to insert.
+            network_index (NetworkIndex): Index of the current pass, built once for the
+                batch if not given and a host has no network.
 
         Returns:
             list[int]: List of IDs of the inserted hosts.
         """
         self._ensure_db_connection()
         inserted_ids = []
+        known_ips = self.ctx.get_var("known_ip_index")
+        # IPs this batch adds to the known IPs index, removed again on rollback
+        new_ips = []
 
         try:
             for host in hosts:
+                # Current networks, read once per batch
+                if network_index is None and not host.get("network"):
+                    network_index = NetworksService(self.ctx).build_index()
+                if known_ips is not None and host.get("ip") not in known_ips:
+                    new_ips.append(host.get("ip"))
                 # Reutilizar la lógica de add_host sin realizar commit
-                inserted_id = self.add_host(host, commit=False)
+                inserted_id = self.add_host(host, commit=False, network_index=network_index)
                 inserted_ids.append(inserted_id)
             self.host_model.commit()
         except Exception as e:
             self.logger.error(f"Error inserting hosts: {e}")
             self.host_model.rollback()
+            if known_ips is not None:
+                for ip in new_ips:
+                    known_ips.discard(ip)
             raise ValueError(f"Error inserting hosts: {e}")
 
         return inserted_ids
@@ -347,9 +394,10 @@ class HostService:
             return
 
         if not existing_host.get("hostname"):
-            hostname = get_hostname(ip)
+            # Non blocking, if not cached yet it is resolved in background for a next update
+            hostname = get_reverse_resolver(self.ctx).get(ip)
             if hostname is not None and isinstance(hostname, str):
-                set_data["hostname"] = get_hostname(ip)
+                set_data["hostname"] = hostname
 
         if not existing_host["mac"]:
             mac = get_mac(ip)
@@ -443,8 +491,12 @@ class HostService:
             self.logger.warning("No host IDs provided for deletion.")
             return 0
         self._ensure_db_connection()
+        known_ips = self.ctx.get_var("known_ip_index")
+        deleted_ips = self.host_model.get_ips_by_ids(host_ids) if known_ips is not None else []
         deleted_count = self.host_model.delete_hosts_by_ids(host_ids)
         self.host_model.commit()
+        for ip in deleted_ips:
+            known_ips.discard(ip)
         self.logger.info(f"Purged {deleted_count} hosts with IDs: {host_ids}")
         return deleted_count
 
@@ -463,11 +515,8 @@ class HostService:
             raise ValueError("Days must be a positive integer.")
         self._ensure_db_connection()
 
-        # Instantiate NetworksService
-        networks_service = NetworksService(self.ctx)
-
-        # Get networks with `clear=1`
-        networks_to_clear = networks_service.get_networks_for_clear()
+        # Get networks with `clear=1`, from the DB on every run
+        networks_to_clear = NetworksService(self.ctx).get_networks_for_clear()
 
         if not networks_to_clear:
             self.logger.debug("No networks with `clean=1` found.")
@@ -5,22 +5,27 @@ Monnet Gateway - Network Scanner
 
 """
 # Std
+import http.client
 import ipaddress
-import random
+import math
+import socket
+import ssl
 import struct
-from time import time
-
-# Third party
-import requests
-from urllib3.exceptions import InsecureRequestWarning
-import urllib3
+from time import monotonic, time
+from typing import Iterator
 
 # Local
-from monnet_gateway.database.hosts_model import HostsModel
 from monnet_gateway.database.networks_model import NetworksModel
-from monnet_gateway.networking.socket_raw import SocketRawHandler
-from monnet_gateway.networking.socket import SocketHandler
-from monnet_gateway.networking.icmp_packet import ICMPPacket
+from monnet_gateway.networking.forward_resolver import get_forward_resolver
+from monnet_gateway.networking.gw_net_utils import get_neighbours
+from monnet_gateway.networking.http_checker import get_http_checker
+from monnet_gateway.networking.ip_index import KnownIPIndex
+from monnet_gateway.networking.ip_sweep import IPSweep
+from monnet_gateway.networking.socket_raw import ICMP_BACKEND_DGRAM, SocketRawHandler, get_icmp_backend
+from monnet_gateway.networking.socket import SocketHandler, SocketTimeoutError
+from monnet_gateway.networking.tcp_sweep import TcpSweeper
+from monnet_gateway.networking.udp_probes import get_probe
+from monnet_gateway.networking.icmp_packet import ICMPPacket, next_identifier
 from monnet_shared.app_context import AppContext
 
 class NetworkScanner:
@@ -28,32 +33,85 @@ class NetworkScanner:
         self.ctx = ctx
         self.logger = self.ctx.get_logger()
 
-    def get_discovery_ips(self, networks_model: NetworksModel, host_model: HostsModel) -> list[str]:
+    def get_discovery_ips(self, sweep: IPSweep, known_ips: KnownIPIndex,
+                          deadline: float | None = None) -> Iterator[str]:
+        """
+        Get the IPs to be scanned, the pending addresses of the sweep not already known
+        :return: IPs generator
+        """
+        for ip in sweep.addresses(deadline):
+            if ip not in known_ips:
+                yield ip
+
+    def build_ip_sweep(self, networks_model: NetworksModel, cursor: dict | None = None) -> IPSweep | None:
+        """
+        Build the address sweep over all the networks enabled for scan. IPv6 networks
+        larger than discovery_ipv6_min_prefix are left out, see get_neighbour_ips.
+
+        Args:
+            networks_model (NetworksModel): Networks model.
+            cursor (dict): Cursor of a previous sweep to resume, a new random sweep is
+                started if missing, finished or the networks have changed.
+        Returns:
+            IPSweep | None: None if there is nothing to scan.
         """
-        Get the list of IPs to be scanned
-        :return: list of IPs
+        scan_networks = [network for network in self.get_scan_networks(networks_model) if self._sweepable(network)]
+
+        if not scan_networks:
+            self.logger.notice("No networks to sweep")
+            return None
+
+        sweep = IPSweep(scan_networks, cursor)
+        if sweep.completed:
+            sweep.restart()
+
+        return sweep
+
+    def get_neighbour_ips(self, networks_model: NetworksModel) -> list[str]:
         """
-        ip_list = self.build_ip_list(networks_model)
-        logger = self.ctx.get_logger()
+        Candidates of the IPv6 networks too large to sweep (a /64): the addresses of the
+        neighbour discovery table inside them.
 
-        if not ip_list:
-            logger.error("No IPs to scan")
+        Args:
+            networks_model (NetworksModel): Networks model.
+        Returns:
+            list[str]: IPv6 addresses.
+        """
+        large_networks = [
+            network for network in self.get_scan_networks(networks_model) if not self._sweepable(network)
+        ]
+        if not large_networks:
             return []
 
-        all_known_hosts = host_model.get_all() or []
+        neighbour_ips = []
+        for ip in get_neighbours(6):
+            try:
+                address = ipaddress.IPv6Address(ip)
+            except ValueError:
+                continue
+            # Link local addresses are useless without the interface
+            if address.is_link_local:
+                continue
+            if any(address in network for network in large_networks):
+                neighbour_ips.append(address.compressed)
 
-        host_ips = {host['ip'] for host in all_known_hosts}
-        ip_list = [ip for ip in ip_list if ip not in host_ips]
+        return neighbour_ips
 
-        return ip_list
+    def get_scan_networks(self, networks_model: NetworksModel) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+        """
+        Networks enabled for scan.
 
-    def build_ip_list(self, networks_model: NetworksModel) -> list[str]:
-        ip_list = []
+        Args:
+            networks_model (NetworksModel): Networks model.
+        Returns:
+            list: IPv4Network and IPv6Network.
+        """
+        scan_networks = []
         networks = networks_model.get_all()
 
         if not networks:
             self.logger.notice("No networks found to scan")
-            return ip_list
+            return []
 
         for net in networks:
             if net.get('disable') == 1 or net.get('scan') != 1:
@@ -75,26 +133,37 @@ class NetworkScanner:
             self.logger.debug(f"Pinging networks {net}")
 
             try:
-                network = ipaddress.IPv4Network(network_str, strict=False)
+                scan_networks.append(ipaddress.ip_network(network_str, strict=False))
             except ValueError:
                 self.logger.error("Invalid IP build network for scan")
                 continue
 
-            count = min(network.num_addresses, 256)
-            # network.hosts exclude net dir and broadcast
-            for i, ip in enumerate(network.hosts()):
-                if i >= count:
-                    break
-                ip_list.append(str(ip))
+        if not scan_networks:
+            self.logger.error("No IPs to scan")
 
-        random.shuffle(ip_list)
+        return scan_networks
+
+    def _sweepable(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network) -> bool:
+        """ IPv4 networks and the IPv6 ones small enough to sweep (default /112) """
+        if network.version == 4:
+            return True
 
-        return ip_list
+        return network.prefixlen >= int(self.ctx.get_config().get("discovery_ipv6_min_prefix", 112))
 
-    def ping(self, host: str, timeout: float = 0.2) -> dict:
+    def ping(self, host: str, timeout: float = 0.2, count: int = 1) -> dict:
         """
         Realiza un ping a la IP especificada.
+
+        Args:
+            host (str): Hostname or IP.
+            timeout (float): Seconds to wait for the reply (after the last echo).
+            count (int): Echoes to send. With more than one echo the result also
+                includes ping_stats (min/avg/max/mdev/loss).
         """
+        # IPv6 and ping sockets only on the pipelined path
+        if count > 1 or ":" in host or get_icmp_backend(self.ctx) == ICMP_BACKEND_DGRAM:
+            return self.ping_multi(host, timeout, max(count, 1))
+
         tim_start = time()
         status = {
             'host': host,
@@ -106,19 +175,19 @@ class NetworkScanner:
         try:
             # Crear el socket
             socket_handler = self.create_raw_socket(timeout)
-            status["ip"] = socket_handler.resolve_host(host)
+            ip = status["ip"] = socket_handler.resolve_host(host)
             # Construir y enviar el paquete ICMP
-            icmp_packet = self.send_icmp_packet(socket_handler, host)
+            icmp_packet = self.send_icmp_packet(socket_handler, ip)
 
             # Recibir el paquete
-            buffer, from_ip = socket_handler.receive_packet(host)
+            buffer, from_ip = socket_handler.receive_packet(ip)
             if buffer is None:
                 status['error'] = f"Timeout: No response after {timeout} seconds"
                 status['latency'] = -0.001
                 return status
 
             # Procesar el paquete recibido
-            status = self.process_received_packet(buffer, host, tim_start)
+            status = self.process_received_packet(buffer, ip, tim_start)
             return status
 
         except Exception as e:
@@ -129,11 +198,101 @@ class NetworkScanner:
             socket_handler.close_socket()
 
 
+    def ping_multi(self, host: str, timeout: float = 0.2, count: int = 3, interval: float | None = None) -> dict:
+        """
+        Pipelined ping: count echoes with the same identifier and sequences 1..count,
+        the replies are read while the next echoes are sent.
+
+        Args:
+            host (str): Hostname or IP.
+            timeout (float): Seconds to wait for the replies after the last echo.
+            count (int): Echoes to send.
+            interval (float): Seconds between echoes, default config ping_interval.
+        Returns:
+            dict: Status, latency is the average RTT and ping_stats holds
+                sent, received, loss (%), min, avg, max and mdev (ms).
+        """
+        if interval is None:
+            interval = float(self.ctx.get_config().get("ping_interval", 0.01))
+        status = {
+            'host': host,
+            'online': 0,
+            'latency': None,
+            'error': None,
+        }
+        socket_handler = None
+        sent_at = {}
+        replies = {}
+
+        try:
+            ip = status["ip"] = get_forward_resolver(self.ctx).resolve(host)
+            ipv6 = ipaddress.ip_address(ip).version == 6
+            socket_handler = self.create_raw_socket(timeout, socket.AF_INET6 if ipv6 else socket.AF_INET)
+            identifier = next_identifier()
+            unreachable = False
+            for seq in range(1, count + 1):
+                packet = ICMPPacket(identifier=identifier, sequence=seq, ipv6=ipv6).build_packet()
+                if not socket_handler.send_packet(ip, packet):
+                    raise Exception(f"Failed to send ICMP packet to {ip}")
+                sent_at[seq] = monotonic()
+                until = sent_at[seq] + (interval if seq < count else timeout)
+                unreachable = socket_handler.receive_echo_replies(ip, identifier, sent_at, replies, until)
+                if unreachable:
+                    break
+        except Exception as e:
+            self.logger.error(f"Ping error: {e}")
+            status['error'] = str(e)
+            return status
+        finally:
+            if socket_handler:
+                socket_handler.close_socket()
+
+        status["ping_stats"] = self.summarize_rtts(list(replies.values()), count)
+        if replies:
+            status['online'] = 1
+            status['latency'] = status["ping_stats"]["avg"]
+        else:
+            status['error'] = "Destination Unreachable" if unreachable else \
+                f"Timeout: No response after {timeout} seconds"
+            status['latency'] = -0.001
+
+        return status
+
+    @staticmethod
+    def summarize_rtts(rtts: list[float], sent: int) -> dict:
+        """
+        Ping statistics (ms), mdev as iputils ping: sqrt(mean(rtt^2) - mean(rtt)^2).
+
+        Returns:
+            dict: sent, received, loss (%), min, avg, max, mdev (None without replies).
+        """
+        received = len(rtts)
+        summary = {
+            "sent": sent,
+            "received": received,
+            "loss": round((sent - received) * 100 / sent, 1) if sent else 0.0,
+            "min": None,
+            "avg": None,
+            "max": None,
+            "mdev": None,
+        }
+        if received:
+            avg = sum(rtts) / received
+            variance = max(sum(rtt * rtt for rtt in rtts) / received - avg * avg, 0.0)
+            summary.update({
+                "min": min(rtts),
+                "avg": round(avg, 3),
+                "max": max(rtts),
+                "mdev": round(math.sqrt(variance), 3),
+            })
+
+        return summary
+
     def check_tcp_port(self, host: str, port: int, timeout: float = 1.0) -> dict:
         """Comprueba si un puerto TCP está abierto utilizando SocketHandler."""
         tim_start = time()
         status = {"host": host, "port": port, "online": 0, "protocol": 1, "error": None}
-        socket_handler = SocketHandler(timeout)
+        socket_handler = SocketHandler(timeout, get_forward_resolver(self.ctx))
         try:
             if not socket_handler.create_tcp_socket():
                 raise Exception("Failed to create TCP socket")
@@ -157,22 +316,85 @@ class NetworkScanner:
 
         return status
 
-    def check_udp_port(self, host: str, port: int, timeout: float = 1.0) -> dict:
-        """Comprueba si un puerto UDP está abierto utilizando SocketHandler."""
+    def check_tcp_ports(self, targets: list[tuple[str, int, float]]) -> list[dict]:
+        """
+        Check many TCP ports concurrently (non-blocking connects).
+
+        Args:
+            targets (list[tuple[str, int, float]]): (host, port, timeout).
+        Returns:
+            list[dict]: Status per target, in the same order and format as check_tcp_port.
+        """
+        config = self.ctx.get_config()
+        resolver = get_forward_resolver(self.ctx)
+        sweeper = TcpSweeper(
+            max_inflight=int(config.get("tcp_sweep_max_inflight", 256)),
+            per_target=int(config.get("tcp_sweep_per_target", 8)),
+        )
+
+        statuses = []
+        pending = []
+        for host, port, timeout in targets:
+            status = {"host": host, "port": port, "online": 0, "protocol": 1, "error": None, "latency": 0.0}
+            try:
+                ip = resolver.resolve(host)
+            except RuntimeError as e:
+                self.logger.debug(str(e))
+                status["error"] = str(e)
+                ip = None
+            statuses.append((status, ip))
+            if ip is not None:
+                pending.append((ip, port, timeout))
+
+        results = sweeper.check(pending) if pending else {}
+        for status, ip in statuses:
+            if ip is not None and (ip, status["port"]) in results:
+                status.update(results[(ip, status["port"])])
+
+        return [status for status, _ in statuses]
+
+    def check_udp_port(self, host: str, port: int, timeout: float = 1.0, service: str | None = None) -> dict:
+        """
+        Check a UDP port with the protocol probe of the service (DNS, NTP, SNMP...).
+
+        The socket is connected so an ICMP port unreachable is a fast "closed". Any
+        reply is online, no reply is offline with state open|filtered: a powered off
+        or firewalled host does not answer either.
+
+        Args:
+            host (str): Hostname or IP.
+            port (int): Port.
+            timeout (float): Seconds to wait for the reply.
+            service (str): Service name, selects the probe instead of the port.
+        Returns:
+            dict: Port status.
+        """
         tim_start = time()
-        status = {"host": host, "port": port, "online": 0, "protocol": 2, "error": None}
-        socket_handler = SocketHandler(timeout)
+        probe = get_probe(port, service)
+        status = {"host": host, "port": port, "online": 0, "protocol": 2, "error": None, "probe": probe.name}
+        socket_handler = SocketHandler(timeout, get_forward_resolver(self.ctx))
         try:
-            if not socket_handler.create_udp_socket():
+            if not socket_handler.create_udp_socket(socket.AF_INET6 if ":" in host else socket.AF_INET):
                 raise Exception("Failed to create UDP socket")
-            if not socket_handler.send(b"ping", (host, port)):
+            socket_handler.udp_connect(host, port)
+            if not socket_handler.send(probe.build()):
                 status["error"] = f"Failed to send data to {host}:{port}"
             else:
-                data, address = socket_handler.receive()
-                if data:
+                data, _ = socket_handler.receive()
+                if data is not None:
                     status["online"] = 1
+                    status["state"] = "open"
                 else:
                     status["error"] = "No response received"
+        except ConnectionRefusedError:
+            status["state"] = "closed"
+            status["error"] = f"Port {port}/udp closed (ICMP port unreachable)"
+        except SocketTimeoutError:
+            status["state"] = "open|filtered"
+            if probe.silent:
+                status["error"] = "No response (service does not reply), open|filtered"
+            else:
+                status["error"] = "No response received"
         except ConnectionError as e:
             self.logger.debug(str(e))
             status["error"] = str(e)
@@ -191,49 +413,49 @@ class NetworkScanner:
 
     def check_http(self, host: str, port: int = 80, timeout: float = 5.0) -> dict:
         """Comprueba si un servidor HTTP responde correctamente."""
-        tim_start = time()
         status = {"host": host, "port": port, "online": 0, "protocol": 5, "error": None}
-        url = f"http://{host}:{port}"
-        try:
-            response = requests.get(url, timeout=timeout)
-            if response.status_code == 200:
-                status["online"] = 1
-            else:
-                status["error"] = f"HTTP error: {response.status_code}"
-        except requests.RequestException as e:
-            status["error"] = str(e)
-        except Exception as e:
-            self.logger.error(f"Unexpected error while checking HTTP for {url}: {e}")
-            status["error"] = str(e)
 
-        status['latency'] = self.calculate_latency(tim_start)
-
-        return status
+        return self._check_http_service(status, host, port, timeout, https=False, verify_ssl=False)
 
     def check_https(self, host: str, port: int = 443, timeout: float = 5.0, verify_ssl = False) -> dict:
         """Comprueba si un servidor HTTPS responde correctamente."""
-        tim_start = time()
         status = {"host": host, "port": port, "online": 0, "protocol": 4, "error": None}
         if verify_ssl:
             status['protocol'] = 3
 
-        url = f"https://{host}:{port}"
+        return self._check_http_service(status, host, port, timeout, https=True, verify_ssl=verify_ssl)
+
+    def _check_http_service(self, status: dict, host: str, port: int, timeout: float,
+                            https: bool, verify_ssl: bool) -> dict:
+        """
+        HTTP/HTTPS check with the shared pooled checker.
+
+        The port latency is the time to first byte, the dns/connect/tls timings are
+        kept in status["timings"] (zero cost when the connection is reused).
+        """
+        tim_start = time()
+        url = f"{'https' if https else 'http'}://{host}:{port}"
         try:
-            if not verify_ssl:
-                urllib3.disable_warnings(InsecureRequestWarning)
-            response = requests.get(url, timeout=timeout, verify=verify_ssl)
-            if response.status_code == 200:
-                status["online"] = 1
-            else:
-                status["error"] = f"HTTPS error: {response.status_code}"
-        except requests.exceptions.SSLError as ssl_error:
+            result = get_http_checker(self.ctx).check(host, port, https=https, verify=verify_ssl, timeout=timeout)
+            status["online"] = result["online"]
+            status["error"] = result["error"]
+            status["timings"] = result["timings"]
+            status["latency"] = result["timings"].get("ttfb")
+            if result.get("cert"):
+                status["cert"] = result["cert"]
+            return status
+        except ssl.SSLCertVerificationError as cert_error:
+            status["error"] = f"SSL error: {cert_error}"
+            status["cert_error"] = cert_error.verify_message or str(cert_error)
+        except ssl.SSLError as ssl_error:
             self.logger.error(f"SSL error while checking HTTPS for {url}: {ssl_error}")
             status["error"] = f"SSL error: {ssl_error}"
-        except requests.RequestException as e:
+        except (OSError, RuntimeError, http.client.HTTPException) as e:
             status["error"] = str(e)
         except Exception as e:
-            self.logger.error(f"Unexpected error while checking HTTPS for {url}: {e}")
+            self.logger.error(f"Unexpected error while checking {url}: {e}")
             status["error"] = str(e)
+
         status['latency'] = self.calculate_latency(tim_start)
 
         return status
@@ -277,10 +499,10 @@ class NetworkScanner:
 
         return status
 
-    def create_raw_socket(self, timeout: float) -> SocketRawHandler:
-        """Crea y devuelve un socket RAW configurado para ICMP."""
-        socket_handler = SocketRawHandler(self.ctx, timeout)
-        if not socket_handler.create_socket():
+    def create_raw_socket(self, timeout: float, family: int = socket.AF_INET) -> SocketRawHandler:
+        """Crea y devuelve un socket RAW configurado para ICMP (o ICMPv6)."""
+        socket_handler = SocketRawHandler(self.ctx, timeout, dgram=get_icmp_backend(self.ctx) == ICMP_BACKEND_DGRAM)
+        if not socket_handler.create_socket(family):
             raise Exception("Socket creation failed")
         return socket_handler
 
@@ -332,7 +554,7 @@ class NetworkScanner:
     @staticmethod
     def is_valid_network(network_str: str) -> bool:
         try:
-            ipaddress.IPv4Network(network_str, strict=True)
+            ipaddress.ip_network(network_str, strict=True)
             return True
         except ValueError:
             return False
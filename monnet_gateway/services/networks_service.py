@@ -7,6 +7,7 @@ Monnet Gateway - Networks Service
 
 from monnet_gateway.database.dbmanager import DBManager
 from monnet_gateway.database.networks_model import NetworksModel
+from monnet_gateway.networking.network_index import NetworkIndex
 from monnet_shared.app_context import AppContext
 
 class NetworksService:
@@ -24,3 +25,13 @@ class NetworksService:
     def get_networks_for_clear(self) -> list[dict]:
         """ Get all networks where clear=1 """
         return self.networks_model.get_for_clear()
+
+    def build_index(self) -> NetworkIndex:
+        """
+        Build the networks longest prefix match index from the networks table. Networks
+        are edited from the UI, build one per scan or discovery pass, not cached.
+
+        Returns:
+            NetworkIndex: The new index.
+        """
+        return NetworkIndex(self.networks_model.get_all(), self.logger)
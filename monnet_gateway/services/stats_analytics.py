@@ -0,0 +1,237 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Stats Analytics
+@description: Vectorised analysis of the stats series of all hosts. Each stat type is loaded
+    in a (hosts x time buckets) matrix and rolling baselines, the z-score of the recent
+    buckets and packet loss are computed in one pass for every host.
+
+"""
+# Std
+from operator import itemgetter
+from time import time
+
+# Third party
+import numpy as np
+
+# Local
+from monnet_gateway.database.dbmanager import DBManager
+from monnet_gateway.database.stats_model import StatsModel
+from monnet_gateway.services.hosts_service import HostService
+from monnet_shared.app_context import AppContext
+from monnet_shared.event_type import EventType
+from monnet_shared.log_type import LogType
+from monnet_shared.stat_type import StatType
+
+
+# Row layout of the bucketed stats
+BUCKET_DTYPE = np.dtype([
+    ("host_id", np.int64), ("type", np.int64), ("bucket", np.int64),
+    ("value", np.float64), ("samples", np.int64), ("lost", np.int64),
+])
+
+
+def rows_to_array(rows: list[dict]) -> np.ndarray:
+    """ Convert the bucketed stats rows (StatsModel.get_buckets_last_hours) in one pass """
+    getter = itemgetter("host_id", "type", "bucket", "value", "samples", "lost")
+    return np.fromiter(map(getter, rows), dtype=BUCKET_DTYPE, count=len(rows))
+
+
+def build_series(data: np.ndarray, stat_type: int, n_buckets: int) -> dict:
+    """
+    Build the (hosts x buckets) matrices of a stat type, oldest bucket first.
+
+    Args:
+        data (np.ndarray): rows_to_array result.
+        stat_type (int): Stat type to extract.
+        n_buckets (int): Number of time buckets.
+    Returns:
+        dict: hosts (ids), values (bucket mean, NaN when empty), samples and lost (counts).
+    """
+    data = data[data["type"] == stat_type]
+    columns = n_buckets - 1 - data["bucket"]
+    in_range = (columns >= 0) & (columns < n_buckets)
+    data, columns = data[in_range], columns[in_range]
+
+    hosts, host_idx = np.unique(data["host_id"], return_inverse=True)
+    shape = (len(hosts), n_buckets)
+    values = np.full(shape, np.nan)
+    samples = np.zeros(shape, dtype=np.int64)
+    lost = np.zeros(shape, dtype=np.int64)
+
+    # Buckets without a valid sample come as -1
+    values[host_idx, columns] = np.where(data["value"] >= 0, data["value"], np.nan)
+    samples[host_idx, columns] = data["samples"]
+    lost[host_idx, columns] = data["lost"]
+
+    return {"hosts": hosts, "values": values, "samples": samples, "lost": lost}
+
+
+def rolling_baselines(values: np.ndarray, window: int, min_std: float, min_samples: int = 3) -> tuple:
+    """
+    Mean/std of the previous `window` buckets of every bucket.
+
+    Args:
+        values (np.ndarray): (hosts x buckets) matrix, NaN for empty buckets.
+        window (int): Baseline window in buckets.
+        min_std (float): Std floor to avoid huge scores on flat series.
+        min_samples (int): Minimum non empty buckets in the window.
+    Returns:
+        tuple: (baselines, stds) matrices, NaN where there is no baseline.
+    """
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    zeros = np.zeros((values.shape[0], 1))
+    cum_sum = np.hstack((zeros, np.cumsum(x, axis=1)))
+    cum_sq = np.hstack((zeros, np.cumsum(x * x, axis=1)))
+    cum_n = np.hstack((zeros, np.cumsum(valid, axis=1)))
+
+    hi = np.arange(values.shape[1])
+    lo = np.maximum(hi - window, 0)
+    n = cum_n[:, hi] - cum_n[:, lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cum_sum[:, hi] - cum_sum[:, lo]) / n
+        var = (cum_sq[:, hi] - cum_sq[:, lo]) / n - mean * mean
+        std = np.maximum(np.sqrt(np.maximum(var, 0.0)), min_std)
+    insufficient = n < min_samples
+    mean[insufficient] = np.nan
+    std[insufficient] = np.nan
+
+    return mean, std
+
+
+def _recent_mean(matrix: np.ndarray, recent: int) -> np.ndarray:
+    """ Per row mean of the last `recent` columns ignoring NaN (NaN if all empty) """
+    tail = matrix[:, -recent:]
+    valid = ~np.isnan(tail)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, np.where(valid, tail, 0.0).sum(axis=1) / count, np.nan)
+
+
+def analyse_series(series: dict, window: int, recent: int, min_std: float) -> dict:
+    """
+    Analyse the series built by build_series.
+
+    Args:
+        series (dict): build_series result.
+        window (int): Baseline window in buckets.
+        recent (int): Number of last buckets evaluated.
+        min_std (float): Std floor.
+    Returns:
+        dict: hosts, recent (value), baseline, zscore and loss_ratio per host.
+    """
+    values = series["values"]
+    recent = min(recent, values.shape[1])
+    baselines, stds = rolling_baselines(values, window, min_std)
+    # Recent buckets against the baseline preceding them, so they don't pollute it
+    baseline = baselines[:, -recent]
+    recent_values = _recent_mean(values, recent)
+    samples = series["samples"][:, -recent:].sum(axis=1)
+    lost = series["lost"][:, -recent:].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        loss_ratio = np.where(samples > 0, lost / samples, 0.0)
+        zscore = (recent_values - baseline) / stds[:, -recent]
+
+    return {
+        "hosts": series["hosts"],
+        "recent": recent_values,
+        "baseline": baseline,
+        "zscore": zscore,
+        "loss_ratio": loss_ratio,
+    }
+
+
+class StatsAnalytics:
+    """
+    Detect degraded hosts from the latency and load series and emit host events.
+    """
+
+    def __init__(self, ctx: AppContext):
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.config = ctx.get_config()
+        self.db = DBManager(self.config.file_config)
+        self.stats_model = StatsModel(self.db)
+        self.host_service = HostService(ctx)
+        # (host_id, event_type): last event timestamp, avoid repeating alerts every run
+        self.last_events: dict[tuple[int, int], float] = {}
+
+    def _ensure_db_connection(self):
+        """Ensure the database connection is active and reconnect if necessary."""
+        if not self.db.is_connected():
+            self.logger.warning("StatsAnalytics: DB connection lost. Reconnecting...")
+            self.db.reconnect()
+
+    def run(self):
+        """ Load the series of all hosts, analyse them and emit events for degraded hosts """
+        hours = int(self.config.get("analytics_hours", 24))
+        bucket_secs = int(self.config.get("analytics_bucket_secs", 900))
+        window = int(self.config.get("analytics_window", 8))
+        recent = max(1, int(self.config.get("analytics_recent", 2)))
+        n_buckets = max(1, hours * 3600 // bucket_secs)
+
+        self._ensure_db_connection()
+        rows = self.stats_model.get_buckets_last_hours([StatType.PING, StatType.LOAD_AVG], hours, bucket_secs)
+        if not rows:
+            self.logger.debug("StatsAnalytics: no stats to analyse")
+            return
+
+        start_time = time()
+        data = rows_to_array(rows)
+        latency = analyse_series(
+            build_series(data, StatType.PING, n_buckets),
+            window, recent, float(self.config.get("analytics_latency_min_std", 1.0))
+        )
+        load = analyse_series(
+            build_series(data, StatType.LOAD_AVG, n_buckets),
+            window, recent, float(self.config.get("analytics_load_min_std", 0.1))
+        )
+        self.logger.debug(
+            f"StatsAnalytics: {len(rows)} buckets analysed in {round(time() - start_time, 3)} seconds"
+        )
+
+        self._emit_events(latency, load)
+
+    def _emit_events(self, latency: dict, load: dict):
+        zscore_threshold = float(self.config.get("analytics_zscore", 3.0))
+        loss_threshold = float(self.config.get("analytics_loss_ratio", 0.2))
+
+        degraded = np.flatnonzero(latency["zscore"] >= zscore_threshold)
+        for i in degraded:
+            self._event(
+                int(latency["hosts"][i]),
+                f'Latency degraded {latency["recent"][i]:.2f} ms '
+                f'(baseline {latency["baseline"][i]:.2f} ms, z-score {latency["zscore"][i]:.1f})',
+                EventType.LATENCY_DEGRADED
+            )
+
+        # Full loss is an offline host, already reported by the host checker
+        lossy = np.flatnonzero((latency["loss_ratio"] >= loss_threshold) & (latency["loss_ratio"] < 1))
+        for i in lossy:
+            self._event(
+                int(latency["hosts"][i]),
+                f'Packet loss {latency["loss_ratio"][i] * 100:.0f}%',
+                EventType.PACKET_LOSS
+            )
+
+        anomalies = np.flatnonzero(load["zscore"] >= zscore_threshold)
+        for i in anomalies:
+            self._event(
+                int(load["hosts"][i]),
+                f'Load average anomaly {load["recent"][i]:.2f} '
+                f'(baseline {load["baseline"][i]:.2f}, z-score {load["zscore"][i]:.1f})',
+                EventType.LOAD_ANOMALY
+            )
+
+    def _event(self, host_id: int, msg: str, event_type: int):
+        cooldown = float(self.config.get("analytics_event_cooldown", 6 * 3600))
+        now = time()
+        last_time = self.last_events.get((host_id, event_type))
+        if last_time is not None and now - last_time < cooldown:
+            return
+        self.last_events[(host_id, event_type)] = now
+        try:
+            self.host_service.create_event(host_id, msg, LogType.EVENT_WARN, event_type)
+        except Exception as e:
+            self.logger.error(f"StatsAnalytics: failed to create event for host {host_id}: {e}")
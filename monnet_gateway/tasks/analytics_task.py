@@ -0,0 +1,26 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Monnet Gateway - Stats Analytics Task
+
+"""
+
+from monnet_gateway.services.stats_analytics import StatsAnalytics
+from monnet_shared.app_context import AppContext
+
+
+class StatsAnalyticsTask:
+    """
+    Periodic analysis of the hosts stats series
+    """
+    def __init__(self, ctx: AppContext):
+        self.ctx = ctx
+        self.logger = ctx.get_logger()
+        self.stats_analytics = StatsAnalytics(ctx)
+
+    def run(self):
+        self.logger.debug("Running StatsAnalyticsTask...")
+        try:
+            self.stats_analytics.run()
+        except Exception as e:
+            self.logger.error(f"StatsAnalyticsTask: {e}")
@@ -5,14 +5,19 @@ Monnet Gateway
 
 """
 
+from collections import defaultdict
 import ipaddress
+from itertools import chain, islice
 from time import sleep, time
 from monnet_gateway.database.dbmanager import DBManager
-from monnet_gateway.database.hosts_model import HostsModel
 from monnet_gateway.database.networks_model import NetworksModel
-from monnet_gateway.networking.gw_net_utils import get_hostname, get_mac, get_org_from_mac
+from monnet_gateway.networking.arp_sweep import ArpSweeper
+from monnet_gateway.networking.gw_net_utils import get_mac, get_org_from_mac
+from monnet_gateway.networking.network_index import NetworkIndex
+from monnet_gateway.networking.reverse_resolver import get_reverse_resolver
 from monnet_gateway.services.hosts_service import HostService
 from monnet_gateway.services.network_scanner import NetworkScanner
+from monnet_gateway.services.networks_service import NetworksService
 from monnet_shared.app_context import AppContext
 from monnet_shared.time_utils import utc_date_now
 
@@ -29,89 +34,99 @@ class DiscoveryHostsTask:
 
         networks_model = NetworksModel(db)
         network_scanner = NetworkScanner(self.ctx)
-        hosts_model = HostsModel(db)
         host_service = HostService(self.ctx)
-        networks = networks_model.get_all()
-
-        # Move 0.0.0.0/24 to the end of the list to match as default network
-        networks = sorted(networks, key=lambda net: net.get("network") == "0.0.0.0/0")
-        ip_list = network_scanner.get_discovery_ips(networks_model, hosts_model)
+        # Built once per run, passed to HostService
+        network_index = NetworksService(self.ctx).build_index()
+
+        # Resume the sweep where the last run stopped, each run scans the next slice
+        sweep = network_scanner.build_ip_sweep(networks_model, self.config.get("discovery_cursor"))
+        # IPv6 networks too large to sweep, candidates from the neighbour table
+        neighbour_ips = network_scanner.get_neighbour_ips(networks_model)
+        if sweep is None and not neighbour_ips:
+            return
+        # Default 10 minutes
+        deadline = start_time + float(self.config.get("discovery_time_budget", 60 * 10))
+        # Rebuild each run, hosts may be added or deleted from the UI
+        known_ips = host_service.load_known_ip_index()
+        ip_list = chain(
+            (ip for ip in neighbour_ips if ip not in known_ips),
+            network_scanner.get_discovery_ips(sweep, known_ips, deadline) if sweep is not None else (),
+        )
 
         discovery_host = []
-
-        for ip in ip_list:
-
-            if ip is None:
-                self.logger.warning(f"IP not found in discovery")
-                continue
-            ping_status = network_scanner.ping(ip, 0.3)
-
-            if (ping_status and ping_status.get("online") == 1):
-                if 'latency' in ping_status:
-                    ping_status['latency'] = round(ping_status.get("latency"), 3)
-
-                ping_status['last_check'] = utc_date_now()
-
-                mac_result = get_mac(ip)
-                host_data = {
-                    "ip": ip,
-                    "last_check": ping_status.get("last_check"),
-                    "online": 1,
-                    "network": 1,   # default
-                    "warn": 1,      # New host discovery
-                    "misc": {
-                        "latency": ping_status.get("latency"),
-                    },
-                }
-
-                if mac_result and isinstance(mac_result, str):
-                    host_data["mac"] = mac_result
-                    organization = get_org_from_mac(mac_result)
-                    if organization:
-                        if "misc" not in host_data:
-                            host_data["misc"] = {}
-                        host_data["misc"]["mac_vendor"] = organization
-                else:
-                    host_data['mac_check'] = 1  # Mark as MAC check needed
-
-                try:
-                    host_ip = ipaddress.IPv4Address(ip)
-                except ipaddress.AddressValueError:
-                    self.logger.warning(f"Invalid IP address: {ip}")
-                    continue
-
-                for network in networks:
-                    network_cidr = network.get("network", None)
-                    if network_cidr is None:
-                        self.logger.warning(f"Network CIDR not found for network: {network.get('name')}")
-                        continue
-
+        scanned = 0
+        arp_sweeper = self._get_arp_sweeper()
+
+        while True:
+            ip_chunk = list(islice(ip_list, 256))
+            if not ip_chunk:
+                break
+            scanned += len(ip_chunk)
+            icmp_ips = ip_chunk
+
+            # On-link IPv4: one ARP pass gives liveness and MAC, firewalled hosts included.
+            # IPv6 has no on-link interface here and goes to the ICMPv6 echo
+            if arp_sweeper is not None:
+                icmp_ips = []
+                onlink_ips = defaultdict(list)
+                interfaces = {}
+                for ip in ip_chunk:
+                    iface = arp_sweeper.interface_for(ip)
+                    if iface is None:
+                        icmp_ips.append(ip)
+                    else:
+                        interfaces[iface["name"]] = iface
+                        onlink_ips[iface["name"]].append(ip)
+
+                for iface_name, targets in onlink_ips.items():
                     try:
-                        network_cidr = ipaddress.IPv4Network(network.get("network"), strict=False)
-                    except ipaddress.AddressValueError:
-                        self.logger.warning(f"Invalid CIDR notation: {network_cidr}")
+                        replies = arp_sweeper.sweep(interfaces[iface_name], targets)
+                    except PermissionError as e:
+                        self.logger.warning(f"ARP sweep not allowed, fallback to ICMP: {e}")
+                        arp_sweeper = None
+                        icmp_ips.extend(targets)
                         continue
-
-                    if host_ip in network_cidr:
-                        logmsg = f"Discover IP {host_ip} belongs to network {network.get('name')} ({network_cidr})"
-                        self.logger.notice(logmsg)
-                        host_data["network"] = network.get("id")
-                        break
-                else:
-                    self.logger.warning(f"IP {host_ip} does not belong to any configured network. Assigning to default.")
-                    host_data["network"] = 1  # Default network
-
-                hostname = get_hostname(str(host_ip))
-                if hostname:
-                    host_data["hostname"] = hostname
-                discovery_host.append(host_data)
-                sleep(0.1)
+                    except OSError as e:
+                        self.logger.error(f"ARP sweep on {iface_name} failed, fallback to ICMP: {e}")
+                        icmp_ips.extend(targets)
+                        continue
+                    for ip, reply in replies.items():
+                        host_data = self._host_data(ip, reply["latency"], reply["mac"], network_index)
+                        if host_data:
+                            discovery_host.append(host_data)
+
+            for ip in icmp_ips:
+                ping_status = network_scanner.ping(ip, 0.3)
+
+                if (ping_status and ping_status.get("online") == 1):
+                    latency = ping_status.get("latency")
+                    if latency is not None:
+                        latency = round(latency, 3)
+                    host_data = self._host_data(ip, latency, get_mac(ip), network_index)
+                    if host_data:
+                        discovery_host.append(host_data)
+                    sleep(0.1)
+
+        # PTR lookups of all the discovered hosts at once
+        hostnames = get_reverse_resolver(self.ctx).resolve_many(
+            [host_data["ip"] for host_data in discovery_host],
+            timeout=float(self.config.get("discovery_dns_timeout", 10))
+        )
+        for host_data in discovery_host:
+            if hostnames.get(host_data["ip"]):
+                host_data["hostname"] = hostnames[host_data["ip"]]
 
         try:
-            host_service.add_hosts(discovery_host)
+            host_service.add_hosts(discovery_host, network_index)
         except ValueError as e:
             self.logger.error(f"Error inserting discovery hosts: {e}")
 
+        if sweep is not None:
+            try:
+                self.config.update_db_key("discovery_cursor", sweep.cursor, create_key=True)
+            except Exception as e:
+                self.logger.error(f"Error updating discovery_cursor: {e}")
+
         try:
             self.config.update_db_key("discovery_last_run", utc_date_now())
         except KeyError as e:
@@ -121,7 +136,72 @@ class DiscoveryHostsTask:
         except Exception as e:
             self.logger.error(f"Unexpected error updating discovery_last_run: {e}")
 
-        self.logger.debug(f"Scanned:  {len(ip_list)}")
+        if sweep is not None:
+            self.logger.debug(f"Scanned:  {scanned} ({sweep.steps}/{sweep.modulus} sweep steps)")
+        else:
+            self.logger.debug(f"Scanned:  {scanned} (neighbour table)")
         self.logger.debug(f"Discovery hosts: {len(discovery_host)}")
         end_time = time()
         self.logger.debug(f"Total scan time {round(end_time - start_time, 2)} seconds")
+
+    def _get_arp_sweeper(self) -> ArpSweeper | None:
+        """ ARP sweeper for the on-link networks, None if disabled or not on-link interfaces """
+        if not self.config.get("discovery_arp", 1):
+            return None
+        arp_sweeper = ArpSweeper(self.ctx, rate=float(self.config.get("discovery_arp_rate", 200)))
+        if not arp_sweeper.interfaces:
+            return None
+
+        return arp_sweeper
+
+    def _host_data(self, ip: str, latency: float | None, mac: str | None, network_index: NetworkIndex) -> dict:
+        """
+        Build the new host data of a discovered IP.
+
+        Args:
+            ip (str): IP address.
+            latency (float): Latency in ms.
+            mac (str): MAC address if known.
+            network_index (NetworkIndex): Networks index.
+        Returns:
+            dict: Host data, empty if the IP is invalid.
+        """
+        try:
+            host_ip = ipaddress.ip_address(ip)
+        except ValueError:
+            self.logger.warning(f"Invalid IP address: {ip}")
+            return {}
+
+        host_data = {
+            "ip": ip,
+            "last_check": utc_date_now(),
+            "online": 1,
+            "network": 1,   # default
+            "warn": 1,      # New host discovery
+            "misc": {
+                "latency": latency,
+            },
+        }
+
+        if mac and isinstance(mac, str):
+            host_data["mac"] = mac
+            organization = get_org_from_mac(mac)
+            if organization:
+                host_data["misc"]["mac_vendor"] = organization
+        else:
+            host_data['mac_check'] = 1  # Mark as MAC check needed
+
+        # Most specific network, 0.0.0.0/0 only if no other matches
+        network = network_index.lookup(ip)
+        if network is not None:
+            logmsg = (
+                f"Discover IP {host_ip} belongs to network "
+                f"{network.get('name')} ({network.get('network')})"
+            )
+            self.logger.notice(logmsg)
+            host_data["network"] = network.get("id")
+        else:
+            self.logger.warning(f"IP {host_ip} does not belong to any configured network. Assigning to default.")
+            host_data["network"] = 1  # Default network
+
+        return host_data
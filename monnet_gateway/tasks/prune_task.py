@@ -5,9 +5,19 @@ Monnet Gateway - Prune Task
 
 """
 
+from datetime import date, timedelta
+
 from monnet_gateway.database.dbmanager import DBManager
-from monnet_shared.app_context import AppContext
+from monnet_gateway.database.partitions_model import PartitionsModel, to_days
 from monnet_gateway.services.hosts_service import HostService
+from monnet_shared.app_context import AppContext
+
+# Date partitioned tables and the config key with its retention days
+PARTITIONED_TABLES = {
+    "stats": "clear_stats_intvl",
+    "hosts_logs": "clear_logs_intvl",
+    "reports": "clear_reports_intvl",
+}
 
 class PruneTask:
     """Class to perform periodic cleanup tasks."""
@@ -23,6 +33,8 @@ class PruneTask:
         try:
             if not self.db or self.db is not isinstance(self.db, DBManager):
                 self.db = DBManager(self.config.file_config)
+            # DDL commits implicitly, keep it out of the transaction
+            self.manage_partitions()
             with self.db.transaction():
                 self.clear_stats()
                 self.clear_system_logs()
@@ -34,10 +46,85 @@ class PruneTask:
             self.logger.error(f"Error during PruneTask: {e}")
         finally:
             self.db.close()
+
+    def manage_partitions(self):
+        """
+        Date partitioned storage mode (db_partition_mode: day or week).
+
+        Creates the partitions for the next periods and drops the expired ones,
+        the clear_* deletes afterwards only touch the partition crossing the cutoff.
+        """
+        mode = self.config.get("db_partition_mode")
+        if mode not in ("day", "week"):
+            return
+        ahead = int(self.config.get("db_partition_ahead", 7 if mode == "day" else 4))
+        partitions_model = PartitionsModel(self.db)
+
+        for table, interval_key in PARTITIONED_TABLES.items():
+            try:
+                if not partitions_model.is_partitioned(table):
+                    self.logger.notice(f"Partitioning table {table} by {mode}, this may take a while...")
+                    changed_keys = partitions_model.add_date_to_keys(table)
+                    if changed_keys:
+                        self.logger.notice(f"Added date to the {table} keys: {changed_keys}")
+                    partitions_model.partition_table(table, self._history_partition(mode))
+                self.create_partitions(partitions_model, table, mode, ahead)
+                self.drop_expired_partitions(partitions_model, table, int(self.config.get(interval_key, 30)))
+            except Exception as e:
+                self.logger.error(f"Error managing partitions of {table}: {e}")
+
+    def create_partitions(self, partitions_model: PartitionsModel, table: str, mode: str, ahead: int):
+        """Creates the partitions of the current and next `ahead` periods."""
+        partitions = partitions_model.get_partitions(table)
+        bounds = [p["less_than"] for p in partitions if p["less_than"] is not None]
+        last_bound = max(bounds) if bounds else 0
+
+        new_partitions = []
+        start = self._period_start(date.today(), mode)
+        for _ in range(ahead + 1):
+            end = self._period_end(start, mode)
+            if to_days(end) > last_bound:
+                new_partitions.append((f"p{start.strftime('%Y%m%d')}", to_days(end)))
+            start = end
+
+        if new_partitions:
+            partitions_model.add_partitions(table, new_partitions)
+            self.logger.info(f"Created {len(new_partitions)} partitions on {table}")
+
+    def drop_expired_partitions(self, partitions_model: PartitionsModel, table: str, interval: int):
+        """Drops the partitions whose rows are all older than `interval` days."""
+        if interval <= 0:
+            return
+        cutoff = to_days(date.today() - timedelta(days=interval))
+        expired = [
+            p["name"] for p in partitions_model.get_partitions(table)
+            if p["less_than"] is not None and p["less_than"] <= cutoff
+        ]
+        if expired:
+            partitions_model.drop_partitions(table, expired)
+            self.logger.notice(f"Dropped {len(expired)} expired partitions on {table}: {expired}")
+
+    def _history_partition(self, mode: str) -> list[tuple[str, int]]:
+        """Initial partition holding the rows previous to the current period."""
+        start = self._period_start(date.today(), mode)
+        return [("phistory", to_days(start))]
+
+    @staticmethod
+    def _period_start(day: date, mode: str) -> date:
+        """First day of the period (weeks start on monday)."""
+        if mode == "week":
+            return day - timedelta(days=day.weekday())
+        return day
+
+    @staticmethod
+    def _period_end(start: date, mode: str) -> date:
+        """First day of the next period."""
+        return start + timedelta(days=7 if mode == "week" else 1)
+
     def clear_stats(self):
         """Cleans up old statistics."""
-        interval = self.config.get("clear_stats_intvl", 30)  # Default to 30 days
-        if (interval <= 0):
+        interval = int(self.config.get("clear_stats_intvl", 30))  # Default to 30 days
+        if interval <= 0:
             return
         query = "DELETE FROM stats WHERE date < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
         affected = self.db.execute(query, (interval,))
@@ -45,8 +132,8 @@ class PruneTask:
 
     def clear_system_logs(self):
         """Cleans up old system logs."""
-        interval = self.config.get("clear_logs_intvl", 30)  # Default to 30 days
-        if (interval <= 0):
+        interval = int(self.config.get("clear_logs_intvl", 30))  # Default to 30 days
+        if interval <= 0:
             return
         query = "DELETE FROM system_logs WHERE date < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
         affected = self.db.execute(query, (interval,))
@@ -54,8 +141,8 @@ class PruneTask:
 
     def clear_hosts_logs(self):
         """Cleans up old host logs."""
-        interval = self.config.get("clear_logs_intvl", 30)  # Default to 30 days
-        if (interval <= 0):
+        interval = int(self.config.get("clear_logs_intvl", 30))  # Default to 30 days
+        if interval <= 0:
             return
         query = "DELETE FROM hosts_logs WHERE date < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
         affected = self.db.execute(query, (interval,))
@@ -63,8 +150,8 @@ class PruneTask:
 
     def clear_reports(self):
         """Cleans up old reports."""
-        interval = self.config.get("clear_reports_intvl", 30)  # Default to 30 days
-        if (interval <= 0):
+        interval = int(self.config.get("clear_reports_intvl", 30))  # Default to 30 days
+        if interval <= 0:
             return
         query = "DELETE FROM reports WHERE date < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
         affected = self.db.execute(query, (interval,))
@@ -72,7 +159,7 @@ class PruneTask:
 
     def clear_not_seen_hosts(self):
         """Cleans up hosts not seen for a specified number of days."""
-        days = self.config.get("clear_not_seen_hosts_intvl", 30)  # Default to 30 days
+        days = int(self.config.get("clear_not_seen_hosts_intvl", 30))  # Default to 30 days
         if days <= 0:
             return
         affected = self.host_service.clear_not_seen_hosts(days)
@@ -80,9 +167,12 @@ class PruneTask:
 
     def clear_uniq_done_tasks(self):
         """Cleans up tasks that are done. Only Uniq tasks are deleted."""
-        interval = self.config.get("clear_task_done_intvl", 30)
-        if (interval <= 0):
+        interval = int(self.config.get("clear_task_done_intvl", 30))
+        if interval <= 0:
             return
-        query = "DELETE FROM tasks WHERE trigger_type = 1 AND done = 1 AND created < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
+        query = (
+            "DELETE FROM tasks WHERE trigger_type = 1 AND done = 1 "
+            "AND created < DATE_SUB(CURDATE(), INTERVAL %s DAY)"
+        )
         affected = self.db.execute(query, (interval,))
         self.logger.notice(f"Clear done tasks, affected rows: {affected}")
@@ -20,6 +20,7 @@ from monnet_gateway.tasks.prune_task import PruneTask
 from monnet_gateway.tasks.weekly_task import WeeklyTask
 from monnet_gateway.tasks.hourly_task import HourlyTask
 from monnet_gateway.tasks.agents_check import AgentsCheckTask
+from monnet_gateway.tasks.analytics_task import StatsAnalyticsTask
 
 class TaskSched:
     """Class to execute a periodic task."""
@@ -50,6 +51,8 @@ class TaskSched:
                 "hourly_task": float(60 * 60),
                 # Default 1 minute
                 "agents_check": float(self.config.get("gw_agents_check_intvl", 60)),  # Default 60s
+                # Default 15 minutes
+                "stats_analytics": float(self.config.get("gw_stats_analytics_intvl", 60 * 15)),
             }
 
             self.last_run_time = {
@@ -61,6 +64,7 @@ class TaskSched:
                 "weekly_task": self._to_timestamp(self.config.get("last_weekly_task", current_time)),
                 "hourly_task": current_time,
                 "agents_check": self._to_timestamp(self.config.get("last_agents_check", current_time)),
+                "stats_analytics": current_time,
             }
 
             # Avoid parallel task
@@ -73,6 +77,7 @@ class TaskSched:
                 "weekly_task": threading.Lock(),
                 "hourly_task": threading.Lock(),
                 "agents_check": threading.Lock(),
+                "stats_analytics": threading.Lock(),
             }
 
             self.discovery_hosts = DiscoveryHostsTask(ctx)
@@ -82,6 +87,7 @@ class TaskSched:
             self.weekly_task = WeeklyTask(ctx)
             self.hourly_task = HourlyTask(ctx)
             self.agents_check = AgentsCheckTask(ctx)
+            self.stats_analytics = StatsAnalyticsTask(ctx)
 
             # Launch Thread
             self.thread = threading.Thread(target=self.run_task, daemon=True)
@@ -142,6 +148,8 @@ class TaskSched:
                 self._run_task("hourly_task", self.hourly_task.run, current_time)
                 # Run AgentsCheckTask
                 self._run_task("agents_check", self.agents_check.run, current_time)
+                # Run StatsAnalyticsTask
+                self._run_task("stats_analytics", self.stats_analytics.run, current_time)
 
                 sleep(1)
             except Exception as e:
@@ -165,7 +173,11 @@ class TaskSched:
                     task_function()
                     self.last_run_time[task_name] = current_time
                     # Persist last run time v75, except for last_agents_check TODO temporaly
-                    if self.config.get("db_monnet_version") >= 0.75 and task_name != "agents_check":
+                    # and stats_analytics (no config key)
+                    if (
+                        self.config.get("db_monnet_version") >= 0.75
+                        and task_name not in ("agents_check", "stats_analytics")
+                    ):
                         try:
                             self.config.update_db_key(f"last_{task_name}", current_time)
                         except Exception as e:
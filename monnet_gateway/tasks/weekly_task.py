@@ -4,7 +4,8 @@ Weekly task to perform periodic updates, such as updating host details.
 
 import ipaddress
 from monnet_gateway.services.hosts_service import HostService
-from monnet_gateway.networking.gw_net_utils import get_hostname, get_mac, get_org_from_mac
+from monnet_gateway.networking.gw_net_utils import get_mac, get_org_from_mac
+from monnet_gateway.networking.reverse_resolver import get_reverse_resolver
 
 class WeeklyTask:
     def __init__(self, ctx):
@@ -19,6 +20,11 @@ class WeeklyTask:
             self.logger.info("No hosts found.")
             return
 
+        # Resolve all hostnames concurrently before the per host checks
+        hostnames = get_reverse_resolver(self.ctx).resolve_many(
+            [host.get("ip") for host in hosts if host.get("ip")]
+        )
+
         for host in hosts:
             updated = False
             hid = host.get("id")
@@ -34,7 +40,7 @@ class WeeklyTask:
                 continue
 
             # Check hostname missing/change
-            hostname = get_hostname(ip)
+            hostname = hostnames.get(ip)
             if hostname is not None and isinstance(hostname, str):
                 db_hostname = host.get("hostname", None)
                 if not db_hostname or  db_hostname != hostname:
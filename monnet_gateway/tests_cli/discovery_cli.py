@@ -42,8 +42,12 @@ if __name__ == "__main__":
 
     networks = networks_model.get_all()
 
-    # Real Discovery Test
-    ip_list = network_scanner.get_discovery_ips(networks_model, hosts_model)
+    # Real Discovery Test (full sweep, cursor not persisted)
+    sweep = network_scanner.build_ip_sweep(networks_model)
+    if sweep is None:
+        sys.exit(0)
+    known_ips = host_service.load_known_ip_index()
+    ip_list = list(network_scanner.get_discovery_ips(sweep, known_ips))
 
     # Fake IP List Discover Test
     #ip_list = [
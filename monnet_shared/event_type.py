@@ -30,6 +30,10 @@ class EventType:
         HOST_BECOME_ON: Event indicating the host has become online.
         HOST_BECOME_OFF: Event indicating the host has become offline.
         NEW_HOST_DISCOVERY: Event indicating the discovery of a new host.
+        LATENCY_DEGRADED: Event indicating latency well above the host baseline.
+        PACKET_LOSS: Event indicating sustained partial packet loss.
+        LOAD_ANOMALY: Event indicating load average well above the host baseline.
+        CERT_EXPIRY_SOON: Event indicating a TLS certificate close to its expiration.
 
     """
     HIGH_IOWAIT = 1
@@ -55,3 +59,7 @@ class EventType:
     PORT_DOWN_LOCAL = 20
     TASK_FAILURE = 21
     TASK_SUCCESS = 22
+    LATENCY_DEGRADED = 23
+    PACKET_LOSS = 24
+    LOAD_ANOMALY = 25
+    CERT_EXPIRY_SOON = 26
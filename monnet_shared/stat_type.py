@@ -0,0 +1,27 @@
+"""
+@copyright Copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+StatType Constants
+
+"""
+
+class StatType:
+    """
+    Defines constants for the `type` field of the stats table.
+
+    Stat Types:
+        PING: Ping latency in ms (negative or NULL when the probe was lost).
+        LOAD_AVG: Load average.
+        IOWAIT: IO wait percent.
+        PING_MIN: Min RTT in ms of a multi echo ping.
+        PING_MAX: Max RTT in ms of a multi echo ping.
+        PING_MDEV: RTT mean deviation (jitter) in ms of a multi echo ping.
+        PING_LOSS: Packet loss percent of a multi echo ping.
+    """
+    PING = 1
+    LOAD_AVG = 2
+    IOWAIT = 3
+    PING_MIN = 10
+    PING_MAX = 11
+    PING_MDEV = 12
+    PING_LOSS = 13
@@ -0,0 +1,43 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent delta metrics tests
+"""
+
+from monnet_agent.delta import DeltaEncoder, apply_delta, flatten
+
+
+def metrics(free, disks=1):
+    return {
+        "meminfo": {"total": 1000, "free": free},
+        "disksinfo": [{"mountpoint": f"/d{n}", "used": 10} for n in range(disks)],
+        "iowait": 0.5,
+    }
+
+
+class TestDeltaEncoder:
+    def test_flatten(self):
+        assert flatten(metrics(100)) == {
+            "meminfo.total": 1000, "meminfo.free": 100,
+            "disksinfo.0.mountpoint": "/d0", "disksinfo.0.used": 10, "iowait": 0.5,
+        }
+
+    def test_full_then_changed_leaves(self):
+        encoder = DeltaEncoder(full_every=10)
+        full = encoder.encode(metrics(100))
+        assert full["full"] and full["seq"] == 1
+        assert encoder.encode(metrics(100)) == {}
+        delta = encoder.encode(metrics(90, disks=0))
+        assert delta["base_seq"] == 1 and delta["seq"] == 2
+        assert delta["values"] == {"meminfo.free": 90, "disksinfo": []}
+        assert set(delta["removed"]) == {"disksinfo.0.mountpoint", "disksinfo.0.used"}
+        assert apply_delta(apply_delta({}, full), delta) == flatten(metrics(90, disks=0))
+
+    def test_periodic_and_requested_full(self):
+        encoder = DeltaEncoder(full_every=2)
+        encoder.encode(metrics(1))
+        assert not encoder.encode(metrics(2))["full"]
+        assert not encoder.encode(metrics(3))["full"]
+        assert encoder.encode(metrics(4))["full"]
+        encoder.request_full()
+        assert encoder.encode(metrics(4))["full"]
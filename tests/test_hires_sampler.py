@@ -0,0 +1,29 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent high resolution sampler tests
+"""
+
+from monnet_agent.hires_sampler import RingBuffer, cpu_percentages
+from monnet_agent.proc_sampler import CpuTimes
+
+
+class TestHighResSampler:
+    def test_ring_buffer_overwrites_oldest(self):
+        ring = RingBuffer(3)
+        for value in (1, 2, 3, 4, 5):
+            ring.append(value)
+        assert ring.values() == [3.0, 4.0, 5.0]
+        ring.clear()
+        assert ring.summary() is None
+
+    def test_summary(self):
+        ring = RingBuffer(100)
+        for value in range(1, 101):
+            ring.append(value)
+        assert ring.summary() == {"min": 1.0, "avg": 50.5, "max": 100.0, "p95": 95.0}
+
+    def test_cpu_percentages(self):
+        last = CpuTimes(0, 0, 0, 0, 0, 0, 0, 0)
+        current = CpuTimes(user=20, nice=0, system=10, idle=60, iowait=10, irq=0, softirq=0, steal=0)
+        assert cpu_percentages(last, current) == (30.0, 10.0)
@@ -0,0 +1,73 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+HTTP checker tests
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from monnet_gateway.networking.http_checker import HttpChecker, parse_status_codes
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_checker():
+    ctx = MagicMock()
+    ctx.get_var.return_value = None
+    ctx.get_config.return_value = {}
+    return HttpChecker(ctx)
+
+
+class TestHttpChecker:
+    def test_parse_status_codes(self):
+        assert parse_status_codes(200) == {200}
+        assert parse_status_codes([200, "301"]) == {200, 301}
+        assert parse_status_codes("200-202, 301,,302") == {200, 201, 202, 301, 302}
+        with pytest.raises(ValueError):
+            parse_status_codes("2xx")
+
+    def test_pool_reuse(self, server):
+        checker = make_checker()
+        port = server.server_address[1]
+        first = checker.check("127.0.0.1", port, timeout=2)
+        second = checker.check("127.0.0.1", port, timeout=2)
+        assert first["online"] == 1 and not first["reused"]
+        assert second["online"] == 1 and second["reused"]
+        checker.close()
+
+    @pytest.mark.parametrize("error", [TimeoutError("timed out"), OSError("No route to host")])
+    def test_retry_on_reused_connection_error(self, server, error):
+        checker = make_checker()
+        port = server.server_address[1]
+        checker.check("127.0.0.1", port, timeout=2)
+        # Idle connection silently dropped by a NAT or firewall
+        idle = checker._idle[("http", "127.0.0.1", port, None)][0]
+        idle.request = MagicMock(side_effect=error)
+        result = checker.check("127.0.0.1", port, timeout=2)
+        assert result["online"] == 1 and not result["reused"]
+        assert idle.request.called
+        checker.close()
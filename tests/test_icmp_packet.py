@@ -0,0 +1,28 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+ICMP packet tests
+"""
+
+import struct
+
+from monnet_gateway.networking.icmp_packet import ICMPPacket
+from monnet_gateway.networking.socket_raw import icmp6_filter
+
+
+class TestICMPPacket:
+    def test_ipv4_echo_checksum(self):
+        packet = ICMPPacket(identifier=0x1234, sequence=3).build_packet()
+        assert packet[0] == 8
+        assert struct.unpack("!HH", packet[4:8]) == (0x1234, 3)
+        assert ICMPPacket.calculate_checksum(packet) == 0
+
+    def test_ipv6_echo_kernel_checksum(self):
+        packet = ICMPPacket(identifier=7, sequence=1, ipv6=True).build_packet()
+        assert packet[0] == 128
+        assert packet[2:4] == b"\x00\x00"
+
+    def test_icmp6_filter_passes_only_allowed(self):
+        data = struct.unpack("=8I", icmp6_filter(129, 1))
+        blocked = {t for t in range(256) if data[t >> 5] & (1 << (t & 31))}
+        assert set(range(256)) - blocked == {1, 129}
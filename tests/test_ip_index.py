@@ -0,0 +1,65 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Known IP index tests
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from monnet_gateway.networking.ip_index import KnownIPIndex
+from monnet_gateway.services.hosts_service import HostService
+
+
+class TestKnownIPIndex:
+    def test_lookup_add_discard(self):
+        index = KnownIPIndex(["10.0.0.2", "10.0.0.1", "10.0.0.2", "invalid", None])
+        assert len(index) == 2
+        assert "10.0.0.1" in index and "10.0.0.3" not in index
+        # Integer form of 10.0.0.1
+        assert 167772161 in index
+        assert "invalid" not in index and None not in index
+        index.add("10.0.0.3")
+        index.add("10.0.0.3")
+        index.add("bogus")
+        assert len(index) == 3
+        index.discard("10.0.0.1")
+        index.discard("10.9.9.9")
+        assert "10.0.0.1" not in index and len(index) == 2
+        assert list(index._ips) == sorted(index._ips)
+
+    def test_ipv6(self):
+        index = KnownIPIndex(["10.0.0.1", "2001:db8::1"])
+        assert len(index) == 2
+        # Any textual form of the same address
+        assert "2001:0db8:0000::1" in index
+        index.add("2001:db8::2")
+        index.discard("2001:db8::1")
+        assert "2001:db8::2" in index and "2001:db8::1" not in index
+        assert "10.0.0.1" in index
+
+
+def test_add_hosts_rollback_keeps_previously_known_ips():
+    known_ips = KnownIPIndex(["10.0.0.1"])
+    service = HostService.__new__(HostService)
+    service.ctx = MagicMock()
+    service.ctx.get_var.side_effect = lambda name: known_ips if name == "known_ip_index" else None
+    service.logger = MagicMock()
+    service.host_model = MagicMock()
+    service._ensure_db_connection = MagicMock()
+
+    def add_host(host, commit=True, network_index=None):
+        if host["ip"] == "10.0.0.9":
+            raise RuntimeError("duplicate entry")
+        known_ips.add(host["ip"])
+        return 1
+
+    service.add_host = add_host
+    hosts = [{"ip": "10.0.0.1", "network": 1}, {"ip": "10.0.0.2", "network": 1}, {"ip": "10.0.0.9", "network": 1}]
+    with pytest.raises(ValueError):
+        service.add_hosts(hosts)
+    service.host_model.rollback.assert_called_once()
+    # Only the IPs added by the failed batch are removed
+    assert "10.0.0.1" in known_ips
+    assert "10.0.0.2" not in known_ips
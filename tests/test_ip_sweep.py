@@ -0,0 +1,62 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+IP Sweep tests
+"""
+
+import ipaddress
+
+from monnet_gateway.networking.ip_sweep import IPSweep
+
+NETWORKS = [
+    ipaddress.IPv4Network("192.168.1.0/24"),
+    ipaddress.IPv4Network("10.0.0.0/22"),
+    ipaddress.IPv4Network("10.0.1.0/24"),  # Overlapped by 10.0.0.0/22
+]
+
+
+def expected_ips():
+    ips = set()
+    for network in NETWORKS[:2]:
+        ips.update(str(ip) for ip in network.hosts())
+    return ips
+
+
+class TestIPSweep:
+    def test_full_cycle_visits_every_host_once(self):
+        sweep = IPSweep(NETWORKS)
+        ips = list(sweep.addresses())
+        assert len(ips) == len(set(ips))
+        assert set(ips) == expected_ips()
+        assert sweep.completed
+
+    def test_resume_from_cursor(self):
+        sweep = IPSweep(NETWORKS)
+        first = []
+        for ip in sweep.addresses():
+            first.append(ip)
+            if len(first) == 100:
+                break
+        resumed = IPSweep(NETWORKS, sweep.cursor)
+        rest = list(resumed.addresses())
+        assert set(first).isdisjoint(rest)
+        assert set(first) | set(rest) == expected_ips()
+
+    def test_networks_change_starts_new_cycle(self):
+        sweep = IPSweep(NETWORKS)
+        list(sweep.addresses())
+        other = IPSweep(NETWORKS[:1], sweep.cursor)
+        assert other.steps == 0
+        assert set(other.addresses()) == {str(ip) for ip in NETWORKS[0].hosts()}
+
+    def test_deadline_stops_sweep(self):
+        sweep = IPSweep(NETWORKS)
+        assert list(sweep.addresses(deadline=0)) == []
+        assert sweep.steps == 0
+
+    def test_ipv6_and_mixed_families(self):
+        networks = [ipaddress.ip_network("2001:db8::/120"), ipaddress.ip_network("10.0.0.0/30")]
+        ips = list(IPSweep(networks).addresses())
+        # IPv6 excludes the subnet router anycast address only
+        assert set(ips) == {str(ip) for network in networks for ip in network.hosts()}
+        assert len(ips) == 255 + 2
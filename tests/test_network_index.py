@@ -0,0 +1,46 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Network index tests
+"""
+
+from monnet_gateway.networking.network_index import NetworkIndex
+
+NETWORKS = [
+    {"id": 1, "network": "0.0.0.0/0"},
+    {"id": 2, "network": "192.168.0.0/16"},
+    {"id": 3, "network": "2001:db8::/32"},
+    {"id": 4, "network": "2001:db8:1::/64"},
+]
+
+
+class TestNetworkIndex:
+    def test_longest_prefix(self):
+        index = NetworkIndex(NETWORKS + [{"id": 5, "network": "192.168.1.0/24"}])
+        assert index.lookup("192.168.1.20")["id"] == 5
+        assert index.lookup("192.168.2.20")["id"] == 2
+        # 0.0.0.0/0 only when nothing else matches
+        assert index.lookup("8.8.8.8")["id"] == 1
+        assert index.network_id("8.8.8.8") == 1
+
+    def test_overlapping_networks(self):
+        # Same network twice, the first defined wins
+        index = NetworkIndex([{"id": 7, "network": "10.0.0.0/8"}, {"id": 8, "network": "10.0.0.1/8"}])
+        assert index.lookup("10.1.2.3")["id"] == 7
+        assert len(index) == 2
+
+    def test_invalid(self):
+        index = NetworkIndex(NETWORKS[1:2] + [{"id": 9, "network": "not a network"}, {"id": 10}])
+        assert len(index) == 1
+        assert index.lookup("999.1.1.1") is None
+        assert index.lookup(None) is None
+        assert index.lookup("10.0.0.1") is None
+        assert index.network_id("10.0.0.1", default=3) == 3
+
+    def test_ipv6_lookup(self):
+        index = NetworkIndex(NETWORKS)
+        assert index.lookup("2001:db8:1::10")["id"] == 4
+        assert index.lookup("2001:db8:2::10")["id"] == 3
+        # The IPv4 default route does not match IPv6
+        assert index.lookup("2001:dead::1") is None
+        assert index.lookup("192.168.1.1")["id"] == 2
@@ -0,0 +1,52 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent outbox tests
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+
+@pytest.fixture
+def outbox(tmp_path, mock_logger):
+    from monnet_agent.outbox import Outbox
+
+    mock_ctx = MagicMock()
+    mock_ctx.get_logger.return_value = mock_logger
+    box = Outbox(mock_ctx, str(tmp_path / "spool" / "outbox.db"), min_delay=60)
+    yield box
+    box.close()
+
+
+def notification(n):
+    return {"name": f"event{n}", "data": {"n": n}, "meta": {"uuid": f"uuid-{n}"}}
+
+
+class TestOutbox:
+    def test_replay_in_order_and_dedup(self, outbox):
+        assert outbox.put(notification(1)) is True
+        assert outbox.put(notification(2)) is True
+        assert outbox.put(notification(1)) is False
+        sent = []
+        assert outbox.replay(lambda payload: sent.append(payload["name"]) or True) == 2
+        assert sent == ["event1", "event2"]
+        assert len(outbox) == 0
+
+    def test_failure_keeps_entries_and_backs_off(self, outbox):
+        outbox.put(notification(1))
+        outbox.put(notification(2))
+        assert outbox.replay(lambda payload: False) == 0
+        assert len(outbox) == 2
+        # Back-off: not retried before the delay
+        assert outbox.replay(lambda payload: True) == 0
+        assert len(outbox) == 2
+
+    def test_size_cap_drops_oldest(self, outbox):
+        outbox.max_bytes = 300
+        for n in range(10):
+            outbox.put(notification(n))
+        sent = []
+        outbox.replay(lambda payload: sent.append(payload["data"]["n"]) or True)
+        assert sent and sent[-1] == 9
+        assert 0 not in sent
@@ -0,0 +1,98 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Date partitions tests
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from monnet_gateway.database.partitions_model import PartitionsModel, to_days
+from monnet_gateway.tasks.prune_task import PruneTask
+
+
+def make_model(partitions=None, keys=None):
+    db = MagicMock()
+    db.fetchall.side_effect = lambda query, params: (
+        keys if "STATISTICS" in query else [dict(partition) for partition in partitions or []]
+    )
+    return PartitionsModel(db), db
+
+
+def make_task():
+    # No DB connection, only the partition logic
+    task = PruneTask.__new__(PruneTask)
+    task.logger = MagicMock()
+    return task
+
+
+class TestPartitionsModel:
+    def test_to_days(self):
+        # MySQL manual example: TO_DAYS('2007-10-07') = 733321
+        assert to_days(date(2007, 10, 7)) == 733321
+
+    def test_get_partitions(self):
+        model, _ = make_model([
+            {"name": "p20250101", "method": "RANGE", "less_than": "739618"},
+            {"name": "pmax", "method": "RANGE", "less_than": "MAXVALUE"},
+        ])
+        assert [p["less_than"] for p in model.get_partitions("stats")] == [739618, None]
+        assert model.is_partitioned("stats")
+
+    def test_add_and_drop(self):
+        model, db = make_model()
+        model.add_partitions("stats", [("p20250101", 739618)])
+        assert db.execute.call_args[0][0] == (
+            "ALTER TABLE stats REORGANIZE PARTITION pmax INTO (PARTITION p20250101 VALUES LESS THAN (739618), "
+            "PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        )
+        model.drop_partitions("stats", ["p20250101"])
+        assert db.execute.call_args[0][0] == "ALTER TABLE stats DROP PARTITION p20250101"
+        with pytest.raises(ValueError):
+            model.drop_partitions("stats", ["pmax"])
+
+    def test_add_date_to_keys(self):
+        model, db = make_model(keys=[
+            {"name": "PRIMARY", "col": "id"},
+            {"name": "uniq_stat", "col": "host_id"},
+            {"name": "uniq_stat", "col": "type"},
+            {"name": "uniq_stat", "col": "date"},
+        ])
+        assert model.add_date_to_keys("hosts_logs") == ["PRIMARY"]
+        assert db.execute.call_args[0][0] == "ALTER TABLE hosts_logs DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `date`)"
+
+
+class TestPruneTaskPartitions:
+    def test_create_partitions_ahead(self):
+        today = date.today()
+        model, db = make_model([{"name": "pmax", "method": "RANGE", "less_than": "MAXVALUE"}])
+        make_task().create_partitions(model, "stats", "day", 2)
+        created = db.execute.call_args[0][0]
+        for offset in range(3):
+            day = today + timedelta(days=offset)
+            assert f"PARTITION p{day.strftime('%Y%m%d')} VALUES LESS THAN ({to_days(day) + 1})" in created
+
+    def test_existing_partitions_not_recreated(self):
+        today = date.today()
+        model, db = make_model([
+            {"name": f"p{today.strftime('%Y%m%d')}", "method": "RANGE", "less_than": to_days(today) + 8},
+            {"name": "pmax", "method": "RANGE", "less_than": "MAXVALUE"},
+        ])
+        make_task().create_partitions(model, "stats", "week", 0)
+        db.execute.assert_not_called()
+
+    def test_drop_expired_partitions(self):
+        today = date.today()
+        model, db = make_model([
+            {"name": "pold", "method": "RANGE", "less_than": to_days(today - timedelta(days=40))},
+            {"name": "pedge", "method": "RANGE", "less_than": to_days(today - timedelta(days=29))},
+            {"name": "pmax", "method": "RANGE", "less_than": "MAXVALUE"},
+        ])
+        task = make_task()
+        task.drop_expired_partitions(model, "stats", 30)
+        assert db.execute.call_args[0][0] == "ALTER TABLE stats DROP PARTITION pold"
+        db.execute.reset_mock()
+        task.drop_expired_partitions(model, "stats", 0)
+        db.execute.assert_not_called()
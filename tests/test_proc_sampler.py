@@ -0,0 +1,50 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent proc sampler tests
+"""
+
+import pytest
+
+from monnet_agent.proc_sampler import (
+    CLK_TCK, ProcSampler, parse_cpu_ticks, parse_cpu_times, parse_loadavg, parse_meminfo, parse_mounts
+)
+
+
+class TestProcSampler:
+    def test_parsers(self):
+        assert parse_loadavg(b"0.50 1.25 2.00 1/234 5678\n") == (0.5, 1.25, 2.0)
+        meminfo = parse_meminfo(b"MemTotal:  1000 kB\nMemFree:  200 kB\nMemAvailable:  500 kB\nSwapFree: 1 kB\n")
+        assert meminfo == {"MemTotal": 1024000, "MemAvailable": 512000, "MemFree": 204800, "Cached": 0, "Buffers": 0}
+        stat = b"cpu  100 2 30 400 5 6 7 8 0 0\ncpu0 1 2 3 4 5 6 7 8 0 0\n"
+        assert parse_cpu_ticks(stat) == (100, 2, 30, 400, 5, 6, 7, 8)
+        assert parse_cpu_times(stat).iowait == 5 / CLK_TCK
+        mounts = b"/dev/sda1 / ext4 rw 0 0\nproc /proc proc rw 0 0\n"
+        assert parse_mounts(mounts) == [("/dev/sda1", "/", "ext4")]
+
+    def test_invalid_cpu_line(self):
+        with pytest.raises(ValueError):
+            parse_cpu_ticks(b"intr 1 2 3\n")
+
+    def test_pread_rereads_and_grows(self, tmp_path):
+        path = tmp_path / "meminfo"
+        path.write_bytes(b"MemTotal: 1 kB\n")
+        sampler = ProcSampler({"meminfo": str(path)})
+        assert sampler.memory()["MemTotal"] == 1024
+        path.write_bytes(b"X: 0 kB\n" * 1000 + b"MemTotal: 2 kB\n")
+        assert sampler.memory()["MemTotal"] == 2048
+        sampler.close()
+
+    def test_seq_file_read_past_first_page(self):
+        # seq_file: one read returns about one page, cut at a record boundary
+        with open("/proc/self/maps", "rb") as f:
+            expected = f.read()
+        if len(expected) < 8192:
+            pytest.skip("/proc/self/maps too small")
+        sampler = ProcSampler({"mounts": "/proc/self/maps"})
+        data = sampler.read("mounts")
+        assert len(data) > 8192 and data.endswith(b"\n")
+        assert data.splitlines()[-1] == expected.splitlines()[-1]
+        # Rereads from offset 0
+        assert sampler.read("mounts").splitlines()[0] == expected.splitlines()[0]
+        sampler.close()
@@ -0,0 +1,40 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent process stats tests
+"""
+
+import os
+import time
+
+from monnet_agent.process_stats import ProcessStats, parse_per_cpu, parse_pid_io, parse_pid_stat
+
+
+class TestProcessStats:
+    def test_parse_pid_stat(self):
+        fields = ["S"] + [str(n) for n in range(4, 53)]
+        data = ("42 (my (odd) proc) " + " ".join(fields)).encode()
+        # utime 14, stime 15, starttime 22, rss 24
+        assert parse_pid_stat(data) == ("my (odd) proc", 14 + 15, 24, 22)
+
+    def test_parse_io_and_cpus(self):
+        assert parse_pid_io(b"rchar: 9\nread_bytes: 100\nwrite_bytes: 20\ncancelled_write_bytes: 5\n") == 120
+        stat = b"cpu  10 0 10 80 0 0 0 0\ncpu0 5 0 5 30 10 0 0 0\ncpu1 5 0 5 50 0 0 0 0\nintr 1\n"
+        assert parse_per_cpu(stat) == [(10, 50), (10, 60)]
+
+    def test_budget_and_top(self):
+        collector = ProcessStats(top_n=2, max_fds=2, time_budget=5)
+        collector.sample()
+        deadline = time.process_time() + 0.2
+        while time.process_time() < deadline:
+            pass
+        stats = collector.sample()
+        assert collector.last_result is stats
+        assert os.getpid() in [p["pid"] for p in stats["top_cpu"]]
+        assert len(stats["top_rss"]) == 2
+        assert collector._open_fds <= 2
+        collector.max_pids = 1
+        stats = collector.sample()
+        assert stats["scanned"] == 1 and stats["truncated"]
+        collector.close()
+        assert collector._open_fds == 0
@@ -0,0 +1,65 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Gateway reverse resolver tests
+"""
+
+import socket
+from unittest.mock import MagicMock
+
+from monnet_gateway.networking import reverse_resolver
+from monnet_gateway.networking.reverse_resolver import ReverseResolver, close_reverse_resolver
+
+
+def fake_gethostbyaddr(ip):
+    if ip.endswith(".0"):
+        raise socket.herror(1, "Unknown host")
+    return f"host-{ip}", [], [ip]
+
+
+class TestReverseResolver:
+    def test_resolve_many(self, monkeypatch):
+        monkeypatch.setattr(reverse_resolver.socket, "gethostbyaddr", fake_gethostbyaddr)
+        resolver = ReverseResolver(max_workers=2)
+        try:
+            result = resolver.resolve_many(["10.0.0.1", "10.0.0.0", "10.0.0.1"])
+            assert result == {"10.0.0.1": "host-10.0.0.1", "10.0.0.0": None}
+            assert resolver.get("10.0.0.1") == "host-10.0.0.1"
+        finally:
+            resolver.close()
+
+    def test_cache_cap(self, monkeypatch):
+        monkeypatch.setattr(reverse_resolver.socket, "gethostbyaddr", fake_gethostbyaddr)
+        clock = [100.0]
+        monkeypatch.setattr(reverse_resolver, "monotonic", lambda: clock[0])
+        resolver = ReverseResolver(max_workers=1, ttl=50, negative_ttl=10, max_entries=3)
+        try:
+            resolver._lookup("10.0.0.0")
+            resolver._lookup("10.0.0.1")
+            resolver._lookup("10.0.0.2")
+            # Negative entry expired, dropped first
+            clock[0] = 120.0
+            resolver._lookup("10.0.0.3")
+            assert list(resolver._cache) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+            # Nothing expired, the oldest is dropped
+            resolver._lookup("10.0.0.4")
+            assert list(resolver._cache) == ["10.0.0.2", "10.0.0.3", "10.0.0.4"]
+            # Refreshed entry moves to the end
+            resolver._lookup("10.0.0.2")
+            resolver._lookup("10.0.0.5")
+            assert list(resolver._cache) == ["10.0.0.4", "10.0.0.2", "10.0.0.5"]
+        finally:
+            resolver.close()
+
+    def test_close_context_resolver(self):
+        ctx = MagicMock()
+        resolver = MagicMock()
+        ctx.get_var.return_value = resolver
+        close_reverse_resolver(ctx)
+        resolver.close.assert_called_once()
+        ctx.set_var.assert_called_once_with("reverse_resolver", None)
+
+        ctx = MagicMock()
+        ctx.get_var.return_value = None
+        close_reverse_resolver(ctx)
+        ctx.set_var.assert_not_called()
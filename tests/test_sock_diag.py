@@ -0,0 +1,62 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent sock_diag listen ports tests
+"""
+
+import os
+import socket
+import struct
+
+from monnet_agent.sock_diag import (
+    INET_DIAG_SKV6ONLY, NLMSG_DONE, SOCK_DIAG_BY_FAMILY, TCP_LISTEN, SocketOwners, format_address,
+    parse_diag_messages, parse_proc_net
+)
+
+
+def diag_message(family, address, port, inode, v6only=None):
+    body = struct.pack(
+        "=BBBB2s2s16s16sI8sIIIII", family, TCP_LISTEN, 0, 0, struct.pack("!H", port), b"\0\0",
+        address.ljust(16, b"\0"), bytes(16), 0, bytes(8), 0, 0, 0, 0, inode
+    )
+    if v6only is not None:
+        body += struct.pack("=HHB3x", 5, INET_DIAG_SKV6ONLY, int(v6only))
+    return struct.pack("=IHHII", 16 + len(body), SOCK_DIAG_BY_FAMILY, 2, 1, 0) + body
+
+
+class TestSockDiag:
+    def test_parse_diag_messages(self):
+        data = (diag_message(socket.AF_INET, socket.inet_aton("127.0.0.1"), 22, 100)
+                + diag_message(socket.AF_INET6, bytes(16), 443, 101, v6only=False)
+                + struct.pack("=IHHII", 20, NLMSG_DONE, 2, 1, 0) + bytes(4))
+        sockets, done = parse_diag_messages(data, "tcp")
+        assert done
+        assert [(s["port"], s["inode"]) for s in sockets] == [(22, 100), (443, 101)]
+        assert format_address(socket.AF_INET, sockets[0]["address"]) == "127.0.0.1"
+        assert format_address(socket.AF_INET6, sockets[1]["address"], v6only=sockets[1]["v6only"]) == "*"
+
+    def test_parse_proc_net(self):
+        address = "%08X" % struct.unpack("=I", socket.inet_aton("127.0.0.1"))[0]
+        lines = [
+            "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode",
+            f"   0: {address}:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 555 1",
+            f"   1: {address}:D431 {address}:0016 01 00000000:00000000 00:00000000 00000000     0        0 556 1",
+        ]
+        sockets = parse_proc_net(lines, "tcp", socket.AF_INET)
+        assert len(sockets) == 1
+        assert sockets[0]["port"] == 22 and sockets[0]["inode"] == 555
+        assert format_address(socket.AF_INET, sockets[0]["address"]) == "127.0.0.1"
+
+    def test_format_ipv6(self):
+        assert format_address(socket.AF_INET6, bytes(16), v6only=True) == "[::]"
+        assert format_address(socket.AF_INET6, socket.inet_pton(socket.AF_INET6, "::1")) == "[::1]"
+
+    def test_socket_owners_own_socket(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            inode = os.fstat(sock.fileno()).st_ino
+            owners = SocketOwners()
+            with open("/proc/self/comm", "r", encoding="utf-8") as f:
+                comm = f.read().strip()
+            assert owners.lookup({inode}) == {inode: comm}
+            # Cached, not searched again
+            assert owners.lookup({inode, 1}) == {inode: comm, 1: None}
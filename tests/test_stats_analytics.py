@@ -0,0 +1,72 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Stats analytics tests
+"""
+
+import numpy as np
+
+from monnet_gateway.services.stats_analytics import analyse_series, build_series, rolling_baselines, rows_to_array
+
+PING = 1
+LOAD = 2
+
+
+def rows(host_id, stat_type, values, lost=0):
+    """ Bucketed rows, values oldest first (bucket 0 is the newest), None is a gap """
+    n_buckets = len(values)
+    return [
+        {"host_id": host_id, "type": stat_type, "bucket": n_buckets - 1 - column,
+         "value": value, "samples": 4, "lost": lost}
+        for column, value in enumerate(values) if value is not None
+    ]
+
+
+class TestBuildSeries:
+    def test_matrix_with_gaps(self):
+        data = rows_to_array(
+            rows(10, PING, [1.0, None, 3.0, -1]) + rows(20, PING, [5.0, 5.0, 5.0, 5.0]) + rows(10, LOAD, [9.0] * 4)
+        )
+        series = build_series(data, PING, 4)
+        assert list(series["hosts"]) == [10, 20]
+        # Gap and invalid (-1) buckets are NaN, empty buckets have no samples
+        assert np.array_equal(series["values"][0], [1.0, np.nan, 3.0, np.nan], equal_nan=True)
+        assert list(series["samples"][0]) == [4, 0, 4, 4]
+        assert list(series["values"][1]) == [5.0] * 4
+
+    def test_out_of_range_buckets(self):
+        data = rows_to_array(rows(10, PING, [1.0, 2.0, 3.0]))
+        series = build_series(data, PING, 2)
+        assert list(series["values"][0]) == [2.0, 3.0]
+
+
+class TestAnalytics:
+    def test_rolling_baselines_exclude_current_bucket(self):
+        values = np.array([[1.0, 2.0, 3.0, np.nan, 100.0]])
+        baselines, stds = rolling_baselines(values, window=3, min_std=0.5)
+        # Not enough samples before the third bucket
+        assert np.isnan(baselines[0, :3]).all()
+        assert baselines[0, 3] == 2.0
+        # The gap is skipped: window [2.0, 3.0, NaN] has two samples
+        assert np.isnan(baselines[0, 4])
+        assert np.isclose(stds[0, 3], np.sqrt(2 / 3))
+
+    def test_constant_series_uses_std_floor(self):
+        values = np.array([[5.0] * 10, [5.0] * 9 + [8.0]])
+        series = {"hosts": np.array([1, 2]), "values": values,
+                  "samples": np.ones((2, 10), dtype=np.int64), "lost": np.zeros((2, 10), dtype=np.int64)}
+        result = analyse_series(series, window=8, recent=1, min_std=1.0)
+        # std 0 floored to min_std: same value z-score 0, +3 is z-score 3
+        assert list(result["zscore"]) == [0.0, 3.0]
+        assert list(result["baseline"]) == [5.0, 5.0]
+
+    def test_threshold_crossing_and_loss(self):
+        baseline = [10.0, 11.0, 9.0, 10.0, 11.0, 9.0, 10.0, 10.0]
+        data = rows_to_array(
+            rows(1, PING, baseline + [10.5, 10.0]) + rows(2, PING, baseline + [30.0, 32.0], lost=1)
+        )
+        result = analyse_series(build_series(data, PING, 10), window=8, recent=2, min_std=1.0)
+        degraded = np.flatnonzero(result["zscore"] >= 3.0)
+        assert list(result["hosts"][degraded]) == [2]
+        assert result["recent"][1] == 31.0
+        assert list(result["loss_ratio"]) == [0.0, 0.25]
@@ -0,0 +1,59 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+TCP Sweep tests
+"""
+
+import socket
+
+from monnet_gateway.networking.tcp_sweep import TcpSweeper
+
+
+def listen(count):
+    socks = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(16)
+        socks.append(sock)
+    return socks
+
+
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestTcpSweeper:
+    def test_open_and_closed_ports(self):
+        listeners = listen(3)
+        try:
+            open_ports = [sock.getsockname()[1] for sock in listeners]
+            closed = closed_port()
+            targets = [("127.0.0.1", port, 1.0) for port in open_ports + [closed]]
+            results = TcpSweeper().check(targets)
+        finally:
+            for sock in listeners:
+                sock.close()
+
+        assert len(results) == 4
+        for port in open_ports:
+            assert results[("127.0.0.1", port)]["online"] == 1
+            assert results[("127.0.0.1", port)]["latency"] is not None
+        assert results[("127.0.0.1", closed)]["online"] == 0
+        assert results[("127.0.0.1", closed)]["error"]
+
+    def test_limits_check_every_target(self):
+        listeners = listen(10)
+        try:
+            targets = [("127.0.0.1", sock.getsockname()[1], 1.0) for sock in listeners]
+            results = TcpSweeper(max_inflight=3, per_target=1).check(targets)
+        finally:
+            for sock in listeners:
+                sock.close()
+
+        assert len(results) == 10
+        assert all(result["online"] == 1 for result in results.values())
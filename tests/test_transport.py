@@ -0,0 +1,44 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+Agent transport tests
+"""
+
+import gzip
+import json
+from unittest.mock import MagicMock
+
+from monnet_agent.transport import PAYLOAD_VERSION_JSON, AgentTransport
+
+
+def transport(mock_logger, **kwargs):
+    mock_ctx = MagicMock()
+    mock_ctx.get_logger.return_value = mock_logger
+    return AgentTransport(mock_ctx, "localhost:443", **kwargs)
+
+
+class TestAgentTransport:
+    def test_small_body_not_compressed(self, mock_logger):
+        body, headers = transport(mock_logger, compression="gzip").encode({"a": 1})
+        assert json.loads(body) == {"a": 1}
+        assert "Content-Encoding" not in headers
+
+    def test_gzip_above_threshold(self, mock_logger):
+        payload = {"data": "x" * 2000}
+        body, headers = transport(mock_logger, compression="gzip", compress_min_bytes=100).encode(payload)
+        assert headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(body)) == payload
+
+    def test_415_falls_back_to_plain_json(self, mock_logger):
+        agent_transport = transport(mock_logger, compression="gzip", compress_min_bytes=0)
+        sent = []
+
+        def post(endpoint, body, headers):
+            sent.append(headers.get("Content-Encoding"))
+            return (415, "Unsupported Media Type", "") if len(sent) == 1 else (200, "OK", "{}")
+
+        agent_transport._post = post
+        assert agent_transport.post_json("/x", {"a": 1})[0] == 200
+        assert sent == ["gzip", None]
+        assert agent_transport.compression == "none"
+        assert agent_transport.payload_version == PAYLOAD_VERSION_JSON
@@ -0,0 +1,33 @@
+"""
+@copyright CC BY-NC-ND 4.0 @ 2020 - 2025 Diego Garcia (diego/@/envigo.net)
+
+UDP Probes tests
+"""
+
+import struct
+
+from monnet_gateway.networking.udp_probes import DEFAULT_PROBE, get_probe
+
+
+class TestUdpProbes:
+    def test_probe_by_port_and_service(self):
+        assert get_probe(53).name == "dns"
+        assert get_probe(123).name == "ntp"
+        assert get_probe(5353, "Domain").name == "dns"
+        assert get_probe(40000) is DEFAULT_PROBE
+        assert get_probe(40000, "unknown") is DEFAULT_PROBE
+        assert get_probe(514).silent
+
+    def test_dns_query(self):
+        payload = get_probe(53).build()
+        _, flags, qdcount, _, _, _ = struct.unpack("!HHHHHH", payload[:12])
+        assert flags == 0x0100
+        assert qdcount == 1
+        assert payload[12:] == b"\x00\x00\x02\x00\x01"
+
+    def test_snmp_lengths(self):
+        payload = get_probe(161).build()
+        assert payload[0] == 0x30
+        assert payload[1] == len(payload) - 2
+        pdu = payload.index(b"\xa0")
+        assert payload[pdu + 1] == len(payload) - pdu - 2